@@ -13,6 +13,7 @@ setup(name='thunderfish',
             'collectfish = thunderfish.collectfish:main',
             'eodexplorer = thunderfish.eodexplorer:main',
             'tracker = thunderfish.tracker_v2:main',
+            'ingest = thunderfish.datacache:main',
         ]},
       description='Algorithms and scripts for analyzing recordings of e-fish electric fields.',
       author='Jan Benda, Juan F. Sehuanes, Till Raab, Joerg Henninger, Jan Grewe, Fabian Sinz',
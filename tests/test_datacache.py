@@ -0,0 +1,116 @@
+from nose.tools import assert_true, assert_equal, with_setup
+import os
+import time
+import shutil
+import pickle
+import numpy as np
+import thunderfish.dataloader as dl
+import thunderfish.datacache as dc
+
+
+fishgrid_path = 'test_fishgrid'
+pickle_path = 'test_datacache.pkl'
+
+
+def generate_data():
+    samplerate = 20000.0
+    duration = 10.0
+    t = np.arange(int(duration*samplerate))/samplerate
+    data = np.zeros((len(t), 4))
+    for k in range(data.shape[1]):
+        data[:,k] = np.sin(2.0*np.pi*(400.0 + 100.0*k)*t)/(k + 1)
+    return data, samplerate
+
+
+def write_fishgrid(path, data, samplerate):
+    remove_fishgrid_files()
+    os.mkdir(path)
+    with open(os.path.join(path, 'traces-grid1.raw'), 'wb') as df:
+        df.write(np.array(data, dtype=np.float32).tobytes())
+    with open(os.path.join(path, 'fishgrid.cfg'), 'w') as df:
+        df.write('*FishGrid\n')
+        df.write('  Grid &1\n')
+        df.write('     Used1      : true\n')
+        df.write('     Columns    : 2\n')
+        df.write('     Rows       : %d\n' % (data.shape[1]//2))
+        df.write('  Hardware Settings\n')
+        df.write('    DAQ board:\n')
+        df.write('      AISampleRate: %.3fkHz\n' % (0.001*samplerate))
+        df.write('      AIMaxVolt   : 10.0mV\n')
+
+
+def remove_fishgrid_files():
+    for path in [fishgrid_path, dl.cache_path(fishgrid_path)]:
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+
+
+@with_setup(None, remove_fishgrid_files)
+def test_ingest():
+    data, samplerate = generate_data()
+    write_fishgrid(fishgrid_path, data, samplerate)
+    orig_data, rate, unit = dl.load_data(fishgrid_path, -1)
+    assert_true(dl.find_cache(fishgrid_path) is None, 'no cache before ingest')
+    cachepath = dc.ingest(fishgrid_path, decimate=4, blocksize=1.0)
+    assert_equal(cachepath, dl.cache_path(fishgrid_path), 'path of cache')
+    assert_equal(dl.find_cache(fishgrid_path), cachepath, 'cache is found')
+    metadata = dl.cache_metadata(cachepath)
+    assert_equal(metadata['format'], 'fishgrid', 'format of recording')
+    assert_equal(metadata['samplerate'], samplerate, 'sampling rate')
+    assert_equal(metadata['grids'], [[2, 2]], 'grid layout')
+    cdata, rate, unit = dl.load_data(fishgrid_path, -1)
+    assert_equal(rate, samplerate, 'sampling rate of cached data')
+    assert_true(np.all(cdata[:len(orig_data)] == orig_data), 'cached data')
+    cdata, rate, unit = dl.load_data(fishgrid_path, 2, dtype=np.float32)
+    assert_true(cdata.dtype == np.float32, 'cached data are float32')
+    assert_true(np.all(cdata[:len(orig_data)] == orig_data[:,2]), 'cached channel')
+    with dl.DataLoader(fishgrid_path, -1, 1.0) as data:
+        assert_true(data.traces is not None, 'DataLoader reads cache')
+        assert_true(np.all(data[1000:5000] == orig_data[1000:5000]), 'cached slice')
+        assert_true(np.all(data[1000:5000, 3] == orig_data[1000:5000, 3]), 'cached channel slice')
+    with dl.DataLoader(fishgrid_path, [3, 1], 1.0) as data:
+        assert_true(np.all(data[1000:5000] == orig_data[1000:5000, [3, 1]]), 'cached channel list')
+    ddata, rate, unit = dc.load_decimated(fishgrid_path)
+    assert_equal(rate, samplerate/4, 'sampling rate of decimated data')
+    assert_equal(ddata.shape, ((len(cdata) + 3)//4, 4), 'shape of decimated data')
+    assert_true(np.max(np.abs(ddata[1000:-1000,1] - orig_data[4000:-4000:4,1])) < 0.01,
+                'decimated data')
+    # modifying the recording invalidates the cache:
+    mtime = time.time() + 10.0
+    os.utime(os.path.join(fishgrid_path, 'traces-grid1.raw'), (mtime, mtime))
+    assert_true(dl.find_cache(fishgrid_path) is None, 'outdated cache')
+
+
+@with_setup(None, remove_fishgrid_files)
+def test_ingest_spectrogram():
+    data, samplerate = generate_data()
+    write_fishgrid(fishgrid_path, data, samplerate)
+    dc.ingest(fishgrid_path, spec_resolution=10.0, spec_max_freq=1000.0, blocksize=1.0)
+    spec, freqs, times = dc.load_spectrogram(fishgrid_path)
+    assert_equal(spec.shape, (len(freqs), len(times)), 'shape of spectrogram')
+    assert_true(freqs[-1] <= 1000.0, 'maximum frequency of spectrogram')
+    assert_true(np.abs(freqs[np.argmax(np.mean(spec, axis=1))] - 400.0) < 10.0,
+                'peak frequency of spectrogram')
+
+
+def remove_pickle_files():
+    for path in [pickle_path, dl.cache_path(pickle_path)]:
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        elif os.path.isfile(path):
+            os.remove(path)
+
+
+@with_setup(None, remove_pickle_files)
+def test_ingest_pickle_precision():
+    data, samplerate = generate_data()
+    data += 1e-9
+    with open(pickle_path, 'wb') as df:
+        pickle.dump(dict(time_trace=np.arange(len(data))*1000.0/samplerate,
+                         raw_data=data), df)
+    dc.ingest(pickle_path)
+    assert_equal(dl.cache_metadata(dl.cache_path(pickle_path))['dtype'], 'float64',
+                 'float64 pickle is cached as float64')
+    cdata, rate, unit = dl.load_data(pickle_path, -1)
+    assert_true(dl.find_cache(pickle_path) is not None, 'cache is found')
+    assert_true(np.all(cdata == data), 'cached data keep their precision')
@@ -134,3 +134,152 @@ def test_dataloader_fishgrid():
     data, samplerate = generate_data()
     write_fishgrid(fishgrid_path, data, samplerate)
     check_reading(fishgrid_path, data)
+
+
+def check_mmap(filename, data):
+    tolerance = 2.0**(-15)
+    full_data, rate, unit = dl.load_data(filename, -1)
+    with dl.DataLoader(filename, -1, mmap=True) as mdata:
+        assert_true(mdata.shape[1] == full_data.shape[1], 'channels of memory mapped data')
+        x = mdata[1000:5000]
+        assert_true(x.dtype == np.float32, 'memory mapped data are float32')
+        assert_true(np.all(np.abs(full_data[1000:5000] - x) < tolerance), 'memory mapped slice')
+        for c in range(mdata.channels):
+            x = mdata[2000:3000, c]
+            assert_true(np.all(np.abs(full_data[2000:3000, c] - x) < tolerance),
+                        'memory mapped channel %d' % c)
+        x = mdata[1234, 1:3]
+        assert_true(np.all(np.abs(full_data[1234, 1:3] - x) < tolerance), 'memory mapped frame')
+    with dl.DataLoader(filename, 1, mmap=True) as mdata:
+        x = mdata[500:600]
+        assert_true(np.all(np.abs(full_data[500:600, 1] - x) < tolerance), 'memory mapped single channel')
+
+
+@with_setup(None, remove_relacs_files)
+def test_mmap_relacs():
+    data, samplerate = generate_data()
+    write_relacs(relacs_path, data, samplerate)
+    full_data, rate, unit = dl.load_relacs(relacs_path, -1, mmap=True)
+    assert_true(full_data.dtype == np.float32, 'load_relacs() with mmap returns float32')
+    check_mmap(relacs_path, data)
+
+
+@with_setup(None, remove_fishgrid_files)
+def test_mmap_fishgrid():
+    data, samplerate = generate_data()
+    write_fishgrid(fishgrid_path, data, samplerate)
+    full_data, rate, unit = dl.load_fishgrid(fishgrid_path, -1, mmap=True)
+    assert_true(isinstance(full_data, np.memmap), 'load_fishgrid() with mmap returns memmap')
+    assert_true(np.all(np.abs(data[:-2, :] - full_data) < 2.0**(-15)), 'load_fishgrid() with mmap')
+    check_mmap(fishgrid_path, data)
+
+
+def check_prefetch(filename):
+    tolerance = 2.0**(-15)
+    full_data, rate, unit = dl.load_data(filename, -1)
+    with dl.DataLoader(filename, -1, 2.0, 0.5, prefetch=2) as data:
+        nframes = int(0.7*data.samplerate)
+        for inx in range(0, len(full_data)-nframes, nframes):
+            assert_true(np.all(np.abs(full_data[inx:inx+nframes] - data[inx:inx+nframes]) < tolerance),
+                        'prefetched forward access failed at index %d' % inx)
+        for inx in np.random.randint(0, len(full_data)-nframes, 100):
+            assert_true(np.all(np.abs(full_data[inx:inx+nframes] - data[inx:inx+nframes]) < tolerance),
+                        'prefetched random access failed at index %d' % inx)
+
+
+@with_setup(None, remove_relacs_files)
+def test_prefetch_relacs():
+    data, samplerate = generate_data()
+    write_relacs(relacs_path, data, samplerate)
+    check_prefetch(relacs_path)
+
+
+@with_setup(None, remove_fishgrid_files)
+def test_prefetch_fishgrid():
+    data, samplerate = generate_data()
+    write_fishgrid(fishgrid_path, data, samplerate)
+    check_prefetch(fishgrid_path)
+
+
+def check_channels(filename):
+    tolerance = 2.0**(-15)
+    full_data, rate, unit = dl.load_data(filename, -1)
+    channels = [3, 1]
+    for mmap in [False, True]:
+        with dl.DataLoader(filename, channels, 2.0, 0.5, mmap=mmap) as data:
+            assert_true(data.shape == (data.frames, len(channels)), 'shape of channel subset')
+            nframes = int(0.7*data.samplerate)
+            for inx in np.random.randint(0, len(full_data)-nframes, 100):
+                assert_true(np.all(np.abs(full_data[inx:inx+nframes, channels] - data[inx:inx+nframes]) < tolerance),
+                            'access of channel subset failed at index %d' % inx)
+
+
+@with_setup(None, remove_relacs_files)
+def test_channels_relacs():
+    data, samplerate = generate_data()
+    write_relacs(relacs_path, data, samplerate)
+    check_channels(relacs_path)
+
+
+@with_setup(None, remove_fishgrid_files)
+def test_channels_fishgrid():
+    data, samplerate = generate_data()
+    write_fishgrid(fishgrid_path, data, samplerate)
+    check_channels(fishgrid_path)
+
+
+def check_blocks(filename):
+    full_data, rate, unit = dl.load_data(filename, -1)
+    for mmap in [True, False]:
+        with dl.DataLoader(filename, -1, 2.0, 0.0, mmap=mmap) as data:
+            n = len(full_data)
+            offsets = []
+            for offset, block in data.blocks(30000, 5000, stop=n):
+                offsets.append(offset)
+                assert_true(np.all(block == data[offset:offset+len(block)]), 'block at %d' % offset)
+            assert_true(offsets == list(range(0, n - 5000, 25000)), 'offsets of blocks')
+            assert_true(offset + len(block) == n, 'last block')
+            for offset, block in data.blocks(10000, channels=2, start=1000, stop=50000):
+                assert_true(np.all(block == data[offset:offset+len(block), 2]), 'block of channel')
+            x = data[:len(data), 1]
+            from scipy.signal import firwin
+            y = np.convolve(x, firwin(20*4 + 1, 1.0/4, window='hamming'), 'same')
+            for offset, block in data.blocks(30000, 5000, channels=[1], decimate=4):
+                assert_true(block.shape[1] == 1, 'decimated block of single channel')
+                assert_true(np.all(np.abs(y[offset:offset+30000:4] - block[:,0]) < 1e-5), 'decimated block at %d' % offset)
+
+
+@with_setup(None, remove_fishgrid_files)
+def test_blocks():
+    data, samplerate = generate_data()
+    write_fishgrid(fishgrid_path, data, samplerate)
+    check_blocks(fishgrid_path)
+
+
+@with_setup(None, remove_relacs_files)
+def test_float32():
+    data, samplerate = generate_data()
+    write_relacs(relacs_path, data, samplerate)
+    full_data, rate, unit = dl.load_data(relacs_path, -1)
+    sdata, rate, unit = dl.load_data(relacs_path, -1, dtype=np.float32)
+    assert_true(sdata.dtype == np.float32, 'load_data() returns float32')
+    assert_true(np.all(full_data == sdata), 'float32 data equal float64 data')
+    with dl.DataLoader(relacs_path, -1, 2.0, 0.5, dtype=np.float32) as bdata:
+        for inx in range(0, len(full_data)-1000, 50000):
+            x = bdata[inx:inx+1000]
+            assert_true(x.dtype == np.float32, 'buffered data are float32')
+            assert_true(np.all(full_data[inx:inx+1000] == x),
+                        'float32 buffered access failed at index %d' % inx)
+
+
+@with_setup(None, remove_relacs_files)
+def test_parallel_relacs():
+    data, samplerate = generate_data()
+    write_relacs(relacs_path, data, samplerate)
+    full_data, rate, unit = dl.load_relacs(relacs_path, -1)
+    for jobs in [0, 2, 8]:
+        pdata, prate, punit = dl.load_relacs(relacs_path, -1, jobs=jobs)
+        assert_true(np.all(full_data == pdata), 'parallel load_relacs() with %d jobs' % jobs)
+        assert_true(prate == samplerate and punit == 'V', 'sampling rate and unit')
+    pdata, prate, punit = dl.load_relacs(relacs_path, 2, jobs=0)
+    assert_true(np.all(full_data[:,2] == pdata), 'parallel load_relacs() of single channel')
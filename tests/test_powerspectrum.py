@@ -47,3 +47,22 @@ def test_peak_freqs():
     mfreqs = ps.peak_freqs(onsets, offsets, data, 1.0/dt, freq_resolution=df)
     assert_true(np.all(np.abs(freqs - mfreqs) <= 2.0*df), "peak_freqs() failed")
     
+
+
+def test_float32():
+    samplerate = 20000.0
+    time = np.arange(0, 4.0, 1.0/samplerate)
+    data = np.sin(2.0*np.pi*300.0*time) + 0.1*np.sin(2.0*np.pi*1234.0*time)
+    freqs, power = ps.psd(data, samplerate, 1.0)
+    sfreqs, spower = ps.psd(data, samplerate, 1.0, dtype=np.float32)
+    assert_equal(spower.dtype, np.float32, 'psd() returns float32 power')
+    assert_true(np.all(freqs == sfreqs), 'frequencies of float32 psd')
+    assert_true(np.max(np.abs(power - spower)) < 1e-5*np.max(power),
+                'float32 psd differs from float64 psd')
+    spec, freqs, times = ps.spectrogram(data, samplerate, 2.0)
+    sspec, sfreqs, stimes = ps.spectrogram(data, samplerate, 2.0, dtype=np.float32)
+    assert_equal(sspec.dtype, np.float32, 'spectrogram() returns float32 spectrum')
+    assert_true(np.max(np.abs(spec - sspec)) < 1e-5*np.max(spec),
+                'float32 spectrogram differs from float64 spectrogram')
+    psd_data = ps.multi_psd(data, samplerate, 1.0, dtype=np.float32)
+    assert_equal(psd_data[0].dtype, np.float32, 'multi_psd() returns float32 spectra')
@@ -0,0 +1,51 @@
+from nose.tools import assert_true, assert_equal
+import os
+import numpy as np
+import thunderfish.tabledata as td
+import thunderfish.resultsdb as rdb
+
+
+def wave_tables(eodfs):
+    fish = td.TableData()
+    fish.append('index', '', '%d')
+    fish.append('EODf', 'Hz', '%.2f')
+    fish.append('noise', '%', '%.1f')
+    tables = {'wavefish': fish}
+    for k, eodf in enumerate(eodfs):
+        fish.append_data([k, eodf, 2.5*k], 0)
+        spec = td.TableData()
+        spec.append('harmonics', '', '%d', list(range(4)))
+        spec.append('amplitude', 'mV', '%.5f', list(np.linspace(1.0, 0.1, 4)))
+        spec.append('relampl', '%', '%.2f', list(np.linspace(100.0, 10.0, 4)))
+        spec.append('relpower', '%', '%.2f', list(np.linspace(0.0, -20.0, 4)))
+        spec.append('phase', 'rad', '%.3f', [0.0, 1.0, float('NaN') if k == 1 else 2.0, 3.0])
+        tables['wavespectrum-%d' % k] = spec
+    return tables
+
+
+def test_resultsdb():
+    db_file = 'test.db'
+    rdb.write_results(db_file, 'rec1', wave_tables([600.0, 820.5]), 'rec1.wav')
+    rdb.write_results(db_file, 'rec2', wave_tables([430.2]), 'rec2.wav')
+    rdb.write_results(db_file, 'rec1', wave_tables([610.0, 820.5, 900.0]), 'rec1.wav')
+    assert_equal(rdb.recordings(db_file), ['rec2', 'rec1'], 'recordings')
+    data = rdb.load_fish(db_file, 'wave')
+    assert_equal(data.shape, (4, 4), 'shape of fish table')
+    assert_equal(data.keys(), ['file', 'index', 'EODf', 'noise'], 'columns of fish table')
+    assert_equal(data.unit('EODf'), 'Hz', 'unit of EODf')
+    assert_equal(data.format('noise'), '%.1f', 'format of noise')
+    assert_true(np.all(data[:,'EODf'] == [430.2, 610.0, 820.5, 900.0]), 'EOD frequencies')
+    data = rdb.load_fish(db_file, 'wave', '"EODf" > ? and noise < ?', (500.0, 3.0))
+    assert_equal(list(data[:,'file']), ['rec1', 'rec1'], 'selected recordings')
+    assert_equal(list(data[:,'index']), [0, 1], 'selected fish')
+    data = rdb.load_fish(db_file, 'wave', harmonics=3)
+    assert_equal(data.columns(), 4 + 2 + 3*4, 'number of columns with harmonics')
+    assert_true(np.all(data[:,'relampl2'] == 40.0), 'relative amplitude of second harmonics')
+    assert_equal(np.sum(np.isnan(data[:,'phase2'])), 1, 'missing phase')
+    data = rdb.load_fish(db_file, 'wave', harmonics=5)
+    assert_equal(data.columns(), 4 + 2 + 3*4, 'empty harmonics columns are removed')
+    spec = rdb.load_table(db_file, 'wavespectrum', 'rec1', 2)
+    assert_equal(spec.shape, (4, 5), 'shape of spectrum')
+    assert_equal(spec.unit('amplitude'), 'mV', 'unit of spectrum amplitude')
+    assert_true(np.all(spec[:,'harmonics'] == np.arange(4)), 'harmonics of spectrum')
+    os.remove(db_file)
@@ -0,0 +1,86 @@
+from nose.tools import assert_true, assert_equal, with_setup
+import os
+import shutil
+import numpy as np
+import thunderfish.spectiles as st
+
+
+tiles_path = 'test_spectiles'
+
+
+def remove_tiles():
+    if os.path.isdir(tiles_path):
+        shutil.rmtree(tiles_path)
+
+
+@with_setup(None, remove_tiles)
+def test_spectiles():
+    rng = np.random.RandomState(42)
+    freqs = np.arange(600)*0.5
+    times = 10.0 + np.arange(5000)*0.1
+    spec = rng.rand(len(freqs), len(times)).astype(np.float32)
+    with st.SpecTilesWriter(tiles_path, tile_size=128, min_freqs=200) as tiles:
+        k = 0
+        for n in [1, 300, 77, 1000, 2000, 1622]:
+            tiles.append(spec[:,k:k+n], freqs, times[k:k+n])
+            k += n
+    assert_true(st.check_spectiles(tiles_path), 'tiles written')
+    tiles = st.SpecTiles(tiles_path)
+    assert_equal(tiles.levels[-1]['columns'] <= 128, True, 'top level fits into a tile')
+    # full resolution:
+    s, f, t = tiles.spectrogram(100.0, 300.0, 20.0, 100.0, level=0)
+    fmask = (freqs >= 20.0) & (freqs <= 100.0)
+    tmask = (times >= 100.0 - 1e-8) & (times <= 300.0 + 1e-8)
+    assert_true(np.all(f == freqs[fmask]), 'frequencies')
+    assert_true(np.allclose(t, times[tmask]), 'times')
+    assert_true(np.all(s == spec[fmask][:,tmask]), 'spectrogram at level 0')
+    # first coarser level pools pairs of time bins and frequencies:
+    s, f, t = tiles.spectrogram(times[0], times[-1], level=1)
+    pooled = np.max(np.max(spec.reshape((300, 2, 2500, 2)), axis=3), axis=1)
+    assert_equal(s.shape, (300, 2500), 'shape of level 1')
+    assert_true(np.all(s == pooled), 'spectrogram at level 1')
+    assert_true(np.allclose(t, 0.5*(times[0::2] + times[1::2])), 'times of level 1')
+    # number of columns is bounded:
+    s, f, t = tiles.spectrogram(times[0], times[-1], max_columns=700)
+    assert_true(350 < s.shape[1] <= 700, 'level selected by number of columns')
+    assert_true(np.max(s) == np.max(spec), 'maximum is preserved')
+
+
+def remove_restore_tiles():
+    for path in [tiles_path, tiles_path + '-full']:
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+
+
+@with_setup(None, remove_restore_tiles)
+def test_restore():
+    rng = np.random.RandomState(42)
+    freqs = np.arange(300)*0.5
+    times = np.arange(3000)*0.1
+    spec = rng.rand(len(freqs), len(times)).astype(np.float32)
+    with st.SpecTilesWriter(tiles_path + '-full', tile_size=64, min_freqs=100) as tiles:
+        tiles.append(spec, freqs, times)
+    tiles = st.SpecTilesWriter(tiles_path, tile_size=64, min_freqs=100)
+    tiles.append(spec[:,:1100], freqs, times[:1100])
+    state = tiles.state()
+    # interrupted after the state was taken:
+    tiles.append(spec[:,1100:1500], freqs, times[1100:1500])
+    del tiles
+    assert_true(not st.check_spectiles(tiles_path), 'interrupted tiles incomplete')
+    with st.SpecTilesWriter(tiles_path, tile_size=64, min_freqs=100) as tiles:
+        tiles.restore(state)
+        tiles.append(spec[:,1100:], freqs, times[1100:])
+    assert_true(st.check_spectiles(tiles_path), 'tiles written')
+    tiles = st.SpecTiles(tiles_path)
+    full_tiles = st.SpecTiles(tiles_path + '-full')
+    assert_equal(tiles.levels, full_tiles.levels, 'levels')
+    for level in range(len(tiles.levels)):
+        s, f, t = tiles.spectrogram(times[0], times[-1], level=level)
+        fs, ff, ft = full_tiles.spectrogram(times[0], times[-1], level=level)
+        assert_true(np.all(s == fs), 'spectrogram at level %d' % level)
+        assert_true(np.all(t == ft), 'times at level %d' % level)
+    try:
+        st.SpecTilesWriter(tiles_path).restore(dict(state, tilespath='other'))
+        assert_true(False, 'state of other tiles restored')
+    except ValueError:
+        pass
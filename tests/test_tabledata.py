@@ -173,6 +173,46 @@ def test_write_load():
                             os.remove(orgfilename)
                             os.remove(filename)
 
+def test_load_large():
+    df = setup_table()
+    df.clear_data()
+    data = np.random.randn(25000, df.columns())
+    data[1000:1010,2] = np.nan
+    df.append_data(data)
+    for tf in ['dat', 'csv', 'rtai']:
+        orgfilename = 'tabletest.' + td.TableData.extensions[tf]
+        df.write(orgfilename, table_format=tf)
+        for columnar in [False, True]:
+            sf = td.TableData(orgfilename, columnar=columnar)
+            assert_equal(sf.shape, df.shape, 'shape of loaded %s table' % tf)
+            assert_true(np.all(np.isnan(sf[1000:1010,2])), 'missing values of %s table' % tf)
+            filename = 'tabletest-read.' + td.TableData.extensions[tf]
+            sf.write(filename, table_format=tf)
+            with open(orgfilename, 'r') as f1, open(filename, 'r') as f2:
+                assert_equal(f1.read(), f2.read(), 'loaded %s table differs' % tf)
+            os.remove(filename)
+        os.remove(orgfilename)
+
+def test_table_writer():
+    df = setup_table()
+    data = df.array()
+    for tf in ['dat', 'csv', 'rtai', 'md']:
+        filename = 'tabletest.' + td.TableData.extensions[tf]
+        with td.TableWriter(filename, df, table_format=tf) as tw:
+            tw.write_row(data[0])
+            tw.write_rows(data[1:3])
+        tw = td.TableWriter(filename, df, table_format=tf, append=True)
+        tw.write_rows(df[3:,:])
+        tw.close()
+        sf = td.TableData(filename)
+        assert_equal(sf.shape, df.shape, 'shape of streamed %s table' % tf)
+        if tf in ['dat', 'rtai']:
+            assert_equal(sf.header, df.header, 'header of streamed %s table' % tf)
+        os.remove(filename)
+    df.write('tabletest.tex')
+    assert_raises(ValueError, td.TableWriter, 'tabletest.tex', df, append=True)
+    os.remove('tabletest.tex')
+
 def test_read_access():
     df = setup_table()
     df.clear_data()
@@ -294,3 +334,54 @@ def test_hide_show():
         assert_equal(sf.columns(), 1, 'wrong number of columns written')
         df.hide(c)
     os.remove(filename)
+
+def test_write_load_bundle():
+    filename = 'tabletest-bundle.npz'
+    df = setup_table()
+    df.insert(0, 'ID', '', '%-s', list('ABCDEFGH'))
+    sf = td.TableData(np.random.randn(4, 3), ['aaa', 'bbb', 'ccc'], ['m', 's', 'g'], '%.3f')
+    fn = td.write_bundle(filename[:-4], {'table': df, 'other': sf})
+    assert_equal(fn, filename, 'wrong file name of bundle')
+    tables = td.load_bundle(filename)
+    assert_equal(list(tables.keys()), ['table', 'other'], 'wrong table names in bundle')
+    for org, tf in zip([df, sf], tables.values()):
+        assert_equal(tf.shape, (org.rows(), org.columns()), 'shape of loaded table differs')
+        assert_equal(tf.header, org.header, 'header of loaded table differs')
+        assert_equal(tf.units, org.units, 'units of loaded table differ')
+        assert_equal(tf.formats, org.formats, 'formats of loaded table differ')
+        assert_equal(str(tf), str(org), 'content of loaded table differs')
+    os.remove(filename)
+
+def test_columnar():
+    df = setup_table()
+    df.insert(0, 'ID', '', '%-s', list('ABCDEFGH'))
+    cf = td.TableData(columnar=True)
+    for c in range(df.columns()):
+        cf.append(df.header[c][::-1], df.units[c], df.formats[c], df.data[c])
+    cf.nsecs = df.nsecs
+    for c in range(df.columns()):
+        assert_true(isinstance(cf.data[c], td.ArrayColumn), 'column %d is not an ArrayColumn' % c)
+    assert_equal(str(cf), str(df), 'columnar table differs')
+    for tf in td.TableData.formats:
+        with open('tabletest-list.txt', 'w') as f1, open('tabletest-columnar.txt', 'w') as f2:
+            df.write(f1, table_format=tf)
+            cf.write(f2, table_format=tf)
+        with open('tabletest-list.txt', 'r') as f1, open('tabletest-columnar.txt', 'r') as f2:
+            assert_equal(f1.read(), f2.read(), 'columnar table written as %s differs' % tf)
+    assert_equal(str(cf.statistics()), str(df.statistics()), 'statistics of columnar table differ')
+    for cols, reverse in [('speed', False), (['size', 'ID'], True), ('ID', False)]:
+        df.sort(cols, reverse)
+        cf.sort(cols, reverse)
+        assert_equal(str(cf), str(df), 'sorting of columnar table failed')
+    sel = df[:,'speed'] > 10.0
+    assert_equal(str(cf[sel,:]), str(df[sel,:]), 'logical indexing of columnar table failed')
+    assert_true(np.array_equal(cf[[1, 3, 5],'size'], df[[1, 3, 5],'size']), 'index arrays on columnar table failed')
+    col = cf[:,'speed']
+    col[0] = 1.0
+    assert_equal(cf[0,'speed'], 1.0, 'columns of columnar table are not views')
+    df[0,'speed'] = 1.0
+    del df[2,:]
+    del cf[2,:]
+    assert_equal(str(cf), str(df), 'deleting rows of columnar table failed')
+    os.remove('tabletest-list.txt')
+    os.remove('tabletest-columnar.txt')
@@ -0,0 +1,40 @@
+from nose.tools import assert_true, assert_equal
+import numpy as np
+import thunderfish.trackingindex as ti
+
+
+def test_time_index():
+    rng = np.random.RandomState(42)
+    idx_v = np.sort(rng.randint(0, 50, 500))
+    idx_offsets = ti.get_idx_offsets(idx_v, 60)
+    assert_equal(len(idx_offsets), 61, 'one offset per time step plus one')
+    for i in [0, 10, 49, 55]:
+        assert_true(np.array_equal(ti.get_time_range(idx_offsets, i, i + 1),
+                                   np.flatnonzero(idx_v == i)), 'time step %d' % i)
+    assert_true(np.array_equal(ti.get_time_range(idx_offsets, -5, 20),
+                               np.flatnonzero(idx_v < 20)), 'range clipped at start')
+    assert_true(np.array_equal(ti.get_time_range(idx_offsets, 40, 100),
+                               np.flatnonzero(idx_v >= 40)), 'range clipped at end')
+
+
+def test_ident_index():
+    rng = np.random.RandomState(42)
+    fund_v = 600.0 + rng.randn(500)
+    ident_v = rng.randint(0, 20, 500).astype(float)
+    ident_v[rng.rand(500) < 0.2] = np.nan
+    ident_v[ident_v == 7] = np.nan
+    ident_v[np.flatnonzero(ident_v == 3)[1:]] = np.nan
+    fund_v[np.flatnonzero(ident_v == 5)[2]] = np.nan
+    idents, order, ident_offsets = ti.get_ident_index(ident_v)
+    assert_true(np.array_equal(idents, np.unique(ident_v[~np.isnan(ident_v)])), 'identities')
+    median_steps = ti.get_ident_median_steps(fund_v, order, ident_offsets)
+    for k, ident in enumerate(idents):
+        indices = order[ident_offsets[k]:ident_offsets[k+1]]
+        assert_true(np.array_equal(indices, np.flatnonzero(ident_v == ident)),
+                    'data points of identity %g sorted in time' % ident)
+        if len(indices) > 1:
+            expected = np.median(np.abs(np.diff(fund_v[indices])))
+        else:
+            expected = np.nan
+        assert_true(np.array_equal(median_steps[k], expected, equal_nan=True),
+                    'median step of identity %g' % ident)
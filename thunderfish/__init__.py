@@ -1,11 +1,14 @@
 from .version import __version__
 
 __all__ = ['dataloader',
+           'datacache',
            'tabledata',
+           'resultsdb',
            'configfile',
            'eventdetection',
            'bestwindow',
            'powerspectrum',
+           'spectiles',
            'harmonics',
            'checkpulse',
            'consistentfishes',
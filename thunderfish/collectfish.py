@@ -4,88 +4,98 @@
 
 import os
 import sys
+import json
 import argparse
+from functools import partial
+from multiprocessing import Pool, freeze_support, cpu_count
 from .version import __version__, __year__
 from .configfile import ConfigFile
 from .tabledata import TableData, add_write_table_config, write_table_args
+from .tabledata import load_bundle
 from .eodanalysis import wave_quality, wave_quality_args, add_eod_quality_config
 from .eodanalysis import pulse_quality, pulse_quality_args
 
 
-def collect_fish(files, insert_file=True, append_file=False, simplify_file=False,
-                 max_fish=0, harmonics=None, peaks0=None, peaks1=None, cfg=None):
+def recording_name(file_name):
     """
-    Combine all *-wavefish.* and/or *-pulsefish.* files into respective summary tables.
+    Name of the recording a file generated by thunderfish belongs to.
 
-    Data from the *-wavespectrum-*.* and the *-pulsepeaks-*.* files can be added
-    as specified by `harmonics`, `peaks0`, and `peaks1`.
+    Parameters
+    ----------
+    file_name: string
+        A *-wavefish.*, *-pulsefish.*, or *-results.npz file.
+
+    Returns
+    -------
+    recording: string or None
+        Path and base name of the recording.
+        None if `file_name` is not a summary file of thunderfish.
+    """
+    base_path, file_ext = os.path.splitext(file_name)
+    if file_ext == '.npz' and base_path.endswith('-results'):
+        base_path = base_path[:-8]
+    elif base_path.endswith('-pulsefish'):
+        base_path = base_path[:-10]
+    elif base_path.endswith('-wavefish'):
+        base_path = base_path[:-9]
+    else:
+        return None
+    if base_path.startswith('./'):
+        base_path = base_path[2:]
+    return base_path
+
+
+def collect_file(file_name, insert_file=True, append_file=False,
+                 max_fish=0, harmonics=None, peaks0=None, peaks1=None, cfg=None):
+    """
+    Summary tables of wave-type and pulse-type fish of a single file.
 
     Parameters
     ----------
-    files: list of strings
-        Files to be combined.
-    insert_file: boolean
-        Insert the basename of the recording file as the first column.
-    append_file: boolean
-        Add the basename of the recording file as the last column.
-        Overwrites `insert_file`.
-    simplify_file: boolean
-        Remove initial common directories from input files.
-    max_fish: int
-        Maximum number of fish to be taken, if 0 take all.
-    harmonics: int
-        Number of harmonic to be added to the wave-type fish table (amplitude, relampl, phase).
-        This data is read in from the corresponding *-wavespectrum-*.* files.
-    peaks0: int
-        Index of the first peak of a EOD pulse to be added to the pulse-type fish table.
-        This data is read in from the corresponding *-pulsepeaks-*.* files.
-    peaks1: int
-        Index of the last peak of a EOD pulse to be added to the pulse-type fish table.
-        This data is read in from the corresponding *-pulsepeaks-*.* files.
-    cfg: ConfigFile
-        Configuration parameter for EOD quality assessment.
+    file_name: string
+        A *-wavefish.*, *-pulsefish.*, or *-results.npz file.
+
+    See `collect_fish()` for a description of the remaining parameters.
 
     Returns
     -------
-    wave_table: TableData
-        Summary table for all wave-type fish.
-    pulse_table: TableData
-        Summary table for all pulse-type fish.
+    wave_table: TableData or None
+        Summary table of the wave-type fish of the recording.
+    pulse_table: TableData or None
+        Summary table of the pulse-type fish of the recording.
     """
     if append_file and insert_file:
         insert_file = False
-    # load data:    
     wave_table = None
     pulse_table = None
-    file_pathes = []
-    for file_name in files:
-        # file name:
-        table = None
-        base_path, file_ext = os.path.splitext(file_name)[0:2]
-        if base_path.endswith('-pulsefish'):
-            base_path = base_path[:-10]
-            fish_type = 'pulse'
-        elif base_path.endswith('-wavefish'):
-            base_path = base_path[:-9]
-            fish_type = 'wave'
-        else:
-            continue
-        if base_path.startswith('./'):
-            base_path = base_path[2:]
-        recording = base_path
-        file_pathes.append(os.path.normpath(recording).split(os.path.sep))
+    recording = recording_name(file_name)
+    if recording is None:
+        return wave_table, pulse_table
+    base_path, file_ext = os.path.splitext(file_name)
+    bundle = None
+    fish_types = file_fish_types(file_name)
+    if file_ext == '.npz':
+        bundle = load_bundle(file_name)
+        fish_types = [ft for ft in fish_types if ft + 'fish' in bundle]
+
+    def load_table(name):
+        if bundle is not None:
+            return bundle[name]
+        return TableData(recording + '-' + name + file_ext)
+
+    for fish_type in fish_types:
         # data:
-        data = TableData(file_name)
+        data = load_table(fish_type + 'fish')
         table = wave_table if fish_type == 'wave' else pulse_table
         # prepare table:
         if not table:
-            df = TableData(data)
+            df = TableData(data, columnar=True)
             df.clear_data()
             if insert_file:
                 df.insert(0, ['recording']*data.nsecs + ['file'], '', '%-s')
             if fish_type == 'wave':
                 if harmonics is not None:
-                    wave_spec = TableData(base_path + '-wavespectrum-0' + file_ext)
+                    wave_spec = load_table('wavespectrum-0')
                     if data.nsecs > 0:
                         df.append_section('harmonics')
                     for h in range(harmonics+1):
@@ -97,7 +107,7 @@ def collect_fish(files, insert_file=True, append_file=False, simplify_file=False
                         df.append('phase%d' % h, 'rad', '%.3f')
             else:
                 if peaks0 is not None:
-                    pulse_peaks = TableData(base_path + '-pulsepeaks-0' + file_ext)
+                    pulse_peaks = load_table('pulsepeaks-0')
                     if data.nsecs > 0:
                         df.append_section('peaks')
                     for p in range(peaks0, peaks1+1):
@@ -129,7 +139,7 @@ def collect_fish(files, insert_file=True, append_file=False, simplify_file=False
             # check quality:
             skips = ''
             if fish_type == 'wave':
-                wave_spec = TableData(base_path + '-wavespectrum-%d'%idx + file_ext)
+                wave_spec = load_table('wavespectrum-%d'%idx)
                 if cfg is not None:
                     spec_data = wave_spec.array()
                     skips, msg = wave_quality(idx, clipped, 0.01*data[r,'noise'],
@@ -150,7 +160,7 @@ def collect_fish(files, insert_file=True, append_file=False, simplify_file=False
                 data_col += 1
             table.append_data(data[r,:].array(), data_col)
             if peaks0 is not None and fish_type == 'pulse':
-                pulse_peaks = TableData(base_path + '-pulsepeaks-%d'%idx + file_ext)
+                pulse_peaks = load_table('pulsepeaks-%d'%idx)
                 for p in range(peaks0, peaks1+1):
                     for pr in range(pulse_peaks.rows()):
                         if pulse_peaks[pr,'P'] == p:
@@ -173,6 +183,113 @@ def collect_fish(files, insert_file=True, append_file=False, simplify_file=False
             if append_file:
                 table.append_data(recording)
             table.fill_data()
+    return wave_table, pulse_table
+
+
+def merge_tables(tables):
+    """
+    Append the rows of summary tables to the first one.
+
+    Columns are matched by their labels. Columns missing in some of
+    the tables, for example in tables written by different versions of
+    thunderfish, are filled up with NaNs.
+
+    Parameters
+    ----------
+    tables: list of TableData or None
+        Tables to be merged. None entries are skipped.
+
+    Returns
+    -------
+    table: TableData or None
+        The first table in `tables` with the rows of all the other
+        tables appended. None if there is no table.
+    """
+    table = None
+    for t in tables:
+        if t is None:
+            continue
+        if table is None:
+            table = t
+            continue
+        columns = {}
+        for c in range(table.columns()):
+            columns.setdefault(table.label(c), c)
+        rows = table.rows()
+        for c in range(t.columns()):
+            label = t.label(c)
+            if label in columns:
+                table.append_data_column(list(t.data[c]), columns[label])
+            else:
+                columns[label] = table.append(label, t.unit(c), t.format(c),
+                                              [float('NaN')]*rows + list(t.data[c]))
+        table.fill_data()
+    return table
+
+
+def collect_fish(files, insert_file=True, append_file=False, simplify_file=False,
+                 max_fish=0, harmonics=None, peaks0=None, peaks1=None, cfg=None,
+                 jobs=None):
+    """
+    Combine all *-wavefish.* and/or *-pulsefish.* files into respective summary tables.
+
+    Data from the *-wavespectrum-*.* and the *-pulsepeaks-*.* files can be added
+    as specified by `harmonics`, `peaks0`, and `peaks1`.
+
+    Instead of the text files, *-results.npz files as written by
+    thunderfish with the 'npz' file format can be passed. They contain
+    all these tables in a single binary file.
+
+    Parameters
+    ----------
+    files: list of strings
+        Files to be combined.
+    insert_file: boolean
+        Insert the basename of the recording file as the first column.
+    append_file: boolean
+        Add the basename of the recording file as the last column.
+        Overwrites `insert_file`.
+    simplify_file: boolean
+        Remove initial common directories from input files.
+    max_fish: int
+        Maximum number of fish to be taken, if 0 take all.
+    harmonics: int
+        Number of harmonic to be added to the wave-type fish table (amplitude, relampl, phase).
+        This data is read in from the corresponding *-wavespectrum-*.* files.
+    peaks0: int
+        Index of the first peak of a EOD pulse to be added to the pulse-type fish table.
+        This data is read in from the corresponding *-pulsepeaks-*.* files.
+    peaks1: int
+        Index of the last peak of a EOD pulse to be added to the pulse-type fish table.
+        This data is read in from the corresponding *-pulsepeaks-*.* files.
+    cfg: ConfigFile
+        Configuration parameter for EOD quality assessment.
+    jobs: None or int
+        If not None, collect the files on a pool of processes
+        with `jobs` processes. If 0, use all CPU cores.
+
+    Returns
+    -------
+    wave_table: TableData
+        Summary table for all wave-type fish.
+    pulse_table: TableData
+        Summary table for all pulse-type fish.
+    """
+    # load data:
+    collect = partial(collect_file, insert_file=insert_file,
+                      append_file=append_file, max_fish=max_fish,
+                      harmonics=harmonics, peaks0=peaks0, peaks1=peaks1, cfg=cfg)
+    if jobs is not None and len(files) > 1:
+        cpus = cpu_count() if jobs == 0 else jobs
+        p = Pool(cpus)
+        tables = p.map(collect, files)
+        del p
+    else:
+        tables = list(map(collect, files))
+    wave_table = merge_tables([t[0] for t in tables])
+    pulse_table = merge_tables([t[1] for t in tables])
+    file_pathes = [os.path.normpath(recording_name(f)).split(os.path.sep)
+                   for f in files if recording_name(f) is not None]
     # simplify pathes:
     if simplify_file and len(file_pathes) > 1:
         fp0 = file_pathes[0]
@@ -192,7 +309,83 @@ def collect_fish(files, insert_file=True, append_file=False, simplify_file=False
                     table[k,idx] = os.path.sep.join(fps[fi:])
     return wave_table, pulse_table
 
-    
+
+def file_fish_types(file_name):
+    """
+    Types of fish whose summary table is fed by a file.
+
+    Parameters
+    ----------
+    file_name: string
+        A *-wavefish.*, *-pulsefish.*, or *-results.npz file.
+
+    Returns
+    -------
+    fish_types: list of strings
+        'wave' and/or 'pulse'.
+    """
+    base_path, file_ext = os.path.splitext(file_name)
+    if file_ext == '.npz':
+        return ['wave', 'pulse']
+    elif base_path.endswith('-pulsefish'):
+        return ['pulse']
+    else:
+        return ['wave']
+
+
+def update_manifest(files, manifest):
+    """
+    Find new, modified, and deleted files and update a manifest.
+
+    New and modified files are added to the manifest, deleted files
+    are removed from it.
+
+    Parameters
+    ----------
+    files: list of strings
+        Files generated by thunderfish.
+    manifest: dict
+        For each already collected file (absolute path) a dictionary
+        with the modification time ('mtime'), the size ('size'), and the
+        name of the recording ('recording') of that file.
+        The manifest is updated in place.
+
+    Returns
+    -------
+    new_files: list of strings
+        Files of `files` that are not in the manifest or that have
+        been modified since they were added to the manifest.
+    modified: dict
+        For each fish type ('wave' and 'pulse') the names of the
+        recordings whose files feeding the summary table of this fish
+        type have been modified or deleted. Their rows need to be
+        removed from existing summary tables.
+    """
+    new_files = []
+    modified = {'wave': [], 'pulse': []}
+    for key in list(manifest):
+        if not os.path.isfile(key):
+            for fish_type in file_fish_types(key):
+                modified[fish_type].append(manifest[key]['recording'])
+            del manifest[key]
+    for file_name in files:
+        recording = recording_name(file_name)
+        if recording is None:
+            continue
+        key = os.path.abspath(file_name)
+        st = os.stat(file_name)
+        state = {'mtime': st.st_mtime, 'size': st.st_size,
+                 'recording': recording}
+        if key in manifest:
+            if manifest[key] == state:
+                continue
+            for fish_type in file_fish_types(file_name):
+                modified[fish_type].append(manifest[key]['recording'])
+        manifest[key] = state
+        new_files.append(file_name)
+    return new_files, modified
+
+
 def rangestr(string):
     """
     Parse string of the form N:M .
@@ -240,8 +433,12 @@ def main():
     parser.add_argument('-f', dest='format', default='auto', type=str,
                         choices=TableData.formats + ['same'],
                         help='file format used for saving summary tables ("same" uses same format as input files)')
+    parser.add_argument('-u', dest='update', action='store_true',
+                        help='only add new or modified files to existing summary tables')
+    parser.add_argument('-j', dest='jobs', nargs='?', type=int, default=None, const=0,
+                        help='number of jobs run in parallel. Without argument use all CPU cores.')
     parser.add_argument('file', nargs='+', default='', type=str,
-                        help='a *-wavefish.* or *-pulsefish.* file as generated by thunderfish')
+                        help='a *-wavefish.*, *-pulsefish.*, or *-results.npz file as generated by thunderfish')
     # fix minus sign issue:
     ca = []
     pa = False
@@ -254,6 +451,8 @@ def main():
         ca.append(a)
     # read in command line arguments:    
     args = parser.parse_args(ca)
+    if args.update and args.simplify_file:
+        parser.error('-c can not be combined with -u')
     table_type = args.table_type
     remove_cols = args.remove_cols
     statistics = args.statistics
@@ -279,35 +478,61 @@ def main():
     # create output folder:
     if not os.path.exists(out_path):
         os.makedirs(out_path)
+    # output files:
+    if len(file_suffix) > 0 and file_suffix[0] != '-':
+        file_suffix = '-' + file_suffix
+    table_format = cfg.value('fileFormat')
+    ext = '.' + TableData.extensions[table_format] if table_format in TableData.extensions else ''
+    wave_file = os.path.join(out_path, 'wavefish%s' % file_suffix) + ext
+    pulse_file = os.path.join(out_path, 'pulsefish%s' % file_suffix) + ext
+    manifest_file = os.path.join(out_path, 'collectfish%s-manifest.json' % file_suffix)
+    # new files:
+    files = args.file
+    manifest = {}
+    modified = {'wave': [], 'pulse': []}
+    if args.update:
+        if os.path.isfile(manifest_file):
+            with open(manifest_file, 'r') as sf:
+                manifest = json.load(sf)
+        files, modified = update_manifest(files, manifest)
+        if len(files) == 0 and len(modified['wave']) + len(modified['pulse']) == 0:
+            print('no new, modified, or deleted files')
+            return
     # collect files:
-    wave_table, pulse_table = collect_fish(args.file, True, args.append_file,
+    wave_table, pulse_table = collect_fish(files, True, args.append_file,
                                            args.simplify_file,
                                            args.max_fish, args.harmonics,
-                                           args.pulse_peaks[0],  args.pulse_peaks[1], cfg)
+                                           args.pulse_peaks[0],  args.pulse_peaks[1],
+                                           cfg, args.jobs)
     # write tables:
-    if len(file_suffix) > 0 and file_suffix[0] != '-':
-        file_suffix = '-' + file_suffix
-    if pulse_table and (not table_type or table_type == 'pulse'):
-        for rc in remove_cols:
-            if rc in pulse_table:
-                pulse_table.remove(rc)
-        pulse_table.write(os.path.join(out_path, 'pulsefish%s' % file_suffix),
-                          **write_table_args(cfg))
-        if statistics:
-            s = pulse_table.statistics()
-            s.write(os.path.join(out_path, 'pulsefish%s-statistics' % file_suffix),
-                    **write_table_args(cfg))
-    if wave_table and (not table_type or table_type == 'wave'):
-        for rc in remove_cols:
-            if rc in wave_table:
-                wave_table.remove(rc)
-        wave_table.write(os.path.join(out_path, 'wavefish%s' % file_suffix),
-                         **write_table_args(cfg))
-        if statistics:
-            s = wave_table.statistics()
-            s.write(os.path.join(out_path, 'wavefish%s-statistics' % file_suffix),
-                    **write_table_args(cfg))
+    for fish_type, table, file_name in [('pulse', pulse_table, pulse_file),
+                                        ('wave', wave_table, wave_file)]:
+        if table_type and table_type != fish_type:
+            continue
+        if table:
+            for rc in remove_cols:
+                if rc in table:
+                    table.remove(rc)
+        if args.update and os.path.isfile(file_name):
+            # add new data to existing summary table:
+            org_table = TableData(file_name, columnar=True)
+            if len(modified[fish_type]) > 0:
+                keep = [k for k in range(org_table.rows())
+                        if org_table[k,'file'] not in modified[fish_type]]
+                org_table = org_table[keep,:]
+            table = merge_tables([org_table, table])
+        if table:
+            table.write(file_name, **write_table_args(cfg))
+            if statistics:
+                s = table.statistics()
+                s.write(os.path.join(out_path, '%sfish%s-statistics' % (fish_type, file_suffix)),
+                        **write_table_args(cfg))
+    # write manifest:
+    if args.update:
+        with open(manifest_file, 'w') as sf:
+            json.dump(manifest, sf, indent=1)
 
 
 if __name__ == '__main__':
+    freeze_support()  # needed by multiprocessing for some weired windows stuff
     main()
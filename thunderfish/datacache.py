@@ -0,0 +1,322 @@
+"""
+# Convert recordings into memory mappable caches.
+
+Decoding wav files, relacs or fishgrid directories, pickles, or matlab
+files over and over again for each analysis is slow. `ingest()`
+converts a recording once into a cache directory next to the recording
+(see `thunderfish.dataloader.cache_path()`):
+
+- `data.npy`: the full recording with frames as first and channels as
+  second dimension. This file can be memory mapped. The data are stored
+  as float32, except for pickle and matlab files with float64 data,
+  which are cached as float64 to keep their precision.
+  The data type is noted in the metadata.
+- `decimated.npy`: optionally a low-pass filtered and decimated copy.
+- `spectrogram.npy`: optionally a coarse spectrogram summed over all
+  channels with frequencies as first and time as second dimension.
+- `metadata.json`: sampling rate, unit, channel layout, source, and
+  the parameters of the decimated data and the spectrogram.
+
+`thunderfish.dataloader.load_data()` and `thunderfish.dataloader.DataLoader`
+automatically read the data from an up-to-date cache.
+
+## Cache
+- `ingest()`: convert a recording into a cache.
+- `load_decimated()`: load the decimated data from a cache.
+- `load_spectrogram()`: load the coarse spectrogram from a cache.
+"""
+
+import os
+import json
+import argparse
+import numpy as np
+from .version import __version__, __year__
+from .dataloader import DataLoader, load_data, cache_path, check_cache, find_cache
+from .dataloader import cache_metadata, recording_mtime
+from .dataloader import check_relacs, check_fishgrid, check_pickle, check_matfile
+from .dataloader import fishgrid_grids, fishgrid_spacings
+from .powerspectrum import nfft, spectrogram
+
+
+def write_metadata(cachepath, metadata):
+    """
+    Write the metadata sidecar of a cache.
+
+    Parameters
+    ----------
+    cachepath: string
+        Path of the cache directory.
+    metadata: dict
+        The metadata to be written to `metadata.json`.
+    """
+    with open(os.path.join(cachepath, 'metadata.json'), 'w') as df:
+        json.dump(metadata, df, indent=2)
+
+
+def ingest(filepath, cachepath=None, decimate=0, spec_resolution=0.0,
+           spec_max_freq=2000.0, blocksize=60.0, verbose=0):
+    """
+    Convert a recording into a memory mappable cache.
+
+    Parameters
+    ----------
+    filepath: string
+        Path to a data file or directory in any format supported by
+        `thunderfish.dataloader.load_data()`.
+    cachepath: string or None
+        Path of the cache directory. If None, the cache is stored next
+        to the recording (see `thunderfish.dataloader.cache_path()`).
+        Only then it is found automatically by the data loaders.
+    decimate: int
+        If larger than one, also store the data low-pass filtered and
+        decimated by this factor.
+    spec_resolution: float
+        If larger than zero, also store a spectrogram summed over all
+        channels with this frequency resolution in Hertz and
+        non-overlapping fft windows.
+    spec_max_freq: float
+        Maximum frequency of the spectrogram in Hertz.
+    blocksize: float
+        Duration in seconds of the data blocks that are converted at once.
+    verbose: int
+        If > 0 show detailed error/warning messages.
+
+    Returns
+    -------
+    cachepath: string
+        Path of the cache directory.
+    """
+    if type(filepath) is list:
+        filepath = filepath[0]
+    if cachepath is None:
+        cachepath = cache_path(filepath)
+    # invalidate existing cache, so that the recording is read:
+    if check_cache(cachepath):
+        os.remove(os.path.join(cachepath, 'metadata.json'))
+    if not os.path.isdir(cachepath):
+        os.makedirs(cachepath)
+    metadata = dict(source=os.path.abspath(filepath),
+                    mtime=recording_mtime(filepath), file='data.npy',
+                    dtype='float32')
+    if check_relacs(filepath):
+        metadata['format'] = 'relacs'
+    elif check_fishgrid(filepath):
+        metadata['format'] = 'fishgrid'
+        metadata['grids'] = fishgrid_grids(filepath)
+        metadata['spacings'] = fishgrid_spacings(filepath)
+    elif check_pickle(filepath):
+        metadata['format'] = 'pickle'
+    elif check_matfile(filepath):
+        metadata['format'] = 'matlab'
+    else:
+        metadata['format'] = 'audio'
+    datafile = os.path.join(cachepath, metadata['file'])
+
+    # convert data:
+    if metadata['format'] in ['pickle', 'matlab']:
+        data, samplerate, unit = load_data(filepath, -1, verbose, dtype=None)
+        if data.dtype != np.float64:
+            data = np.asarray(data, np.float32)
+        metadata['dtype'] = data.dtype.name
+        if data.ndim == 1:
+            data = data.reshape((-1, 1))
+        np.save(datafile, data)
+        del data
+    else:
+        with DataLoader(filepath, -1, blocksize, mmap=True, verbose=verbose,
+                        dtype=np.float32) as data:
+            samplerate = data.samplerate
+            unit = data.unit
+            size = int(blocksize*samplerate)
+            cdata = np.lib.format.open_memmap(datafile, 'w+', np.float32,
+                                              (data.frames, data.channels))
+            for offset, block in data.blocks(size):
+                cdata[offset:offset+len(block),:] = block
+            cdata.flush()
+            del cdata
+    metadata['samplerate'] = float(samplerate)
+    metadata['unit'] = unit
+    write_metadata(cachepath, metadata)
+    if verbose > 0:
+        print('wrote %s' % datafile)
+
+    # decimated data and spectrogram from the cache:
+    with DataLoader(cachepath, -1, mmap=True) as data:
+        metadata['frames'] = data.frames
+        metadata['channels'] = data.channels
+        if decimate > 1:
+            decfile = os.path.join(cachepath, 'decimated.npy')
+            size = decimate*max(1, int(blocksize*samplerate)//decimate)
+            ddata = np.lib.format.open_memmap(decfile, 'w+', np.float32,
+                                              ((data.frames + decimate - 1)//decimate,
+                                               data.channels))
+            k = 0
+            for offset, block in data.blocks(size, decimate=decimate):
+                ddata[k:k+len(block),:] = block
+                k += len(block)
+            ddata.flush()
+            del ddata
+            metadata['decimated'] = dict(file='decimated.npy', factor=decimate,
+                                         samplerate=samplerate/decimate)
+            if verbose > 0:
+                print('wrote %s' % decfile)
+        if spec_resolution > 0.0:
+            specfile = os.path.join(cachepath, 'spectrogram.npy')
+            n_fft = nfft(samplerate, spec_resolution)
+            nfreqs = int(min(spec_max_freq*n_fft/samplerate, n_fft//2)) + 1
+            ntimes = data.frames//n_fft
+            size = n_fft*max(1, int(blocksize*samplerate)//n_fft)
+            sdata = np.lib.format.open_memmap(specfile, 'w+', np.float32,
+                                              (nfreqs, ntimes))
+            k = 0
+            for offset, block in data.blocks(size, stop=ntimes*n_fft):
+                power = 0.0
+                for c in range(block.shape[1]):
+                    spec, freqs, times = spectrogram(block[:,c], samplerate,
+                                                     spec_resolution,
+                                                     overlap_frac=0.0,
+                                                     dtype=np.float32)
+                    power += spec[:nfreqs,:]
+                sdata[:,k:k+power.shape[1]] = power
+                k += power.shape[1]
+            sdata.flush()
+            del sdata
+            metadata['spectrogram'] = dict(file='spectrogram.npy', nfft=n_fft,
+                                           freq_resolution=samplerate/n_fft,
+                                           time_step=n_fft/samplerate,
+                                           time_offset=0.5*n_fft/samplerate)
+            if verbose > 0:
+                print('wrote %s' % specfile)
+    write_metadata(cachepath, metadata)
+    return cachepath
+
+
+def find_valid_cache(filepath):
+    """
+    Path of a cache directory or of the up-to-date cache of a recording.
+
+    Parameters
+    ----------
+    filepath: string
+        Path of a cache directory or of a recording.
+
+    Returns
+    -------
+    cachepath: string
+        Path of the cache directory.
+
+    Raises
+    ------
+    ValueError:
+        There is no up-to-date cache for `filepath`.
+    """
+    cachepath = filepath if check_cache(filepath) else find_cache(filepath)
+    if cachepath is None:
+        raise ValueError('no up-to-date cache for %s' % filepath)
+    return cachepath
+
+
+def load_decimated(filepath):
+    """
+    Load the decimated data from a cache.
+
+    Parameters
+    ----------
+    filepath: string
+        Path of a cache directory or of a recording that has been ingested.
+
+    Returns
+    -------
+    data: 2-D array
+        Memory mapped float32 array with the decimated data,
+        frames as first and channels as second dimension.
+    samplerate: float
+        Sampling rate of the decimated data in Hertz.
+    unit: string
+        The unit of the data.
+
+    Raises
+    ------
+    ValueError:
+        No cache or no decimated data in the cache.
+    """
+    cachepath = find_valid_cache(filepath)
+    metadata = cache_metadata(cachepath)
+    if not 'decimated' in metadata:
+        raise ValueError('no decimated data in %s' % cachepath)
+    dmd = metadata['decimated']
+    data = np.load(os.path.join(cachepath, dmd['file']), mmap_mode='r')
+    return data, dmd['samplerate'], metadata['unit']
+
+
+def load_spectrogram(filepath):
+    """
+    Load the coarse spectrogram from a cache.
+
+    Parameters
+    ----------
+    filepath: string
+        Path of a cache directory or of a recording that has been ingested.
+
+    Returns
+    -------
+    spectrum: 2-D array
+        Memory mapped float32 array with the power spectral densities
+        summed over all channels, frequencies as first and time as
+        second dimension.
+    freqs: 1-D array
+        Frequencies of the spectrogram in Hertz.
+    times: 1-D array
+        Times of the centers of the fft windows in seconds.
+
+    Raises
+    ------
+    ValueError:
+        No cache or no spectrogram in the cache.
+    """
+    cachepath = find_valid_cache(filepath)
+    metadata = cache_metadata(cachepath)
+    if not 'spectrogram' in metadata:
+        raise ValueError('no spectrogram in %s' % cachepath)
+    smd = metadata['spectrogram']
+    spec = np.load(os.path.join(cachepath, smd['file']), mmap_mode='r')
+    freqs = np.arange(spec.shape[0])*smd['freq_resolution']
+    times = smd['time_offset'] + np.arange(spec.shape[1])*smd['time_step']
+    return spec, freqs, times
+
+
+def main():
+    # command line arguments:
+    parser = argparse.ArgumentParser(add_help=True,
+        description='Convert recordings into memory mappable caches that are read by all data loaders.',
+        epilog='version %s by Benda-Lab (2019-%s)' % (__version__, __year__))
+    parser.add_argument('--version', action='version', version=__version__)
+    parser.add_argument('-v', action='count', dest='verbose', default=0,
+                        help='verbosity level')
+    parser.add_argument('-f', dest='force', action='store_true',
+                        help='also convert recordings with an up-to-date cache')
+    parser.add_argument('-d', dest='decimate', type=int, default=0, metavar='N',
+                        help='also store data decimated by a factor of N')
+    parser.add_argument('-s', dest='spec_resolution', type=float, default=0.0, metavar='DF',
+                        help='also store a spectrogram with frequency resolution DF in Hertz')
+    parser.add_argument('-m', dest='spec_max_freq', type=float, default=2000.0, metavar='FREQ',
+                        help='maximum frequency of the spectrogram in Hertz (defaults to 2000)')
+    parser.add_argument('-b', dest='blocksize', type=float, default=60.0, metavar='SECS',
+                        help='duration of data blocks converted at once in seconds (defaults to 60)')
+    parser.add_argument('file', nargs='+', default='', type=str,
+                        help='recording (audio file, relacs or fishgrid directory, pickle or matlab file)')
+    args = parser.parse_args()
+
+    for filepath in args.file:
+        if not args.force and find_cache(filepath) is not None:
+            if args.verbose > 0:
+                print('%s is up to date' % cache_path(filepath))
+            continue
+        if args.verbose > 0:
+            print('ingest %s' % filepath)
+        ingest(filepath, None, args.decimate, args.spec_resolution,
+               args.spec_max_freq, args.blocksize, args.verbose - 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -17,12 +17,25 @@ Create an `DataLoader` object that loads chuncks of 60 seconds long data on dema
 data can be used like a read-only numpy array of floats.
 
 `relacs_metadata()` reads key-value pairs from relacs *.dat file headers.
+
+Recordings converted by `thunderfish.datacache.ingest()` are stored
+in a cache directory next to the recording. `load_data()` and
+`DataLoader` automatically read the data from an up-to-date cache.
+`find_cache()` returns the path to the cache of a recording.
 """
 
 import os
 import glob
+import json
+import threading
+from multiprocessing import cpu_count
+from multiprocessing.pool import ThreadPool
 import numpy as np
 import audioio as aio
+try:
+    import queue
+except ImportError:
+    import Queue as queue
 
 
 def relacs_samplerate_unit(filename, channel=0):
@@ -80,6 +93,50 @@ def relacs_samplerate_unit(filename, channel=0):
     raise ValueError('could not retrieve sampling rate from ' + stimuli_file)
 
 
+def relacs_samplerates_units(filename):
+    """
+    Retrieve sampling rates and units of all traces from a relacs stimuli.dat file.
+
+    Parameters
+    ----------
+    filename: string
+        path to a relacs data directory, a file in a relacs data directory,
+        or a relacs trace-*.raw file.
+
+    Returns
+    -------
+    samplerates: dict
+        the sampling rates in Hertz for each trace number.
+    units: dict
+        the units of the traces for each trace number.
+
+    Raises
+    ------
+    IOError/FileNotFoundError:
+        If the stimuli.dat file does not exist.
+    """
+    relacs_dir = filename
+    if not os.path.isdir(filename):
+        relacs_dir = os.path.dirname(filename)
+    samplerates = {}
+    units = {}
+    stimuli_file = os.path.join(relacs_dir, 'stimuli.dat')
+    with open(stimuli_file, 'r') as sf:
+        for line in sf:
+            if len(line) == 0 or line[0] != '#':
+                break
+            words = line.split(':')
+            if len(words) < 2:
+                continue
+            key = words[0].strip('# ')
+            value = words[1].strip()
+            if key.startswith('unit') and key[4:].isdigit():
+                units[int(key[4:])] = value
+            elif key.startswith('sampling rate') and key[13:].isdigit():
+                samplerates[int(key[13:])] = float(value.replace('Hz',''))
+    return samplerates, units
+
+
 def relacs_metadata(filename):
     """
     Reads header of a relacs *.dat file.
@@ -212,7 +269,8 @@ def relacs_files(filepathes, channel):
     return filepathes
 
         
-def load_relacs(filepathes, channel=-1, verbose=0):
+def load_relacs(filepathes, channel=-1, verbose=0, mmap=False, dtype=float,
+                jobs=None):
     """
     Load traces (trace-*.raw files) that have been recorded with relacs (www.relacs.net).
 
@@ -225,6 +283,17 @@ def load_relacs(filepathes, channel=-1, verbose=0):
         The data channel. If negative all channels are selected.
     verbose: int
         if > 0 show detailed error/warning messages
+    mmap: boolean
+        If True, return the float32 data as they are stored in the file.
+        For a single trace file the data are a memory mapped view
+        on the file, i.e. the data are neither read nor copied.
+        Data of several trace files are copied into a single float32 array.
+    dtype: numpy dtype
+        Data type of the returned data, float64 by default.
+        Use float32 to halve the memory footprint. Ignored if `mmap` is True.
+    jobs: int or None
+        If not None, read the trace files in parallel with this many threads.
+        If 0, use as many threads as there are CPU cores.
 
     Returns
     -------
@@ -233,6 +302,7 @@ def load_relacs(filepathes, channel=-1, verbose=0):
         a 2-D array with data of all channels is returned,
         where first dimension is time and second dimension is channel number.
         Otherwise an 1-D array with the data of that channel is returned.
+        Of type `dtype` unless `mmap` is True.
     samplerate: float
         the sampling rate of the data in Hz
     unit: string
@@ -249,23 +319,17 @@ def load_relacs(filepathes, channel=-1, verbose=0):
     filepathes = relacs_files(filepathes, channel)
     if len(filepathes) > 1:
         channel = -1
-                
-    # load trace*.raw files:
-    nchannels = len(filepathes)
-    data = None
-    nrows = 0
+
+    # retrieve sampling rate and unit from a single pass over stimuli.dat:
+    samplerates, units = relacs_samplerates_units(filepathes[0])
     samplerate = None
     unit = ""
-    for n, path in enumerate(filepathes):
-        x = np.fromfile(path, np.float32)
-        if verbose > 0:
-            print( 'loaded %s' % path)
-        if data is None:
-            nrows = len(x)-2
-            data = np.empty((nrows, nchannels))
-        data[:,n] = x[:nrows]
-        # retrieve sampling rate and unit:
-        rate, us = relacs_samplerate_unit(path)
+    for path in filepathes:
+        trace = int(os.path.basename(path)[6:].replace('.raw', ''))
+        if not trace in samplerates:
+            raise ValueError('could not retrieve sampling rate of %s' % path)
+        rate = samplerates[trace]
+        us = units.get(trace, "")
         if samplerate is None:
             samplerate = rate
         elif rate != samplerate:
@@ -274,6 +338,30 @@ def load_relacs(filepathes, channel=-1, verbose=0):
             unit = us
         elif us != unit:
             raise ValueError('unit of traces differ')
+                
+    # load trace*.raw files:
+    nchannels = len(filepathes)
+    nrows = os.path.getsize(filepathes[0])//4 - 2
+    if mmap and nchannels == 1:
+        data = np.memmap(filepathes[0], np.float32, 'r')[:nrows].reshape((-1, 1))
+        if verbose > 0:
+            print( 'loaded %s' % filepathes[0])
+    else:
+        data = np.empty((nrows, nchannels), np.float32 if mmap else dtype)
+        def load_trace(n):
+            data[:,n] = np.fromfile(filepathes[n], np.float32, nrows)
+            if verbose > 0:
+                print( 'loaded %s' % filepathes[n])
+        if jobs is None or nchannels < 2:
+            for n in range(nchannels):
+                load_trace(n)
+        else:
+            if jobs <= 0:
+                jobs = cpu_count()
+            pool = ThreadPool(min(jobs, nchannels))
+            pool.map(load_trace, range(nchannels))
+            pool.close()
+            pool.join()
     if channel < 0:
         return data, samplerate, unit
     else:
@@ -509,7 +597,7 @@ def fishgrid_files(filepathes, channel, grid_sizes):
     return filepathes
 
         
-def load_fishgrid(filepathes, channel=-1, verbose=0):
+def load_fishgrid(filepathes, channel=-1, verbose=0, mmap=False, dtype=float):
     """
     Load traces (traces-grid*.raw files) that have been recorded with fishgrid (https://github.com/bendalab/fishgrid).
 
@@ -522,6 +610,14 @@ def load_fishgrid(filepathes, channel=-1, verbose=0):
         The data channel. If negative all channels are selected.
     verbose: int
         if > 0 show detailed error/warning messages
+    mmap: boolean
+        If True, return the float32 data as they are stored in the file.
+        For a single grid file the data are a memory mapped view
+        on the file, i.e. the data are neither read nor copied.
+        Data of several grid files are copied into a single float32 array.
+    dtype: numpy dtype
+        Data type of the returned data, float64 by default.
+        Use float32 to halve the memory footprint. Ignored if `mmap` is True.
 
     Returns
     -------
@@ -530,6 +626,7 @@ def load_fishgrid(filepathes, channel=-1, verbose=0):
         a 2-D array with data of all channels is returned,
         where first dimension is time and second dimension is channel number.
         Otherwise an 1-D array with the data of that channel is returned.
+        Of type `dtype` unless `mmap` is True.
     samplerate: float
         the sampling rate of the data in Hz
     unit: string
@@ -558,14 +655,21 @@ def load_fishgrid(filepathes, channel=-1, verbose=0):
     if len(filepathes) > 0:
         samplerate = fishgrid_samplerate(filepathes[0])
     unit = "V"
+    copy = not mmap or len(filepathes) > 1
     for path, channels in zip(filepathes, grid_channels):
-        x = np.fromfile(path, np.float32).reshape((-1, channels))
+        x = np.memmap(path, np.float32, 'r')
+        x = x[:len(x)//channels*channels].reshape((-1, channels))
         if verbose > 0:
             print( 'loaded %s' % path)
         if data is None:
             nrows = len(x)-2
-            data = np.empty((nrows, nchannels))
-        data[:,n:n+channels] = x[:nrows,:]
+            if copy:
+                data = np.empty((nrows, nchannels), np.float32 if mmap else dtype)
+            else:
+                data = x[:nrows,:]
+        if copy:
+            data[:,n:n+channels] = x[:nrows,:]
+        n += channels
     if channel < 0:
         return data, samplerate, unit
     else:
@@ -586,7 +690,7 @@ def check_pickle(filepath):
     True, if fielpath is a pickle file.
     """
     ext = os.path.splitext(filepath)[1]
-    return ext == 'pkl'
+    return ext == '.pkl'
 
 
 def load_pickle(filename, channel=-1, verbose=0):
@@ -621,16 +725,220 @@ def load_pickle(filename, channel=-1, verbose=0):
     time = data['time_trace']
     samplerate = 1000.0 / (time[1] - time[0])
     if channel >= 0:
-        if channel >= data.shape[1]:
+        if channel >= data['raw_data'].shape[1]:
             raise IndexError('invalid channel number %d requested' % channel)
-        data = data[:, channel]
         return data['raw_data'][:, channel], samplerate, 'mV'
     return data['raw_data'], samplerate, 'mV'
 
 
-def load_data(filepath, channel=-1, verbose=0):
+def check_matfile(filepath):
+    """
+    Check if filepath is a matlab file.
+    
+    Returns
+    -------
+    True, if fielpath is a matlab file.
+    """
+    ext = os.path.splitext(filepath)[1]
+    return ext == '.mat'
+
+
+def load_matfile(filename, channel=-1, verbose=0):
+    """
+    Load matlab files trying two possible methods.
+
+    Parameters
+    ----------
+    filepath: string
+        The full path and name of the file to load.
+    channel: int
+        The data channel. If negative all channels are selected.
+    verbose: int
+        if > 0 show detailed error/warning messages
+
+    Returns
+    -------
+    data: 1-D or 2-D array
+        If channel is negative, a 2-D array with data of all channels is returned,
+        where first dimension is time and second dimension is channel number.
+        Otherwise an 1-D array with the data of that channel is returned.
+    samplerate: float
+        The sampling rate of the data in Hz.
+    unit: string
+        The unit of the data.
+    """
+    try:
+        import h5py
+        mat = h5py.File(filename, 'r')
+        data = np.array(mat['elec']['data']).transpose()
+        samplerate = mat['elec']['meta']['Fs'][0][0]
+    except:
+        from scipy.io import loadmat
+        mat = loadmat(filename, variable_names=['elec'])
+        data = np.array(mat['elec']['data'][0][0])
+        samplerate = mat['elec']['meta'][0][0][0][0][1][0][0]
+    if verbose > 0:
+        print( 'loaded %s' % filename)
+    if channel >= 0:
+        if channel >= data.shape[1]:
+            raise IndexError('invalid channel number %d requested' % channel)
+        return data[:, channel], samplerate, 'a.u.'
+    return data, samplerate, 'a.u.'
+
+
+def cache_path(filepath):
+    """
+    Path of the cache directory of a recording.
+
+    Parameters
+    ----------
+    filepath: string
+        Path to a data file or directory.
+
+    Returns
+    -------
+    cachepath: string
+        Path of the cache directory, i.e. `filepath` with '.cache' appended.
+    """
+    return filepath.rstrip(os.sep) + '.cache'
+
+
+def check_cache(filepath):
+    """
+    Check if filepath is a cache directory written by
+    `thunderfish.datacache.ingest()`.
+    
+    Returns
+    -------
+    True, if filepath is a cache directory.
+    """
+    if type(filepath) is list:
+        if len(filepath) != 1:
+            return False
+        filepath = filepath[0]
+    return os.path.isfile(os.path.join(filepath, 'metadata.json'))
+
+
+def cache_metadata(filepath):
+    """
+    Read the metadata sidecar of a cache directory.
+
+    Parameters
+    ----------
+    filepath: string
+        Path of the cache directory.
+
+    Returns
+    -------
+    metadata: dict
+        Sampling rate, unit, channel layout, source, and
+        the available data of the cache.
+    """
+    if type(filepath) is list:
+        filepath = filepath[0]
+    with open(os.path.join(filepath, 'metadata.json'), 'r') as sf:
+        return json.load(sf)
+
+
+def recording_mtime(filepath):
+    """
+    Time of the last modification of a recording.
+
+    Parameters
+    ----------
+    filepath: string
+        Path to a data file or directory.
+
+    Returns
+    -------
+    mtime: float
+        Modification time of the file, or the latest modification
+        time of the directory and the files it contains.
+    """
+    mtime = os.path.getmtime(filepath)
+    if os.path.isdir(filepath):
+        for name in os.listdir(filepath):
+            mtime = max(mtime, os.path.getmtime(os.path.join(filepath, name)))
+    return mtime
+
+
+def find_cache(filepath):
+    """
+    Find an up-to-date cache of a recording.
+
+    Parameters
+    ----------
+    filepath: string or list of strings
+        Path to a data file or directory.
+
+    Returns
+    -------
+    cachepath: string or None
+        Path of the cache directory of the recording. None if there is
+        no cache, or if the recording was modified after it was cached.
+    """
+    if type(filepath) is list:
+        if len(filepath) != 1:
+            return None
+        filepath = filepath[0]
+    cachepath = cache_path(filepath)
+    if not check_cache(cachepath):
+        return None
+    if os.path.exists(filepath) and \
+       recording_mtime(filepath) > cache_metadata(cachepath)['mtime']:
+        return None
+    return cachepath
+
+
+def load_cache(filepath, channel=-1, verbose=0, mmap=False, dtype=float):
+    """
+    Load data from a cache directory written by `thunderfish.datacache.ingest()`.
+
+    Parameters
+    ----------
+    filepath: string
+        Path of the cache directory.
+    channel: int
+        The data channel. If negative all channels are selected.
+    verbose: int
+        if > 0 show detailed error/warning messages
+    mmap: boolean
+        If True, return a memory mapped view on the cached data,
+        that are float32 or, for float64 pickle and matlab files, float64.
+    dtype: numpy dtype
+        Data type of the returned data. Ignored if `mmap` is True.
+
+    Returns
+    -------
+    data: 1-D or 2-D array
+        If channel is negative, a 2-D array with data of all channels is returned,
+        where first dimension is time and second dimension is channel number.
+        Otherwise an 1-D array with the data of that channel is returned.
+    samplerate: float
+        The sampling rate of the data in Hz.
+    unit: string
+        The unit of the data.
+    """
+    if type(filepath) is list:
+        filepath = filepath[0]
+    metadata = cache_metadata(filepath)
+    data = np.load(os.path.join(filepath, metadata['file']), mmap_mode='r')
+    if verbose > 0:
+        print( 'loaded %s' % filepath)
+    if channel >= 0:
+        if channel >= data.shape[1]:
+            raise IndexError('invalid channel number %d requested' % channel)
+        data = data[:, channel]
+    if not mmap:
+        data = np.array(data, dtype)
+    return data, metadata['samplerate'], metadata['unit']
+
+
+def load_data(filepath, channel=-1, verbose=0, dtype=float, jobs=None):
     """
     Call this function to load time-series data from a file of arbitrary format.
+    If an up-to-date cache of the recording exists (see `find_cache()`),
+    the data are read from the cache without decoding the recording.
 
     Parameters
     ----------
@@ -641,6 +949,12 @@ def load_data(filepath, channel=-1, verbose=0):
         The data channel. If negative all channels are selected.
     verbose: int
         if > 0 show detailed error/warning messages
+    dtype: numpy dtype
+        Data type of the returned data, float64 by default.
+        Pass float32 to halve the memory footprint of long recordings.
+    jobs: int or None
+        Number of threads reading the traces of relacs recordings
+        in parallel, see `load_relacs()`.
 
     Returns
     -------
@@ -648,6 +962,7 @@ def load_data(filepath, channel=-1, verbose=0):
         If channel is negative, a 2-D array with data of all channels is returned,
         where first dimension is time and second dimension is channel number.
         Otherwise an 1-D array with the data of that channel is returned.
+        The data are of type `dtype`.
     samplerate: float
         the sampling rate of the data in Hz
     unit: string
@@ -669,15 +984,20 @@ def load_data(filepath, channel=-1, verbose=0):
         raise ValueError('input argument filepath is empty string or list.')
 
     # load data:
-    if check_relacs(filepath):
-        return load_relacs(filepath, channel, verbose)
+    cachepath = filepath if check_cache(filepath) else find_cache(filepath)
+    if cachepath is not None:
+        return load_cache(cachepath, channel, verbose, dtype=dtype)
+    elif check_relacs(filepath):
+        return load_relacs(filepath, channel, verbose, dtype=dtype, jobs=jobs)
     elif check_fishgrid(filepath):
-        return load_fishgrid(filepath, channel, verbose)
+        return load_fishgrid(filepath, channel, verbose, dtype=dtype)
     else:
         if type(filepath) is list:
             filepath = filepath[0]
         if check_pickle(filepath):
-            return load_pickle(filepath, channel, verbose)
+            data, samplerate, unit = load_pickle(filepath, channel, verbose)
+        elif check_matfile(filepath):
+            data, samplerate, unit = load_matfile(filepath, channel, verbose)
         else:
             data, samplerate = aio.load_audio(filepath, verbose)
             if channel >= 0:
@@ -685,7 +1005,7 @@ def load_data(filepath, channel=-1, verbose=0):
                     raise IndexError('invalid channel number %d requested' % channel)
                 data = data[:, channel]
             unit = 'a.u.'
-        return data, samplerate, unit
+        return np.asarray(data, dtype), samplerate, unit
 
 
 class DataLoader(aio.AudioLoader):
@@ -736,6 +1056,51 @@ class DataLoader(aio.AudioLoader):
     data.open(filepath, 0, 60.0)
     ```
 
+    Relacs and fishgrid files can also be opened in memory mapped mode:
+    ```
+    data = dl.DataLoader(filepath, -1, mmap=True)
+    x = data[10000:20000, 0]           # float32 view on the file
+    y = data[10000:20000, 0].astype(float)
+    ```
+    Then no data are buffered. Slices directly map onto the pages of
+    the file and are returned as float32 arrays without copying the data.
+    Convert them to float64 only as needed. Selecting channels that are
+    stored in different files still copies the requested slice.
+
+    For relacs and fishgrid files a list of channels can be passed
+    instead of a single channel. Then only these channels are read
+    and kept in the buffer:
+    ```
+    data = dl.DataLoader(filepath, [18, 19, 20, 26, 27, 28], 60.0)
+    x = data[10000:20000, 2]  # channel 20
+    ```
+
+    Iterate over the data in blocks of 1000 frames that overlap by 100 frames:
+    ```
+    for offset, block in data.blocks(1000, 100):
+        print(offset, block.shape)
+    ```
+    See `blocks()` for selecting channels and decimating the data.
+
+    For sequential scans through a file, the next buffers can be read
+    ahead in a background thread:
+    ```
+    data = dl.DataLoader(filepath, -1, 60.0, prefetch=2)
+    ```
+    After each forward read the following two buffers are loaded while
+    the data of the current buffer are processed.
+
+    If the recording has been converted by `thunderfish.datacache.ingest()`,
+    the data are read from its cache (see `find_cache()`). The cached
+    data are memory mapped and converted to the requested dtype unless
+    `mmap` is True. They are float32, except for float64 pickle and
+    matlab files, whose precision is kept in the cache.
+
+    Keep the buffered data as float32 to halve the memory footprint:
+    ```
+    data = dl.DataLoader(filepath, -1, 60.0, dtype=np.float32)
+    ```
+
     Member variables:
     -----------------
     samplerate (float): the sampling rate of the data in Hertz.
@@ -748,12 +1113,14 @@ class DataLoader(aio.AudioLoader):
     Some member functions:
     ----------------------
     len(): the number of frames
+    blocks(): iterate over the data in blocks.
     open(): open a data file.
     open_*(): open a data file of a specific format.
     close(): close the file.
     """
 
-    def __init__(self, filepath=None, channel=-1, buffersize=10.0, backsize=0.0, verbose=0):
+    def __init__(self, filepath=None, channel=-1, buffersize=10.0, backsize=0.0,
+                 verbose=0, mmap=False, prefetch=0, dtype=float):
         """
         Initialize the DataLoader instance. If filepath is not None open the file.
 
@@ -761,20 +1128,36 @@ class DataLoader(aio.AudioLoader):
         ----------
         filepath: string
             Name of the file.
-        channel: int
-            The single channel to be worked on.
+        channel: int or list of int
+            The single channel to be worked on, or a list of channels
+            (relacs and fishgrid files only).
         buffersize: float
             Size of internal buffer in seconds.
         backsize: float
             Part of the buffer to be loaded before the requested start index in seconds.
         verbose: int
             If > 0 show detailed error/warning messages.
+        mmap: boolean
+            If True, memory map relacs and fishgrid files instead of buffering them.
+        prefetch: int
+            Number of buffers to be read ahead in a background thread.
+        dtype: numpy dtype
+            Data type of the buffer and thus of the returned data.
         """
+        self.traces = None
+        self.cast = None
+        self.prefetch = 0
+        self.dtype = np.dtype(dtype)
         super(DataLoader, self).__init__(None, buffersize, backsize, verbose)
         if filepath is not None:
-            self.open(filepath, channel, buffersize, backsize, verbose)
+            self.open(filepath, channel, buffersize, backsize, verbose, mmap,
+                      prefetch, dtype)
 
     def __getitem__(self, key):
+        if self.traces is not None:
+            if self.cast is not None:
+                return np.asarray(self._getitem_mmap(key), self.cast)
+            return self._getitem_mmap(key)
         if self.channel >= 0:
             if type(key) is tuple:
                 raise IndexError
@@ -782,15 +1165,352 @@ class DataLoader(aio.AudioLoader):
         else:
             return super(DataLoader, self).__getitem__(key)
  
+    def __iter__(self):
+        if self.traces is not None:
+            return iter(self[:])
+        return super(DataLoader, self).__iter__()
+ 
     def __next__(self):
         if self.channel >= 0:
             return super(DataLoader, self).__next__()[self.channel]
         else:
             return super(DataLoader, self).__next__()
 
+    def blocks(self, size, overlap=0, channels=None, step=None, decimate=None,
+               start=0, stop=None):
+        """
+        Iterate over the data in blocks.
+
+        Parameters
+        ----------
+        size: int
+            Number of frames of each block.
+        overlap: int
+            Number of frames successive blocks overlap.
+        channels: None, int, slice, or list of int
+            Channels to be returned. If None, all channels are returned.
+            Must be None if the DataLoader was opened for a single channel.
+        step: int or None
+            Number of frames between the starts of successive blocks.
+            If not None, overrides `overlap`.
+        decimate: int or None
+            If larger than one, low-pass filter the data with a
+            linear-phase FIR filter and return only every `decimate`-th frame.
+            The filter is applied to the continuous data, i.e. the
+            decimated blocks do not have edge effects.
+        start: int
+            Index of the frame where to start.
+        stop: int or None
+            Index of the frame where to stop. If None, iterate to the
+            end of the data.
+
+        Yields
+        ------
+        offset: int
+            Index of the first frame of the block in the data.
+            With decimation, the block starts at the first frame
+            at or after `offset` that is a multiple of `decimate`.
+        block: ndarray
+            The data of the block. If possible, a view on the internal
+            buffer, i.e. it is only valid until the next block is requested.
+            The last block might be shorter than `size`.
+        """
+        if stop is None or stop > self.frames:
+            stop = self.frames
+        if step is None:
+            step = size - overlap
+        if step < 1:
+            raise ValueError('overlap must be smaller than size of blocks')
+        if channels is None:
+            channels = slice(None)
+        elif self.channel >= 0:
+            raise IndexError('channels can not be selected for a single channel')
+        half = 0
+        if decimate is not None and decimate > 1:
+            from scipy.signal import firwin, fftconvolve
+            taps = firwin(20*decimate + 1, 1.0/decimate, window='hamming').astype(self.dtype)
+            half = len(taps)//2
+        for offset in range(start, stop, step):
+            end = min(offset + size, stop)
+            if half == 0:
+                if self.channel >= 0:
+                    yield offset, self[offset:end]
+                else:
+                    yield offset, self[offset:end, channels]
+            else:
+                # filter data padded by half the filter length:
+                i0 = max(offset - half, 0)
+                i1 = min(end + half, self.frames)
+                if self.channel >= 0:
+                    x = self[i0:i1]
+                else:
+                    x = self[i0:i1, channels]
+                if x.ndim > 1:
+                    x = np.pad(x, ((half - (offset - i0), half - (i1 - end)), (0, 0)), 'constant')
+                    y = fftconvolve(x, taps.reshape((-1, 1)), 'valid')
+                else:
+                    x = np.pad(x, (half - (offset - i0), half - (i1 - end)), 'constant')
+                    y = fftconvolve(x, taps, 'valid')
+                yield offset, y[(-offset) % decimate::decimate]
+            if end >= stop:
+                break
+
+    def _init_buffer(self):
+        """
+        Allocate an empty buffer of type `self.dtype`.
+        """
+        self.buffer = np.empty((0, self.channels), self.dtype)
+
+    def _recycle_buffer(self, offset, size):
+        """
+        Recycle buffer contents and return indices for data to be loaded from file.
+
+        Same as `AudioLoader._recycle_buffer()`, but a new buffer is
+        allocated with type `self.dtype` instead of float64.
+
+        Parameters
+        ----------
+        offset: int
+           Frame index for the first frame in the buffer.
+        size: int
+           Number of frames the buffer should hold.
+
+        Returns
+        -------
+        r_offset: int
+           First frame to be read from file.
+        r_size: int
+           Number of frames to be read from file.
+        """
+        def allocate_buffer(size):
+            if size != self.buffer.shape[0] or self.buffer.dtype != self.dtype:
+                self.buffer = np.empty((size, self.channels), self.dtype)
+
+        r_offset = offset
+        r_size = size
+        if offset >= self.offset and offset < self.offset + self.buffer.shape[0]:
+            # move end of old buffer to the front:
+            i = self.offset + self.buffer.shape[0] - offset
+            n = min(i, size)
+            m = self.buffer.shape[0]
+            buffer = self.buffer[m-i:m-i+n,:]
+            allocate_buffer(size)
+            self.buffer[:n,:] = buffer
+            r_offset += n
+            r_size -= n
+        elif offset + size > self.offset and offset + size <= self.offset + self.buffer.shape[0]:
+            # move front of old buffer to the end:
+            n = offset + size - self.offset
+            buffer = self.buffer[:n,:]
+            allocate_buffer(size)
+            self.buffer[size-n:,:] = buffer
+            r_size -= n
+        else:
+            allocate_buffer(size)
+        return r_offset, r_size
+
+    def _init_mmap(self):
+        """
+        Memory map the opened files.
+
+        Each file is mapped as a 2-D float32 array with frames as first
+        and its channels as second dimension. In addition a view on
+        each selected channel is stored in `traces`.
+        """
+        self.mmaps = []
+        self.traces = []
+        for file, gchannels, gcols, bcols in \
+            zip(self.sf, self.grid_channels, self.grid_columns, self.buffer_columns):
+            x = np.memmap(file, np.float32, 'r', shape=(self.frames, gchannels))
+            if gcols is None:
+                self.mmaps.append(x)
+                self.traces.extend([x[:,k] for k in range(gchannels)])
+            else:
+                self.traces.extend([None]*(max(bcols) + 1 - len(self.traces)))
+                for k, b in zip(gcols, bcols):
+                    self.traces[b] = x[:,k]
+
+    def _getitem_mmap(self, key):
+        """
+        Return the requested data directly from the memory mapped files.
+        """
+        if self.channel >= 0:
+            if type(key) is tuple:
+                raise IndexError
+            return self.traces[self.channel][key]
+        if type(key) is not tuple:
+            key = (key, slice(None))
+        index, channels = key
+        if isinstance(channels, (int, np.integer)):
+            return self.traces[channels][index]
+        if len(self.mmaps) == 1 and len(self.traces) == self.mmaps[0].shape[1]:
+            return self.mmaps[0][index, channels]
+        channels = np.arange(self.channels)[channels]
+        return np.stack([self.traces[c][index] for c in channels], axis=-1)
+
+    
+    def _init_prefetch(self, filepath, channel, prefetch):
+        """
+        Start a thread that reads buffers ahead with a second loader.
+
+        Parameters
+        ----------
+        filepath: string or list of string
+            Path of the opened data files.
+        channel: int
+            The requested data channel.
+        prefetch: int
+            Number of buffers to be read ahead.
+        """
+        self.prefetch = prefetch
+        self._prefetch_loader = DataLoader(filepath, channel,
+                                           self.buffersize/self.samplerate,
+                                           dtype=self.dtype)
+        self._prefetch_blocks = []
+        self._prefetch_queue = queue.Queue()
+        self._prefetch_thread = threading.Thread(target=self._prefetch_worker)
+        self._prefetch_thread.daemon = True
+        self._prefetch_thread.start()
+        self._update_buffer_file = self._update_buffer
+        self._update_buffer = self._update_buffer_prefetch
+        self._close_file = self.close
+        self.close = self._close_prefetch
+
+    def _prefetch_worker(self):
+        """
+        Load the requested blocks of data in the background.
+
+        Each block is a list with offset, size, data, and an event
+        that is set as soon as the data are loaded.
+        """
+        loader = self._prefetch_loader
+        while True:
+            block = self._prefetch_queue.get()
+            if block is None:
+                break
+            offset, size = block[:2]
+            try:
+                loader._update_buffer(offset, offset+size)
+                i = offset - loader.offset
+                block[2] = np.array(loader.buffer[i:i+size])
+            finally:
+                block[3].set()
+
+    def _update_buffer_prefetch(self, start, stop):
+        """
+        Make sure that the buffer contains the data between start and
+        stop, preferably from a prefetched block, and request the next blocks.
+        """
+        if start >= self.offset and stop <= self.offset + self.buffer.shape[0]:
+            return
+        forward = start >= self.offset
+        for block in self._prefetch_blocks:
+            if start >= block[0] and stop <= block[0] + block[1]:
+                block[3].wait()
+                if block[2] is not None:
+                    self.buffer = block[2]
+                    self.offset = block[0]
+                    if self.verbose > 1:
+                        print('  use %6d prefetched frames at %d' % (block[1], block[0]))
+                    break
+        else:
+            self._update_buffer_file(start, stop)
+        end = self.offset + self.buffer.shape[0]
+        self._prefetch_blocks = [b for b in self._prefetch_blocks
+                                 if b[0] + b[1] > end]
+        if not forward:
+            return
+        # request next blocks:
+        offset = end - self.backsize
+        if len(self._prefetch_blocks) > 0:
+            offset = self._prefetch_blocks[-1][0] + self._prefetch_blocks[-1][1] - self.backsize
+        while len(self._prefetch_blocks) < self.prefetch and offset < self.frames:
+            size = min(self.buffersize, self.frames - offset)
+            block = [offset, size, None, threading.Event()]
+            self._prefetch_blocks.append(block)
+            self._prefetch_queue.put(block)
+            offset += max(size - self.backsize, 1)
+
+    def _close_prefetch(self):
+        """
+        Stop the prefetch thread and close the data files.
+        """
+        if self._prefetch_thread is not None:
+            self._prefetch_queue.put(None)
+            self._prefetch_thread.join()
+            self._prefetch_thread = None
+            self._prefetch_loader.close()
+            self._prefetch_blocks = []
+        self._close_file()
+
+    
+    # cache interface:
+    def open_cache(self, filepath, channel=-1, verbose=0, mmap=False):
+        """
+        Open a cache directory written by `thunderfish.datacache.ingest()`.
+
+        The cached data are memory mapped, i.e. they are neither
+        decoded nor buffered.
+
+        Parameters
+        ----------
+        filepath: string
+            Path of the cache directory.
+        channel: int or list of int
+            The requested data channel. If negative all channels are selected.
+            If a list of channels is given, only these channels are returned
+            in the given order.
+        verbose: int
+            If > 0 show detailed error/warning messages.
+        mmap: boolean
+            If True, return views on the cached data in the data type
+            of the cache (float32, or float64 for float64 pickle and
+            matlab files). Otherwise return data of type `self.dtype`.
+        """
+        self.verbose = verbose
+        if type(filepath) is list:
+            filepath = filepath[0]
+        metadata = cache_metadata(filepath)
+        x = np.load(os.path.join(filepath, metadata['file']), mmap_mode='r')
+        if verbose > 0:
+            print( 'opened %s' % filepath)
+        self.samplerate = metadata['samplerate']
+        self.unit = metadata['unit']
+        self.frames = x.shape[0]
+        if isinstance(channel, (list, tuple, np.ndarray)):
+            channels = [int(c) for c in channel]
+            if min(channels) < 0 or max(channels) >= x.shape[1]:
+                raise IndexError('invalid channel in %s' % str(channels))
+            self.mmaps = []
+            self.traces = [x[:,c] for c in channels]
+            channel = -1
+        else:
+            if channel >= x.shape[1]:
+                raise IndexError('invalid channel number %d' % channel)
+            self.mmaps = [x]
+            self.traces = [x[:,k] for k in range(x.shape[1])]
+        self.channels = len(self.traces)
+        self.channel = channel
+        if self.channel >= 0:
+            self.shape = (self.frames,)
+        else:
+            self.shape = (self.frames, self.channels)
+        self.cast = None if mmap else self.dtype
+        self.close = self._close_cache
+        return self
+
+    def _close_cache(self):
+        """
+        Release the memory mapped cache.
+        """
+        self.traces = None
+        self.mmaps = None
+        self.cast = None
+
     
     # relacs interface:        
-    def open_relacs(self, filepathes, channel=-1, buffersize=10.0, backsize=0.0, verbose=0):
+    def open_relacs(self, filepathes, channel=-1, buffersize=10.0, backsize=0.0,
+                    verbose=0, mmap=False):
         """
         Open relacs data files (www.relacs.net) for reading.
 
@@ -799,14 +1519,18 @@ class DataLoader(aio.AudioLoader):
         filepathes: string or list of string
             Path to a relacs data directory, a relacs stimuli.dat file, a relacs info.dat file,
             or relacs trace-*.raw files.
-        channel: int
+        channel: int or list of int
             The requested data channel. If negative all channels are selected.
+            If a list of channels is given, only these channels are read
+            and returned in the given order.
         buffersize: float
             Size of internal buffer in seconds.
         backsize: float
             Part of the buffer to be loaded before the requested start index in seconds.
         verbose: int
             If > 0 show detailed error/warning messages.
+        mmap: boolean
+            If True, memory map the trace files instead of buffering them.
         """
 
         self.verbose = verbose
@@ -814,11 +1538,20 @@ class DataLoader(aio.AudioLoader):
         if self.sf is not None:
             self._close_relacs()
 
-        filepathes = relacs_files(filepathes, channel)
-        if len(filepathes) > 1:
+        if isinstance(channel, (list, tuple, np.ndarray)):
+            paths = filepathes
+            filepathes = []
+            for c in channel:
+                if c < 0:
+                    raise IndexError('invalid channel %d' % c)
+                filepathes.extend(relacs_files(list(paths) if type(paths) is list else paths, c))
             channel = -1
         else:
-            channel = 0
+            filepathes = relacs_files(filepathes, channel)
+            if len(filepathes) > 1:
+                channel = -1
+            else:
+                channel = 0
 
         # open trace files:
         self.sf = []
@@ -853,16 +1586,22 @@ class DataLoader(aio.AudioLoader):
             elif us != self.unit:
                 raise ValueError('unit of traces differ')
         self.channels = len(self.sf)
+        self.grid_channels = [1]*self.channels
+        self.grid_columns = [None]*self.channels
+        self.buffer_columns = [None]*self.channels
         self.channel = channel
         if self.channel >= 0:
             self.shape = (self.frames,)
         else:
             self.shape = (self.frames, self.channels)
+        self.close = self._close_relacs
+        if mmap:
+            self._init_mmap()
+            return self
         self.buffersize = int(buffersize*self.samplerate)
         self.backsize = int(backsize*self.samplerate)
         self._init_buffer()
         self.offset = 0
-        self.close = self._close_relacs
         self._update_buffer = self._update_buffer_relacs
         return self
 
@@ -871,6 +1610,8 @@ class DataLoader(aio.AudioLoader):
         Close the relacs data files.
         """
         
+        self.traces = None
+        self.mmaps = None
         if self.sf is not None:
             for file in self.sf:
                 file.close()
@@ -887,8 +1628,7 @@ class DataLoader(aio.AudioLoader):
             # read buffer:
             for i, file in enumerate(self.sf):
                 file.seek(r_offset*4)
-                buffer = file.read(r_size*4)
-                self.buffer[r_offset-offset:r_offset+r_size-offset, i] = np.fromstring(buffer, dtype=np.float32)
+                self.buffer[r_offset-offset:r_offset+r_size-offset, i] = np.fromfile(file, np.float32, r_size)
             self.offset = offset
             if self.verbose > 1:
                 print('  read %6d frames at %d' % (r_size, r_offset))
@@ -898,7 +1638,8 @@ class DataLoader(aio.AudioLoader):
         
     
     # fishgrid interface:        
-    def open_fishgrid(self, filepathes, channel=-1, buffersize=10.0, backsize=0.0, verbose=0):
+    def open_fishgrid(self, filepathes, channel=-1, buffersize=10.0, backsize=0.0,
+                      verbose=0, mmap=False):
         """
         Open fishgrid data files (https://github.com/bendalab/fishgrid) for reading.
 
@@ -907,14 +1648,18 @@ class DataLoader(aio.AudioLoader):
         filepathes: string or list of string
             Path to a fishgrid data directory, a fishgrid.cfg file,
             or fishgrid trace-*.raw files.
-        channel: int
+        channel: int or list of int
             The requested data channel. If negative all channels are selected.
+            If a list of channels is given, only these channels are read
+            and returned in the given order.
         buffersize: float
             Size of internal buffer in seconds.
         backsize: float
             Part of the buffer to be loaded before the requested start index in seconds.
         verbose: int
             If > 0 show detailed error/warning messages.
+        mmap: boolean
+            If True, memory map the grid files instead of buffering them.
         """
 
         self.verbose = verbose
@@ -926,18 +1671,49 @@ class DataLoader(aio.AudioLoader):
             filepathes = [filepathes]
         grids = fishgrid_grids(filepathes[0])
         grid_sizes = [r*c for r,c in grids]
+        channels = None
+        if isinstance(channel, (list, tuple, np.ndarray)):
+            channels = [int(c) for c in channel]
+            channel = -1
         filepathes = fishgrid_files(filepathes, channel, grid_sizes)
         if len(filepathes) > 1:
             channel = -1
 
+        # select channels of each grid file:
+        grid_columns = []
+        buffer_columns = []
+        offs = 0
+        for path in filepathes:
+            g = int(os.path.basename(path)[11:].replace('.raw', '')) - 1
+            if channels is None:
+                grid_columns.append(None)
+                buffer_columns.append(None)
+            else:
+                bcols = [i for i, c in enumerate(channels)
+                         if c >= offs and c < offs + grid_sizes[g]]
+                grid_columns.append([channels[i] - offs for i in bcols])
+                buffer_columns.append(bcols)
+            offs += grid_sizes[g]
+        if channels is not None:
+            if min(channels) < 0 or max(channels) >= offs:
+                raise IndexError('invalid channel in %s' % str(channels))
+            selected = [len(c) > 0 for c in grid_columns]
+            filepathes = [p for p, s in zip(filepathes, selected) if s]
+            grid_columns = [c for c, s in zip(grid_columns, selected) if s]
+            buffer_columns = [c for c, s in zip(buffer_columns, selected) if s]
+
         # open grid files:
         self.channels = 0
         for path in filepathes:
             g = int(os.path.basename(path)[11:].replace('.raw', '')) - 1
             self.channels += grid_sizes[g]
+        if channels is not None:
+            self.channels = len(channels)
         self.sf = []
         self.grid_channels = []
         self.grid_offs = []
+        self.grid_columns = grid_columns
+        self.buffer_columns = buffer_columns
         offs = 0
         self.frames = None
         self.samplerate = None
@@ -976,11 +1752,14 @@ class DataLoader(aio.AudioLoader):
             self.shape = (self.frames,)
         else:
             self.shape = (self.frames, self.channels)
+        self.close = self._close_fishgrid
+        if mmap:
+            self._init_mmap()
+            return self
         self.buffersize = int(buffersize*self.samplerate)
         self.backsize = int(backsize*self.samplerate)
         self._init_buffer()
         self.offset = 0
-        self.close = self._close_fishgrid
         self._update_buffer = self._update_buffer_fishgrid
         return self
 
@@ -989,6 +1768,8 @@ class DataLoader(aio.AudioLoader):
         Close the fishgrid data files.
         """
         
+        self.traces = None
+        self.mmaps = None
         if self.sf is not None:
             for file in self.sf:
                 file.close()
@@ -1003,10 +1784,20 @@ class DataLoader(aio.AudioLoader):
             offset, size = self._read_indices(start, stop)
             r_offset, r_size = self._recycle_buffer(offset, size)
             # read buffer:
-            for file, gchannels, goffset in zip(self.sf, self.grid_channels, self.grid_offs):
+            for file, gchannels, goffset, gcols, bcols in \
+                zip(self.sf, self.grid_channels, self.grid_offs,
+                    self.grid_columns, self.buffer_columns):
                 file.seek(r_offset*4*gchannels)
-                buffer = file.read(r_size*4*gchannels)
-                self.buffer[r_offset-offset:r_offset+r_size-offset, goffset:goffset+gchannels] = np.fromstring(buffer, dtype=np.float32).reshape((-1, gchannels))
+                if gcols is None:
+                    self.buffer[r_offset-offset:r_offset+r_size-offset, goffset:goffset+gchannels] = np.fromfile(file, np.float32, r_size*gchannels).reshape((-1, gchannels))
+                else:
+                    # read chunks of interleaved frames and gather selected channels:
+                    chunk = max(1, 0x100000//gchannels)
+                    for k in range(0, r_size, chunk):
+                        n = min(chunk, r_size - k)
+                        x = np.fromfile(file, np.float32, n*gchannels).reshape((-1, gchannels))
+                        i = r_offset - offset + k
+                        self.buffer[i:i+n, bcols] = x[:, gcols]
             self.offset = offset
             if self.verbose > 1:
                 print('  read %6d frames at %d' % (r_size, r_offset))
@@ -1015,7 +1806,8 @@ class DataLoader(aio.AudioLoader):
                       % (self.buffer.shape[0], self.offset, self.offset+self.buffer.shape[0]))
         
 
-    def open(self, filepath, channel=0, buffersize=10.0, backsize=0.0, verbose=0):
+    def open(self, filepath, channel=0, buffersize=10.0, backsize=0.0,
+             verbose=0, mmap=False, prefetch=0, dtype=float):
         """
         Open file with time-series data for reading.
 
@@ -1023,22 +1815,45 @@ class DataLoader(aio.AudioLoader):
         ----------
         filepathes: string or list of string
             Path to a data files or directory.
-        channel: int
+        channel: int or list of int
             The requested data channel. If negative all channels are selected.
+            A list of channels selects only these channels
+            (relacs and fishgrid files and caches only).
         buffersize: float
             Size of internal buffer in seconds.
         backsize: float
             Part of the buffer to be loaded before the requested start index in seconds.
         verbose: int
             If > 0 show detailed error/warning messages.
+        mmap: boolean
+            If True, memory map relacs and fishgrid files instead of buffering them,
+            and return views on cached data.
+            Ignored for all other file formats.
+        prefetch: int
+            Number of buffers to be read ahead in a background thread
+            after each forward read. Ignored for memory mapped files.
+        dtype: numpy dtype
+            Data type of the buffer and thus of the returned data.
+            Memory mapped data keep the data type of the file or cache.
         """
-        if check_relacs(filepath):
-            self.open_relacs(filepath, channel, buffersize, backsize, verbose)
+        if self.prefetch > 0:
+            self._close_prefetch()
+            self.prefetch = 0
+        self.dtype = np.dtype(dtype)
+        self.cast = None
+        cachepath = filepath if check_cache(filepath) else find_cache(filepath)
+        if cachepath is not None:
+            self.open_cache(cachepath, channel, verbose, mmap)
+        elif check_relacs(filepath):
+            self.open_relacs(filepath, channel, buffersize, backsize, verbose, mmap)
         elif check_fishgrid(filepath):
-            self.open_fishgrid(filepath, channel, buffersize, backsize, verbose)
+            self.open_fishgrid(filepath, channel, buffersize, backsize, verbose, mmap)
         else:
+            if isinstance(channel, (list, tuple, np.ndarray)):
+                raise ValueError('lists of channels are supported for relacs and fishgrid files only')
             if type(filepath) is list:
                 filepath = filepath[0]
+            self.traces = None
             super(DataLoader, self).open(filepath, buffersize, backsize, verbose)
             if channel > self.channels:
                 raise IndexError('invalid channel number %d' % channel)
@@ -1048,6 +1863,8 @@ class DataLoader(aio.AudioLoader):
             else:
                 self.shape = (self.frames, self.channels)
             self.unit = 'a.u.'
+        if prefetch > 0 and self.traces is None:
+            self._init_prefetch(filepath, channel, prefetch)
         return self
 
 
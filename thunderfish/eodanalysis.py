@@ -1181,25 +1181,31 @@ def save_eod_waveform(mean_eod, unit, idx, basename, **kwargs):
         Unit of the waveform data.
     idx: int or None
         Index of fish.
-    basename: string
+    basename: string or dict
         Path and basename of file.
         '-eodwaveform', the fish index, and a file extension are appended.
+        If a dict, the table is not written but added to the dict
+        with the name of the table as key (see `tabledata.write_bundle()`).
     kwargs:
         Arguments passed on to TableData.write()
 
     Returns
     -------
-    filename: string
-        The path and full name of the written file.
+    filename: string or None
+        The path and full name of the written file,
+        None if the table was added to a dict.
     """
     td = TableData(mean_eod[:,:3]*[1000.0, 1.0, 1.0], ['time', 'mean', 'sem'],
                    ['ms', unit, unit], ['%.3f', '%.5f', '%.5f'])
     if mean_eod.shape[1] > 3:
         td.append('fit', unit, '%.5f', mean_eod[:,3])
-    fp = basename + '-eodwaveform'
+    name = 'eodwaveform'
     if idx is not None:
-        fp += '-%d' % idx
-    file_name = td.write(fp, **kwargs)
+        name += '-%d' % idx
+    if isinstance(basename, dict):
+        basename[name] = td
+        return None
+    file_name = td.write(basename + '-' + name, **kwargs)
     return file_name
 
 
@@ -1214,16 +1220,19 @@ def save_wave_eodfs(wave_eodfs, wave_indices, basename, **kwargs):
     wave_indices: array
         Indices identifying each fish or NaN.
         If None no index column is inserted.
-    basename: string
+    basename: string or dict
         Path and basename of file.
         '-waveeodfs' and a file extension are appended.
+        If a dict, the table is not written but added to the dict
+        with the name of the table as key (see `tabledata.write_bundle()`).
     kwargs:
         Arguments passed on to TableData.write()
 
     Returns
     -------
-    filename: string
-        The path and full name of the written file.
+    filename: string or None
+        The path and full name of the written file,
+        None if the table was added to a dict.
     """
     eodfs = fundamental_freqs_and_power(wave_eodfs)
     td = TableData()
@@ -1231,8 +1240,10 @@ def save_wave_eodfs(wave_eodfs, wave_indices, basename, **kwargs):
         td.append('index', '', '%d', wave_indices)
     td.append('EODf', 'Hz', '%7.2f', eodfs[:,0])
     td.append('power', 'dB', '%7.2f', eodfs[:,1])
-    fp = basename + '-waveeodfs'
-    file_name = td.write(fp, **kwargs)
+    if isinstance(basename, dict):
+        basename['waveeodfs'] = td
+        return None
+    file_name = td.write(basename + '-waveeodfs', **kwargs)
     return file_name
 
     
@@ -1245,16 +1256,19 @@ def save_wave_fish(wave_props, unit, basename, **kwargs):
         Properties of several wave-type EODs as returned by analyze_wave().
     unit: string
         Unit of the waveform data.
-    basename: string
+    basename: string or dict
         Path and basename of file.
         '-wavefish' and a file extension are appended.
+        If a dict, the table is not written but added to the dict
+        with the name of the table as key (see `tabledata.write_bundle()`).
     kwargs:
         Arguments passed on to TableData.write()
 
     Returns
     -------
-    filename: string
-        The path and full name of the written file.
+    filename: string or None
+        The path and full name of the written file,
+        None if the table was added to a dict.
     """
     td = TableData()
     td.append_section('waveform')
@@ -1278,8 +1292,10 @@ def save_wave_fish(wave_props, unit, basename, **kwargs):
     td.append('righttrough', '%', '%.2f', wave_props, 'righttrough', 100.0)
     td.append('p-p-distance', '%', '%.2f', wave_props, 'p-p-distance', 100.0)
     td.append('reltroughampl', '%', '%.2f', wave_props, 'reltroughampl', 100.0)
-    fp = basename + '-wavefish'
-    file_name = td.write(fp, **kwargs)
+    if isinstance(basename, dict):
+        basename['wavefish'] = td
+        return None
+    file_name = td.write(basename + '-wavefish', **kwargs)
     return file_name
 
 
@@ -1292,16 +1308,19 @@ def save_pulse_fish(pulse_props, unit, basename, **kwargs):
         Properties of several pulse-type EODs as returned by analyze_pulse().
     unit: string
         Unit of the waveform data.
-    basename: string
+    basename: string or dict
         Path and basename of file.
         '-pulsefish' and a file extension are appended.
+        If a dict, the table is not written but added to the dict
+        with the name of the table as key (see `tabledata.write_bundle()`).
     kwargs:
         Arguments passed on to TableData.write()
 
     Returns
     -------
-    filename: string
-        The path and full name of the written file.
+    filename: string or None
+        The path and full name of the written file,
+        None if the table was added to a dict.
     """
     td = TableData()
     td.append_section('waveform')
@@ -1329,8 +1348,10 @@ def save_pulse_fish(pulse_props, unit, basename, **kwargs):
     td.append('poweratt5', 'dB', '%.2f', pulse_props, 'lowfreqattenuation5')
     td.append('poweratt50', 'dB', '%.2f', pulse_props, 'lowfreqattenuation50')
     td.append('lowcutoff', 'Hz', '%.2f', pulse_props, 'powerlowcutoff')
-    fp = basename + '-pulsefish'
-    file_name = td.write(fp, **kwargs)
+    if isinstance(basename, dict):
+        basename['pulsefish'] = td
+        return None
+    file_name = td.write(basename + '-pulsefish', **kwargs)
     return file_name
 
 
@@ -1346,16 +1367,19 @@ def save_wave_spectrum(spec_data, unit, idx, basename, **kwargs):
         Unit of the waveform data.
     idx: int or None
         Index of fish.
-    basename: string
+    basename: string or dict
         Path and basename of file.
         '-wavespectrum', the fish index, and a file extension are appended.
+        If a dict, the table is not written but added to the dict
+        with the name of the table as key (see `tabledata.write_bundle()`).
     kwargs:
         Arguments passed on to TableData.write()
 
     Returns
     -------
-    filename: string
-        The path and full name of the written file.
+    filename: string or None
+        The path and full name of the written file,
+        None if the table was added to a dict.
     """
     td = TableData(spec_data[:,:6]*[1.0, 1.0, 1.0, 100.0, 1.0, 1.0],
                    ['harmonics', 'frequency', 'amplitude', 'relampl', 'relpower', 'phase'],
@@ -1363,10 +1387,13 @@ def save_wave_spectrum(spec_data, unit, idx, basename, **kwargs):
                    ['%.0f', '%.2f', '%.5f', '%10.2f', '%6.2f', '%8.4f'])
     if spec_data.shape[1] > 6:
         td.append('power', '%s^2/Hz' % unit, '%11.4e', spec_data[:,6])
-    fp = basename + '-wavespectrum'
+    name = 'wavespectrum'
     if idx is not None:
-        fp += '-%d' % idx
-    file_name = td.write(fp, **kwargs)
+        name += '-%d' % idx
+    if isinstance(basename, dict):
+        basename[name] = td
+        return None
+    file_name = td.write(basename + '-' + name, **kwargs)
     return file_name
 
                         
@@ -1381,23 +1408,29 @@ def save_pulse_spectrum(spec_data, unit, idx, basename, **kwargs):
         Unit of the waveform data.
     idx: int or None
         Index of fish.
-    basename: string
+    basename: string or dict
         Path and basename of file.
         '-pulsespectrum', the fish index, and a file extension are appended.
+        If a dict, the table is not written but added to the dict
+        with the name of the table as key (see `tabledata.write_bundle()`).
     kwargs:
         Arguments passed on to TableData.write()
 
     Returns
     -------
-    filename: string
-        The path and full name of the written file.
+    filename: string or None
+        The path and full name of the written file,
+        None if the table was added to a dict.
     """
     td = TableData(spec_data[:,:2], ['frequency', 'power'],
                    ['Hz', '%s^2/Hz' % unit], ['%.2f', '%.4e'])
-    fp = basename + '-pulsespectrum'
+    name = 'pulsespectrum'
     if idx is not None:
-        fp += '-%d' % idx
-    file_name = td.write(fp, **kwargs)
+        name += '-%d' % idx
+    if isinstance(basename, dict):
+        basename[name] = td
+        return None
+    file_name = td.write(basename + '-' + name, **kwargs)
     return file_name
 
                         
@@ -1413,26 +1446,32 @@ def save_pulse_peaks(peak_data, unit, idx, basename, **kwargs):
         Unit of the waveform data.
     idx: int or None
         Index of fish.
-    basename: string
+    basename: string or dict
         Path and basename of file.
         '-pulsepeaks', the fish index, and a file extension are appended.
+        If a dict, the table is not written but added to the dict
+        with the name of the table as key (see `tabledata.write_bundle()`).
     kwargs:
         Arguments passed on to TableData.write()
 
     Returns
     -------
-    filename: string
-        The path and full name of the written file.
+    filename: string or None
+        The path and full name of the written file,
+        None if the table was added to a dict.
     """
     if len(peak_data) > 0:
         td = TableData(peak_data[:,:5]*[1.0, 1000.0, 1.0, 100.0, 1000.0],
                        ['P', 'time', 'amplitude', 'relampl', 'width'],
                        ['', 'ms', unit, '%', 'ms'],
                        ['%.0f', '%.3f', '%.5f', '%.2f', '%.3f'])
-        fp = basename + '-pulsepeaks'
+        name = 'pulsepeaks'
         if idx is not None:
-            fp += '-%d' % idx
-        file_name = td.write(fp, **kwargs)
+            name += '-%d' % idx
+        if isinstance(basename, dict):
+            basename[name] = td
+            return None
+        file_name = td.write(basename + '-' + name, **kwargs)
         return file_name
     else:
         return None
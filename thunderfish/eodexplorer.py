@@ -14,6 +14,8 @@ from multiprocessing import Pool, freeze_support, cpu_count
 from .version import __version__, __year__
 from .configfile import ConfigFile
 from .tabledata import TableData, add_write_table_config, write_table_args
+from .tabledata import load_bundle
+from .resultsdb import load_fish, load_table
 from .dataloader import load_data
 from .multivariateexplorer import MultivariateExplorer
 from .eodanalysis import wave_quality, wave_quality_args, add_eod_quality_config
@@ -553,13 +555,29 @@ wave_fish = True
 load_spec = False
 data = None
 data_path = None
+results_db = None
 
 def load_waveform(idx):
     eodf = data[idx,'EODf']
     file_name = data[idx,'file']
     file_index = data[idx,'index'] if 'index' in data else 0
-    eod_filename = os.path.join(data_path, '%s-eodwaveform-%d.csv' % (file_name, file_index))
-    eod_table = TableData(eod_filename)
+    fish_type = 'wave' if wave_fish else 'pulse'
+    bundle_filename = os.path.join(data_path, '%s-results.npz' % file_name)
+    if results_db:
+        eod_table = load_table(results_db, 'eodwaveform', file_name, file_index)
+        if load_spec:
+            spec_table = load_table(results_db, '%sspectrum' % fish_type,
+                                    file_name, file_index)
+    elif os.path.isfile(bundle_filename):
+        bundle = load_bundle(bundle_filename)
+        eod_table = bundle['eodwaveform-%d' % file_index]
+        if load_spec:
+            spec_table = bundle['%sspectrum-%d' % (fish_type, file_index)]
+    else:
+        eod_filename = os.path.join(data_path, '%s-eodwaveform-%d.csv' % (file_name, file_index))
+        eod_table = TableData(eod_filename)
+        if load_spec:
+            spec_table = TableData(os.path.join(data_path, '%s-%sspectrum-%d.csv' % (file_name, fish_type, file_index)))
     eod = eod_table[:,'mean']
     norm = np.max(eod)
     if wave_fish:
@@ -568,8 +586,6 @@ def load_waveform(idx):
         eod = np.column_stack((eod_table[:,'time'], eod/norm))
     if not load_spec:
         return eod
-    fish_type = 'wave' if wave_fish else 'pulse'
-    spec_table = TableData(os.path.join(data_path, '%s-%sspectrum-%d.csv' % (file_name, fish_type, file_index)))
     spec_data = spec_table.array()
     if not wave_fish:
         spec_data = spec_data[spec_data[:,0]<2000.0,:]
@@ -582,6 +598,7 @@ def main():
     global wave_fish
     global load_spec
     global data_path
+    global results_db
 
     # command line arguments:
     parser = argparse.ArgumentParser(add_help=False,
@@ -617,8 +634,13 @@ def main():
     parser.add_argument('-f', dest='format', default='auto', type=str,
                         choices=TableData.formats + ['same'],
                         help='file format used for saving PCA data ("same" uses same format as input file)')
+    parser.add_argument('-t', dest='fish_type', default='wave', type=str,
+                        choices=['wave', 'pulse'],
+                        help='wave-type or pulse-type fish to be loaded from a database file')
+    parser.add_argument('-q', dest='query', default=None, type=str, metavar='WHERE',
+                        help='SQL condition for selecting fish from a database file, e.g. \'"EODf" > 500 and noise < 5\'')
     parser.add_argument('file', default='', type=str,
-                        help='a wavefish.* or pulsefish.* summary file as generated by collectfish')
+                        help='a wavefish.* or pulsefish.* summary file as generated by collectfish, or a database file (*.db, *.sqlite) as generated by thunderfish')
     args = parser.parse_args()
         
     # read in command line arguments:    
@@ -659,8 +681,17 @@ def main():
         parser.error('"%s" is not a valid color map' % color_map)
         
     # load summary data:
-    wave_fish = 'wave' in file_name
-    data = TableData(file_name)
+    if os.path.splitext(file_name)[1] in ['.db', '.sqlite']:
+        results_db = file_name
+        wave_fish = args.fish_type == 'wave'
+        n = max_n if max_n > 0 else 10
+        data = load_fish(results_db, args.fish_type, args.query,
+                         harmonics=n, peaks0=-n, peaks1=n, columnar=True)
+        if data.rows() == 0:
+            parser.error('no %s-type fish found in database %s' % (args.fish_type, file_name))
+    else:
+        wave_fish = 'wave' in file_name
+        data = TableData(file_name, columnar=True)
 
     # basename:
     basename = os.path.splitext(os.path.basename(file_name))[0]
@@ -16,6 +16,7 @@ from .version import __version__
 from .configfile import ConfigFile
 from .dataloader import open_data
 from .powerspectrum import spectrogram, next_power_of_two, decibel
+from .trackingindex import get_idx_offsets, get_time_range, get_ident_index, get_ident_median_steps
 from .harmonics import add_psd_peak_detection_config, add_harmonic_groups_config
 from .harmonics import harmonic_groups_args, psd_peak_detection_args
 from .harmonics import harmonic_groups, fundamental_freqs, plot_psd_harmonic_groups
@@ -103,69 +104,75 @@ def auto_connect_traces(fund_v, idx_v, ident_v, times, max_dt=120., max_df=2., m
     #     # plt.show()
 
     if not only_bc:
-        idents = np.unique(ident_v[~np.isnan(ident_v)])
-        med_ident_freq = [np.median(fund_v[ident_v == ident]) for ident in idents]
-        i0s = []
-        i1s = []
-        di = []
-        df = []
-        # embed()
-        # quit()
-        next_message = 0.0
-        for enu in np.arange(len(idents) - 1):
-            # for enu, i0 in enumerate(idents[:-1]):
-            # print(enu)
-            next_message = include_progress_bar(enu, len(idents) - 1, 'error traces', next_message)
-            for enu1 in np.arange(enu + 1, len(idents)):
-                # for enu1, i1 in enumerate(idents[enu+1:]):
-                if np.abs(med_ident_freq[enu] - med_ident_freq[enu1]) > max_df:
-                    continue
-
-                if idx_v[ident_v == idents[enu]][-1] < idx_v[ident_v == idents[enu1]][0]:
-                    if np.abs(times[idx_v[ident_v == idents[enu]][-1]] - times[
-                        idx_v[ident_v == idents[enu1]][0]]) > max_dt:
-                        continue
-                    delta_idx = idx_v[ident_v == idents[enu1]][0] - idx_v[ident_v == idents[enu]][-1]
-
-                    # i0 before i1
-                    # print('wuff')
-                elif idx_v[ident_v == idents[enu1]][-1] < idx_v[ident_v == idents[enu]][0]:
-                    if np.abs(times[idx_v[ident_v == idents[enu1]][-1]] - times[
-                        idx_v[ident_v == idents[enu]][0]]) > max_dt:
-                        continue
-                    delta_idx = idx_v[ident_v == idents[enu]][0] - idx_v[ident_v == idents[enu1]][-1]
-                    # i1 before i1
-                else:
-                    delta_idx = 0
-                    # overlapping
+        # summaries of each identity:
+        idents, order, ident_offsets = get_ident_index(ident_v)
+        members = [order[ident_offsets[k]:ident_offsets[k+1]] for k in range(len(idents))]
+        if len(members) < 2:
+            return ident_v
+        med_ident_freq = np.array([np.median(fund_v[m]) for m in members])
+        first_idx = np.array([idx_v[m[0]] for m in members])
+        last_idx = np.array([idx_v[m[-1]] for m in members])
+        ident_idxs = [np.unique(idx_v[m]) for m in members]
+
+        # candidate pairs within max_df of the sorted median frequencies:
+        freq_order = np.argsort(med_ident_freq, kind='mergesort')
+        sorted_freqs = med_ident_freq[freq_order]
+        ends = np.searchsorted(sorted_freqs, sorted_freqs + max_df*(1 + 1e-9) + 1e-9, side='right')
+        n_pairs = ends - np.arange(len(sorted_freqs)) - 1
+        p0 = np.repeat(np.arange(len(sorted_freqs)), n_pairs)
+        p1 = p0 + 1 + np.arange(np.sum(n_pairs)) - np.repeat(np.cumsum(n_pairs) - n_pairs, n_pairs)
+        enu = np.minimum(freq_order[p0], freq_order[p1])
+        enu1 = np.maximum(freq_order[p0], freq_order[p1])
+        df = np.abs(med_ident_freq[enu] - med_ident_freq[enu1])
+        before = last_idx[enu] < first_idx[enu1]  # i0 before i1
+        after = ~before & (last_idx[enu1] < first_idx[enu])  # i1 before i0
+        delta_t = np.zeros(len(enu))
+        delta_t[before] = np.abs(times[last_idx[enu[before]]] - times[first_idx[enu1[before]]])
+        delta_t[after] = np.abs(times[last_idx[enu1[after]]] - times[first_idx[enu[after]]])
+        valid = (df <= max_df) & (delta_t <= max_dt)
+        di = np.zeros(len(enu), dtype=first_idx.dtype)  # overlapping traces have zero distance
+        di[before] = first_idx[enu1[before]] - last_idx[enu[before]]
+        di[after] = first_idx[enu[after]] - last_idx[enu1[after]]
+        pair_order = np.lexsort((enu1[valid], enu[valid]))
+        enu = enu[valid][pair_order]
+        enu1 = enu1[valid][pair_order]
+        di = di[valid][pair_order]
+        df = df[valid][pair_order]
+        if len(enu) == 0:
+            return ident_v
 
-                i0s.append(idents[enu])
-                i1s.append(idents[enu1])
-                di.append(delta_idx)
-                df.append(np.abs(med_ident_freq[enu] - med_ident_freq[enu1]))
-
-        i0s = np.array(i0s)
-        i1s = np.array(i1s)
-        di = np.array(di)
         rel_di = (di - np.min(di)) / (np.max(di) - np.min(di))
-        df = np.array(df)
         rel_df = (df - np.min(df)) / (np.max(df) - np.min(df))
-
         error = rel_di + rel_df
-        # embed()
-        # quit()
-        next_message = 0.00
-        for enu, i in enumerate(np.argsort(error)):
-            next_message = include_progress_bar(enu, len(error), 'connecting traces', next_message)
 
-            # if df[enu] >= max_df:
-            #     continue
-            if len(np.intersect1d(idx_v[ident_v == i0s[i]], idx_v[ident_v == i1s[i]])) > max_overlap_n:
+        # connect traces with a union-find structure, the root keeps its identity:
+        parent = np.arange(len(idents))
+
+        def find(k):
+            root = k
+            while parent[root] != root:
+                root = parent[root]
+            while parent[k] != root:
+                parent[k], k = root, parent[k]
+            return root
+
+        next_message = 0.00
+        for n, i in enumerate(np.argsort(error)):
+            next_message = include_progress_bar(n, len(error), 'connecting traces', next_message)
+            r0 = find(enu[i])
+            r1 = find(enu1[i])
+            if r0 == r1:
                 continue
-            else:
-                ident_v[ident_v == i1s[i]] = i0s[i]
-                i0s[i0s == i1s[i]] = i0s[i]
-                i1s[i1s == i1s[i]] = i0s[i]
+            if len(np.intersect1d(ident_idxs[r0], ident_idxs[r1], assume_unique=True)) > max_overlap_n:
+                continue
+            parent[r1] = r0
+            ident_idxs[r0] = np.union1d(ident_idxs[r0], ident_idxs[r1])
+            ident_idxs[r1] = None
+
+        for k in range(len(idents)):
+            root = find(k)
+            if root != k:
+                ident_v[members[k]] = idents[root]
 
     return ident_v
 
@@ -332,14 +339,11 @@ def freq_tracking_v5(fundamentals, signatures, times, freq_tolerance, n_channels
 
         """
         # print('clean up')
-        for ident in np.unique(ident_v[~np.isnan(ident_v)]):
-            if np.median(np.abs(np.diff(fund_v[ident_v == ident]))) >= 0.25:
-                ident_v[ident_v == ident] = np.nan
-                continue
-
-            if len(ident_v[ident_v == ident]) <= 10:
-                ident_v[ident_v == ident] = np.nan
-                continue
+        idents, order, ident_offsets = get_ident_index(ident_v)
+        counts = np.diff(ident_offsets)
+        median_steps = get_ident_median_steps(fund_v, order, ident_offsets)
+        remove = (median_steps >= 0.25) | (counts <= 10)
+        ident_v[order[np.repeat(remove, counts)]] = np.nan
 
         return ident_v
 
@@ -604,29 +608,27 @@ def freq_tracking_v5(fundamentals, signatures, times, freq_tolerance, n_channels
 
         return tmp_ident_v_ret, errors_to_v
 
-    def get_a_and_f_error_dist(fund_v, idx_v, sign_v, start_idx, idx_comp_range, freq_lims, freq_tolerance):
+    def get_a_and_f_error_dist(fund_v, idx_offsets, sign_v, start_idx, idx_comp_range, freq_lims, freq_tolerance):
         f_error_distribution = []
         a_error_distribution = []
 
         for i in range(start_idx, int(start_idx + idx_comp_range * 3)):
-            i0_v = np.arange(len(idx_v))[(idx_v == i) & (fund_v >= freq_lims[0]) & (fund_v <= freq_lims[1])]  # indices of fundamtenals to assign
-            i1_v = np.arange(len(idx_v))[(idx_v > i) & (idx_v <= (i + int(idx_comp_range))) & (fund_v >= freq_lims[0]) & (fund_v <= freq_lims[1])]  # indices of possible targets
+            i0_v = get_time_range(idx_offsets, i, i + 1)  # indices of fundamtenals to assign
+            i0_v = i0_v[(fund_v[i0_v] >= freq_lims[0]) & (fund_v[i0_v] <= freq_lims[1])]
+            i1_v = get_time_range(idx_offsets, i + 1, i + int(idx_comp_range) + 1)  # indices of possible targets
+            i1_v = i1_v[(fund_v[i1_v] >= freq_lims[0]) & (fund_v[i1_v] <= freq_lims[1])]
 
             if len(i0_v) == 0 or len(i1_v) == 0:  # if nothing to assign or no targets continue
                 continue
 
-            for enu0 in range(len(fund_v[i0_v])):
-                if fund_v[i0_v[enu0]] < freq_lims[0] or fund_v[i0_v[enu0]] > freq_lims[1]:
-                    continue
-                for enu1 in range(len(fund_v[i1_v])):
-                    if fund_v[i1_v[enu1]] < freq_lims[0] or fund_v[i1_v[enu1]] > freq_lims[1]:
-                        continue
-                    if np.abs(fund_v[i0_v[enu0]] - fund_v[i1_v[enu1]]) >= freq_tolerance:  # freq difference to high
-                        continue
-                    a_error_distribution.append(np.sqrt(np.sum(
-                        [(sign_v[i0_v[enu0]][k] - sign_v[i1_v[enu1]][k]) ** 2 for k in
-                         range(len(sign_v[i0_v[enu0]]))])))
-                    f_error_distribution.append(np.abs(fund_v[i0_v[enu0]] - fund_v[i1_v[enu1]]))
+            # all pairs within the frequency range and the frequency tolerance:
+            f_error = np.abs(fund_v[i0_v][:, None] - fund_v[i1_v][None, :])
+            valid = f_error < freq_tolerance
+            valid &= ((fund_v[i0_v] >= freq_lims[0]) & (fund_v[i0_v] <= freq_lims[1]))[:, None]
+            valid &= ((fund_v[i1_v] >= freq_lims[0]) & (fund_v[i1_v] <= freq_lims[1]))[None, :]
+            enu0, enu1 = np.nonzero(valid)
+            a_error_distribution.extend(np.sqrt(np.sum((sign_v[i0_v[enu0]] - sign_v[i1_v[enu1]]) ** 2, axis=1)))
+            f_error_distribution.extend(f_error[enu0, enu1])
 
         return np.array(a_error_distribution), np.array(f_error_distribution)
 
@@ -670,8 +672,10 @@ def freq_tracking_v5(fundamentals, signatures, times, freq_tolerance, n_channels
             Citt = np.arange(start_idx, int(start_idx + idx_comp_range * 3))
 
         for i in Citt:
-            i0_v = np.arange(len(idx_v))[(idx_v == i) & (fund_v >= freq_lims[0]) & (fund_v <= freq_lims[1])]  # indices of fundamtenals to assign
-            i1_v = np.arange(len(idx_v))[(idx_v > i) & (idx_v <= (i + int(idx_comp_range))) & (fund_v >= freq_lims[0]) & (fund_v <= freq_lims[1])]  # indices of possible targets
+            i0_v = get_time_range(idx_offsets, i, i + 1)  # indices of fundamtenals to assign
+            i0_v = i0_v[(fund_v[i0_v] >= freq_lims[0]) & (fund_v[i0_v] <= freq_lims[1])]
+            i1_v = get_time_range(idx_offsets, i + 1, i + int(idx_comp_range) + 1)  # indices of possible targets
+            i1_v = i1_v[(fund_v[i1_v] >= freq_lims[0]) & (fund_v[i1_v] <= freq_lims[1])]
 
             i0_m.append(i0_v)
             i1_m.append(i1_v)
@@ -793,10 +797,11 @@ def freq_tracking_v5(fundamentals, signatures, times, freq_tolerance, n_channels
     # high_freq_th = freq_lims[1]  # max. frequency tracked
 
     fund_v, ident_v, idx_v, sign_v, original_sign_v, idx_of_origin_v, idx_comp_range, dps = reshape_data()
+    idx_offsets = get_idx_offsets(idx_v, len(fundamentals))
     start_idx = 0 if not ioi_fti else idx_v[ioi_fti]  # Index Of Interest for temporal identities
 
     a_error_distribution, f_error_distribution = \
-        get_a_and_f_error_dist(fund_v, idx_v, sign_v, start_idx, idx_comp_range, freq_lims, freq_tolerance=freq_tolerance)
+        get_a_and_f_error_dist(fund_v, idx_offsets, sign_v, start_idx, idx_comp_range, freq_lims, freq_tolerance=freq_tolerance)
     # embed()
     # quit()
     error_cube, i0_m, i1_m, cube_app_idx = create_error_cube(i0_m=None, i1_m=None, error_cube=None, freq_lims=freq_lims, cube_app_idx=None)
@@ -816,7 +821,7 @@ def freq_tracking_v5(fundamentals, signatures, times, freq_tolerance, n_channels
 
         if i % idx_comp_range == 0: # next total sorting step
             a_error_distribution, f_error_distribution = \
-                get_a_and_f_error_dist(fund_v, idx_v, sign_v, start_idx, idx_comp_range, freq_lims, freq_tolerance)
+                get_a_and_f_error_dist(fund_v, idx_offsets, sign_v, start_idx, idx_comp_range, freq_lims, freq_tolerance)
 
             tmp_ident_v, errors_to_v = get_tmp_identities(i0_m, i1_m, error_cube, fund_v, idx_v, i, ioi_fti, idx_comp_range)
 
@@ -929,14 +934,11 @@ def freq_tracking_v4(fundamentals, signatures, times, freq_tolerance, n_channels
 
         """
         # print('clean up')
-        for ident in np.unique(ident_v[~np.isnan(ident_v)]):
-            if np.median(np.abs(np.diff(fund_v[ident_v == ident]))) >= 0.25:
-                ident_v[ident_v == ident] = np.nan
-                continue
-
-            if len(ident_v[ident_v == ident]) <= 10:
-                ident_v[ident_v == ident] = np.nan
-                continue
+        idents, order, ident_offsets = get_ident_index(ident_v)
+        counts = np.diff(ident_offsets)
+        median_steps = get_ident_median_steps(fund_v, order, ident_offsets)
+        remove = (median_steps >= 0.25) | (counts <= 10)
+        ident_v[order[np.repeat(remove, counts)]] = np.nan
 
         return ident_v
 
@@ -1326,7 +1328,7 @@ def freq_tracking_v4(fundamentals, signatures, times, freq_tolerance, n_channels
         return tmp_ident_v_ret, errors_to_v, plotted
 
 
-    def get_a_and_f_error_dist2(fund_v, idx_v, sign_v, start_idx, idx_comp_range, freq_lims, low_freq_th, high_freq_th,
+    def get_a_and_f_error_dist2(fund_v, idx_offsets, sign_v, start_idx, idx_comp_range, freq_lims, low_freq_th, high_freq_th,
                                 freq_tolerance):
         f_error_distribution = []
         a_error_distribution = []
@@ -1334,27 +1336,22 @@ def freq_tracking_v4(fundamentals, signatures, times, freq_tolerance, n_channels
         # next_message = 0.0
         for i in range(start_idx, int(start_idx + idx_comp_range * 3)):
             # next_message = include_progress_bar(i - start_idx, int(idx_comp_range * 2), 'error dist init', next_message)
-            i0_v = np.arange(len(idx_v))[
-                (idx_v == i) & (fund_v >= freq_lims[0]) & (fund_v <= freq_lims[1])]  # indices of fundamtenals to assign
-            i1_v = np.arange(len(idx_v))[
-                (idx_v > i) & (idx_v <= (i + int(idx_comp_range))) & (fund_v >= freq_lims[0]) & (
-                            fund_v <= freq_lims[1])]  # indices of possible targets
+            i0_v = get_time_range(idx_offsets, i, i + 1)  # indices of fundamtenals to assign
+            i0_v = i0_v[(fund_v[i0_v] >= freq_lims[0]) & (fund_v[i0_v] <= freq_lims[1])]
+            i1_v = get_time_range(idx_offsets, i + 1, i + int(idx_comp_range) + 1)  # indices of possible targets
+            i1_v = i1_v[(fund_v[i1_v] >= freq_lims[0]) & (fund_v[i1_v] <= freq_lims[1])]
 
             if len(i0_v) == 0 or len(i1_v) == 0:  # if nothing to assign or no targets continue
                 continue
 
-            for enu0 in range(len(fund_v[i0_v])):
-                if fund_v[i0_v[enu0]] < low_freq_th or fund_v[i0_v[enu0]] > high_freq_th:
-                    continue
-                for enu1 in range(len(fund_v[i1_v])):
-                    if fund_v[i1_v[enu1]] < low_freq_th or fund_v[i1_v[enu1]] > high_freq_th:
-                        continue
-                    if np.abs(fund_v[i0_v[enu0]] - fund_v[i1_v[enu1]]) >= freq_tolerance:  # freq difference to high
-                        continue
-                    a_error_distribution.append(np.sqrt(np.sum(
-                        [(sign_v[i0_v[enu0]][k] - sign_v[i1_v[enu1]][k]) ** 2 for k in
-                         range(len(sign_v[i0_v[enu0]]))])))
-                    f_error_distribution.append(np.abs(fund_v[i0_v[enu0]] - fund_v[i1_v[enu1]]))
+            # all pairs within the frequency range and the frequency tolerance:
+            f_error = np.abs(fund_v[i0_v][:, None] - fund_v[i1_v][None, :])
+            valid = f_error < freq_tolerance
+            valid &= ((fund_v[i0_v] >= low_freq_th) & (fund_v[i0_v] <= high_freq_th))[:, None]
+            valid &= ((fund_v[i1_v] >= low_freq_th) & (fund_v[i1_v] <= high_freq_th))[None, :]
+            enu0, enu1 = np.nonzero(valid)
+            a_error_distribution.extend(np.sqrt(np.sum((sign_v[i0_v[enu0]] - sign_v[i1_v[enu1]]) ** 2, axis=1)))
+            f_error_distribution.extend(f_error[enu0, enu1])
 
         return np.array(a_error_distribution), np.array(f_error_distribution)
 
@@ -1376,6 +1373,7 @@ def freq_tracking_v4(fundamentals, signatures, times, freq_tolerance, n_channels
         sign_v.extend(signatures[enu])
     idx_v = np.array(idx_v, dtype=int)
     sign_v = np.array(sign_v)
+    idx_offsets = get_idx_offsets(idx_v, len(fundamentals))
 
     original_sign_v = sign_v
     if np.shape(sign_v)[1] > 2:
@@ -1393,17 +1391,17 @@ def freq_tracking_v4(fundamentals, signatures, times, freq_tolerance, n_channels
     next_message = 0.
     start_idx = 0 if not ioi_fti else idx_v[ioi_fti]  # Index Of Interest for temporal identities
 
-    a_error_distribution, f_error_distribution = get_a_and_f_error_dist2(fund_v, idx_v, sign_v, start_idx,
+    a_error_distribution, f_error_distribution = get_a_and_f_error_dist2(fund_v, idx_offsets, sign_v, start_idx,
                                                                          idx_comp_range, freq_lims, low_freq_th,
                                                                          high_freq_th, freq_tolerance)
 
     for i in range(start_idx, int(start_idx + idx_comp_range * 3)):
 
         next_message = include_progress_bar(i - start_idx, int(idx_comp_range * 2), 'initial error cube', next_message)
-        i0_v = np.arange(len(idx_v))[
-            (idx_v == i) & (fund_v >= freq_lims[0]) & (fund_v <= freq_lims[1])]  # indices of fundamtenals to assign
-        i1_v = np.arange(len(idx_v))[(idx_v > i) & (idx_v <= (i + int(idx_comp_range))) & (fund_v >= freq_lims[0]) & (
-                    fund_v <= freq_lims[1])]  # indices of possible targets
+        i0_v = get_time_range(idx_offsets, i, i + 1)  # indices of fundamtenals to assign
+        i0_v = i0_v[(fund_v[i0_v] >= freq_lims[0]) & (fund_v[i0_v] <= freq_lims[1])]
+        i1_v = get_time_range(idx_offsets, i + 1, i + int(idx_comp_range) + 1)  # indices of possible targets
+        i1_v = i1_v[(fund_v[i1_v] >= freq_lims[0]) & (fund_v[i1_v] <= freq_lims[1])]
 
         i0_m.append(i0_v)
         i1_m.append(i1_v)
@@ -1474,7 +1472,7 @@ def freq_tracking_v4(fundamentals, signatures, times, freq_tolerance, n_channels
             if enu % idx_comp_range == 0:
                 # t0 = time.time()
                 # print('\ndist')
-                a_error_distribution, f_error_distribution = get_a_and_f_error_dist2(fund_v, idx_v, sign_v, start_idx,
+                a_error_distribution, f_error_distribution = get_a_and_f_error_dist2(fund_v, idx_offsets, sign_v, start_idx,
                                                                                      idx_comp_range, freq_lims, low_freq_th,
                                                                                      high_freq_th, freq_tolerance)
                 # print('\ntmp idents')
@@ -1807,11 +1805,10 @@ def freq_tracking_v4(fundamentals, signatures, times, freq_tolerance, n_channels
         i1_m.pop(0)
         error_cube.pop(0)
 
-        i0_v = np.arange(len(idx_v))[(idx_v == cube_app_idx) & (fund_v >= freq_lims[0]) & (
-                    fund_v <= freq_lims[1])]  # indices of fundamtenals to assign
-        i1_v = np.arange(len(idx_v))[
-            (idx_v > cube_app_idx) & (idx_v <= (cube_app_idx + idx_comp_range)) & (fund_v >= freq_lims[0]) & (
-                        fund_v <= freq_lims[1])]  # indices of possible targets
+        i0_v = get_time_range(idx_offsets, cube_app_idx, cube_app_idx + 1)  # indices of fundamtenals to assign
+        i0_v = i0_v[(fund_v[i0_v] >= freq_lims[0]) & (fund_v[i0_v] <= freq_lims[1])]
+        i1_v = get_time_range(idx_offsets, cube_app_idx + 1, cube_app_idx + idx_comp_range + 1)  # indices of possible targets
+        i1_v = i1_v[(fund_v[i1_v] >= freq_lims[0]) & (fund_v[i1_v] <= freq_lims[1])]
 
         i0_m.append(i0_v)
         i1_m.append(i1_v)
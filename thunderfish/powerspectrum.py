@@ -151,7 +151,7 @@ def power(decibel, ref_power=1.0):
 
 
 def psd(data, samplerate, freq_resolution, min_nfft=16, max_nfft=None,
-        overlap_frac=0.5, detrend='constant', window='hanning'):
+        overlap_frac=0.5, detrend='constant', window='hanning', dtype=None):
     """Power spectrum density of a given frequency resolution.
 
     NFFT is computed from the requested frequency resolution and the
@@ -189,6 +189,9 @@ def psd(data, samplerate, freq_resolution, min_nfft=16, max_nfft=None,
         One of hanning, blackman, hamming, bartlett, boxcar, triang, parzen,
         bohman, blackmanharris, nuttall, fattop, barthann
         (see scipy.signal window functions).
+    dtype: numpy dtype or None
+        If not None, compute the power spectrum from data converted to
+        this type (e.g. float32) and return the power in this type.
 
     Returns
     -------
@@ -199,6 +202,8 @@ def psd(data, samplerate, freq_resolution, min_nfft=16, max_nfft=None,
     """
     n_fft = nfft(samplerate, freq_resolution, min_nfft, max_nfft)
     noverlap = int(n_fft * overlap_frac)
+    if dtype is not None:
+        data = np.asarray(data, dtype)
     if psdscipy:
         if detrend == 'none':
             detrend = lambda x: x
@@ -216,6 +221,8 @@ def psd(data, samplerate, freq_resolution, min_nfft=16, max_nfft=None,
                                 noverlap=noverlap, detrend=detrend_func,
                                 window=get_window(window, n_fft),
                                 scale_by_freq=True)
+    if dtype is not None:
+        power = power.astype(dtype, copy=False)
     # squeeze is necessary when n_fft is to large with respect to the data:
     return freqs, np.squeeze(power)
 
@@ -223,7 +230,7 @@ def psd(data, samplerate, freq_resolution, min_nfft=16, max_nfft=None,
 def multi_psd(data, samplerate, freq_resolution=0.5,
               num_resolutions=1, num_windows=1,
               min_nfft=16, overlap_frac=0.5,
-              detrend='constant', window='hanning'):
+              detrend='constant', window='hanning', dtype=None):
     """Power spectra computed for consecutive data windows and
     mutiple frequency resolutions.
 
@@ -258,6 +265,9 @@ def multi_psd(data, samplerate, freq_resolution=0.5,
         One of hanning, blackman, hamming, bartlett, boxcar, triang, parzen,
         bohman, blackmanharris, nuttall, fattop, barthann
         (see scipy.signal window functions).
+    dtype: numpy dtype or None
+        If not None, compute the power spectra from data converted to
+        this type (e.g. float32) and return them in this type.
 
     Returns
     -------
@@ -274,14 +284,15 @@ def multi_psd(data, samplerate, freq_resolution=0.5,
     for k in range(num_windows):
         for fres in freq_resolution:
             freq, power = psd(data[k*n_incr:(k+2)*n_incr], samplerate, fres,
-                              min_nfft, 2*n_incr, overlap_frac, detrend, window)
-            multi_psd_data.append(np.column_stack((freq, power)))
+                              min_nfft, 2*n_incr, overlap_frac, detrend, window,
+                              dtype)
+            multi_psd_data.append(np.column_stack((freq.astype(power.dtype), power)))
     return multi_psd_data
 
 
 def spectrogram(data, samplerate, freq_resolution=0.5, min_nfft=16,
                 max_nfft=None, overlap_frac=0.5,
-                detrend='constant', window='hanning'):
+                detrend='constant', window='hanning', dtype=None):
     """
     Spectrogram of a given frequency resolution.
 
@@ -316,6 +327,10 @@ def spectrogram(data, samplerate, freq_resolution=0.5, min_nfft=16,
         One of hanning, blackman, hamming, bartlett, boxcar, triang, parzen,
         bohman, blackmanharris, nuttall, fattop, barthann
         (see scipy.signal window functions).
+    dtype: numpy dtype or None
+        If not None, compute the spectrogram from data converted to
+        this type (e.g. float32) and return the spectrum in this type.
+        With float32 the spectrogram needs half the memory.
 
     Returns
     -------
@@ -328,18 +343,22 @@ def spectrogram(data, samplerate, freq_resolution=0.5, min_nfft=16,
     """
     n_fft = nfft(samplerate, freq_resolution, min_nfft, max_nfft)
     noverlap = int(n_fft * overlap_frac)
+    win = get_window(window, n_fft)
+    if dtype is not None:
+        data = np.asarray(data, dtype)
+        win = win.astype(dtype)
     if specgrammlab:
         try:
             spec, freqs, time = mspecgram(data, NFFT=n_fft, Fs=samplerate,
                                           noverlap=noverlap, detrend=detrend,
                                           scale_by_freq=True, scale='linear',
-                                          mode='psd',
-                                          window=get_window(window, n_fft))
+                                          mode='psd', window=win)
         except TypeError:
             spec, freqs, time = mspecgram(data, NFFT=n_fft, Fs=samplerate,
                                           noverlap=noverlap, detrend=detrend,
-                                          scale_by_freq=True,
-                                          window=get_window(window, n_fft))
+                                          scale_by_freq=True, window=win)
+        if dtype is not None:
+            spec = spec.astype(dtype, copy=False)
         return spec, freqs, time
     else:
         # ... some alternative implementation ...
@@ -432,7 +451,7 @@ def peak_freqs(onsets, offsets, data, samplerate, freq_resolution=1.0,
 
 
 def add_multi_psd_config(cfg, freq_resolution=0.5,
-                         num_resolutions=1, num_windows=1):
+                         num_resolutions=1, num_windows=1, dtype='float64'):
     """ Add all parameters needed for the multi_psd() function as
     a new section to a configuration.
 
@@ -447,6 +466,7 @@ def add_multi_psd_config(cfg, freq_resolution=0.5,
     cfg.add('frequencyResolution', freq_resolution, 'Hz', 'Frequency resolution of the power spectrum.')
     cfg.add('numberPSDWindows', num_resolutions, '', 'Number of windows on which power spectra are computed.')
     cfg.add('numberPSDResolutions', num_windows, '', 'Number of power spectra computed within each window with decreasing resolution.')
+    cfg.add('psdDataType', dtype, '', 'Data type used for computing power spectra ("float64" or "float32").')
 
 
 def multi_psd_args(cfg):
@@ -469,7 +489,8 @@ def multi_psd_args(cfg):
     """
     a = cfg.map({'freq_resolution': 'frequencyResolution',
                  'num_resolutions': 'numberPSDWindows',
-                 'num_windows': 'numberPSDResolutions'})
+                 'num_windows': 'numberPSDResolutions',
+                 'dtype': 'psdDataType'})
     return a
 
 
@@ -737,23 +737,20 @@ def analyze_pulse_data(filepath, deltat=30, thresh=0.04, starttime = 0, endtime
         samplerate = data.samplerate
 
         # selected time interval
+        parttime1 = 0
+        parttime2 = len(data)
         if timegiven == True:
-            parttime1 = starttime*samplerate
-            parttime2 = endtime*samplerate
-            data = data[parttime1:parttime2]
+            parttime1 = int(starttime*samplerate)
+            parttime2 = int(endtime*samplerate)
 
         #split data into blocks
         nblock = int(deltat*samplerate)
-        if len(data)%nblock != 0:
-            blockamount = len(data)//nblock + 1
-        else:
-            blockamount = len(data)//nblock
+        blockamount = (parttime2 - parttime1 + nblock - 1)//nblock
         print('blockamount: ' , blockamount)
         progress = 0
         print(progress, '%' , flush = True, end = " ")
         #fish = ProgressFish(total = blockamount)
-        for idx in range(0, blockamount):
-            blockdata = data[idx*nblock:(idx+1)*nblock]
+        for idx, (offset, blockdata) in enumerate(data.blocks(nblock, start=parttime1, stop=parttime2)):
             if progress < (idx*100 //blockamount):
                 progress = (idx*100)//blockamount
             progressstr = ' Filestatus: '
@@ -901,16 +898,14 @@ def analyze_long_pulse_data_file(filepath,save=0,plot_steps=0,new=1,starttime =
             nblock = int(deltat*data.samplerate)
 
             # selected time interval
+            parttime1 = 0
+            parttime2 = len(data)
             if timegiven == True:
-                parttime1 = starttime*samplerate
-                parttime2 = endtime*samplerate
-                data = data[parttime1:parttime2]
+                parttime1 = int(starttime*samplerate)
+                parttime2 = int(endtime*samplerate)
 
             #split data into blocks
-            if len(data)%nblock != 0:
-                blockamount = len(data)//nblock + 1
-            else:
-                blockamount = len(data)//nblock
+            blockamount = (parttime2 - parttime1 + nblock - 1)//nblock
 
             # progress bar
             print('blockamount: ' , blockamount)
@@ -919,8 +914,7 @@ def analyze_long_pulse_data_file(filepath,save=0,plot_steps=0,new=1,starttime =
             #fish = ProgressFish(total = blockamount)
 
             # blockwise analysis 
-            for idx in range(0, blockamount):
-                blockdata = data[idx*nblock:(idx+1)*nblock]
+            for idx, (offset, blockdata) in enumerate(data.blocks(nblock, start=parttime1, stop=parttime2)):
                 # progressbar
                 if progress < (idx*100 //blockamount):
                     progress = (idx*100)//blockamount
@@ -0,0 +1,421 @@
+"""
+# resultsdb
+
+Store analysis results of thunderfish in a local SQLite database.
+
+All tables of a recording as generated by thunderfish are stored in a
+single database file. The properties of wave- and pulse-type fish
+(the wavefish and pulsefish tables) go into a common `fish` table
+that is indexed by recording, fish type, and EOD frequency. Tables of
+each fish, like harmonics, peaks, spectra, and waveforms, go into
+tables of the same name (e.g. `wavespectrum`, `pulsepeaks`,
+`eodwaveform`) that are indexed by recording and fish index. This way,
+fish with particular properties can be selected from many recordings
+within milliseconds:
+
+```
+data = load_fish('results.db', 'wave', '"EODf" between ? and ? and noise < ?',
+                 (600.0, 700.0, 5.0))
+```
+
+The database is a plain file, no database server is needed.
+Several processes can write into the same database.
+
+- `write_results()`: write all tables of a recording into a database.
+- `load_fish()`: load properties of wave- or pulse-type fish.
+- `load_table()`: load a table of a single fish of a recording.
+- `recordings()`: names of all recordings stored in a database.
+"""
+
+import json
+import time
+import sqlite3
+import numpy as np
+from .tabledata import TableData
+
+
+fish_tables = {'wavefish': 'wave', 'pulsefish': 'pulse'}
+"""Names of tables whose rows go into the fish table and the corresponding fish types."""
+
+
+def quote(name):
+    """
+    Quote an identifier for SQL.
+
+    Parameters
+    ----------
+    name: string
+        Name of a table or a column.
+
+    Returns
+    -------
+    name: string
+        The name in double quotes.
+    """
+    return '"%s"' % name.replace('"', '""')
+
+
+def open_db(db_file):
+    """
+    Open a results database and create its basic tables.
+
+    Parameters
+    ----------
+    db_file: string
+        Path of the SQLite database file.
+
+    Returns
+    -------
+    con: sqlite3.Connection
+        Connection to the database.
+    """
+    con = sqlite3.connect(db_file, timeout=60.0)
+    con.executescript('''
+        CREATE TABLE IF NOT EXISTS recordings (
+            recording TEXT PRIMARY KEY, file TEXT, channel INTEGER,
+            samplerate REAL, unit TEXT, analyzed TEXT);
+        CREATE TABLE IF NOT EXISTS columns (
+            tab TEXT NOT NULL, name TEXT NOT NULL, position INTEGER,
+            header TEXT, unit TEXT, format TEXT, PRIMARY KEY (tab, name));
+        CREATE TABLE IF NOT EXISTS fish (
+            recording TEXT NOT NULL, type TEXT NOT NULL,
+            "index" INTEGER, "EODf" REAL);
+        CREATE INDEX IF NOT EXISTS fish_recording ON fish (recording, "index");
+        CREATE INDEX IF NOT EXISTS fish_type ON fish (type, "EODf");
+        CREATE INDEX IF NOT EXISTS fish_eodf ON fish ("EODf");
+        ''')
+    return con
+
+
+def split_name(name):
+    """
+    Split the name of a thunderfish table into its base name and fish index.
+
+    Parameters
+    ----------
+    name: string
+        Name of the table, e.g. 'wavespectrum-2'.
+
+    Returns
+    -------
+    base_name: string
+        Name of the table without fish index, e.g. 'wavespectrum'.
+    index: int or None
+        Index of the fish, None if the name does not have an index.
+    """
+    parts = name.rsplit('-', 1)
+    if len(parts) == 2 and parts[1].isdigit():
+        return parts[0], int(parts[1])
+    return name, None
+
+
+def sql_value(value):
+    """
+    Translate a data value of a TableData into a value for SQL.
+
+    NaNs are translated to None (NULL) and numpy scalars to python types.
+    """
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and np.isnan(value):
+        return None
+    return value
+
+
+def add_columns(con, sql_table, name, table):
+    """
+    Add missing columns of a table to a database table.
+
+    Parameters
+    ----------
+    con: sqlite3.Connection
+        Connection to the database.
+    sql_table: string
+        Name of the table in the database.
+    name: string
+        Name of the thunderfish table under which the header
+        information of its columns is stored.
+    table: TableData
+        The table whose columns are added.
+    """
+    existing = [r[1] for r in con.execute('PRAGMA table_info(%s)' % quote(sql_table))]
+    if len(existing) == 0:
+        con.execute('CREATE TABLE %s (recording TEXT NOT NULL, fish INTEGER)' %
+                    quote(sql_table))
+        con.execute('CREATE INDEX %s ON %s (recording, fish)' %
+                    (quote(sql_table + '_recording'), quote(sql_table)))
+        existing = ['recording', 'fish']
+    position = con.execute('SELECT COUNT(*) FROM columns WHERE tab = ?',
+                           (name,)).fetchone()[0]
+    for c in range(table.columns()):
+        label = table.label(c)
+        if label not in existing:
+            numeric = all(isinstance(v, (int, float, np.number)) for v in table.data[c])
+            con.execute('ALTER TABLE %s ADD COLUMN %s %s' %
+                        (quote(sql_table), quote(label), 'REAL' if numeric else 'TEXT'))
+            existing.append(label)
+        cur = con.execute('INSERT OR IGNORE INTO columns VALUES (?, ?, ?, ?, ?, ?)',
+                          (name, label, position, json.dumps(table.header[c]),
+                           table.unit(c), table.format(c)))
+        position += cur.rowcount
+
+
+def write_results(db_file, recording, tables, file_name=None, channel=None,
+                  samplerate=None, unit=None):
+    """
+    Write all tables of a recording into a database.
+
+    Results of the recording already stored in the database are replaced.
+
+    Parameters
+    ----------
+    db_file: string
+        Path of the SQLite database file. Created if it does not exist.
+    recording: string
+        Name of the recording (path and basename as used for the
+        output files of thunderfish).
+    tables: dict
+        Names of the tables as keys and the corresponding TableData.
+        Tables named 'wavefish' and 'pulsefish' are written into the
+        `fish` table. Names of tables of single fish end with the
+        index of the fish (e.g. 'wavespectrum-2'), they are written
+        into tables with the fish index removed from the name
+        (e.g. 'wavespectrum').
+    file_name: string or None
+        Path of the analyzed data file.
+    channel: int or None
+        Analyzed channel of the data file.
+    samplerate: float or None
+        Sampling rate of the data.
+    unit: string or None
+        Unit of the data.
+    """
+    con = open_db(db_file)
+    with con:
+        # remove previous results:
+        sql_tables = set(['fish'])
+        for (name,) in con.execute('SELECT DISTINCT tab FROM columns'):
+            if name not in fish_tables:
+                sql_tables.add(split_name(name)[0])
+        for sql_table in sql_tables:
+            con.execute('DELETE FROM %s WHERE recording = ?' % quote(sql_table),
+                        (recording,))
+        con.execute('INSERT OR REPLACE INTO recordings VALUES (?, ?, ?, ?, ?, ?)',
+                    (recording, file_name, channel, samplerate, unit,
+                     time.strftime('%Y-%m-%dT%H:%M:%S')))
+        # write tables:
+        for name, table in tables.items():
+            if name in fish_tables:
+                sql_table = 'fish'
+                key = ('type', fish_tables[name])
+            else:
+                sql_table, idx = split_name(name)
+                name = sql_table
+                key = ('fish', idx)
+            add_columns(con, sql_table, name, table)
+            labels = [quote(table.label(c)) for c in range(table.columns())]
+            sql = 'INSERT INTO %s (recording, %s, %s) VALUES (%s)' % \
+                  (quote(sql_table), key[0], ', '.join(labels),
+                   ', '.join(['?']*(len(labels)+2)))
+            rows = [[recording, key[1]] + [sql_value(table.data[c][r])
+                                           for c in range(table.columns())]
+                    for r in range(table.rows())]
+            con.executemany(sql, rows)
+    con.close()
+
+
+def columns_info(con, name):
+    """
+    Header information of the columns of a table.
+
+    Parameters
+    ----------
+    con: sqlite3.Connection
+        Connection to the database.
+    name: string
+        Name of the thunderfish table (without fish index).
+
+    Returns
+    -------
+    info: list of tuples
+        For each column its name, header, unit, and format.
+    """
+    return [(n, json.loads(h), u, f) for n, h, u, f in
+            con.execute('SELECT name, header, unit, format FROM columns '
+                        'WHERE tab = ? ORDER BY position', (name,))]
+
+
+def make_table(info, rows, columnar=False):
+    """
+    Make a TableData from column information and rows of data.
+
+    Parameters
+    ----------
+    info: list of tuples
+        For each column its name, header, unit, and format.
+    rows: list of tuples
+        Rows of data values as returned from the database.
+    columnar: boolean
+        If True, return table with numpy arrays as columns.
+
+    Returns
+    -------
+    table: TableData
+        The table. NULL values are replaced by NaN.
+    """
+    td = TableData(columnar=columnar)
+    for k, (n, header, unit, format) in enumerate(info):
+        values = [float('NaN') if r[k] is None else r[k] for r in rows]
+        td.append(header[::-1], unit, format, values)
+    return td
+
+
+def load_fish(db_file, fish_type, where=None, params=(), harmonics=None,
+              peaks0=None, peaks1=None, columnar=False):
+    """
+    Load properties of wave- or pulse-type fish.
+
+    The returned table has the same columns as the summary tables
+    generated by `collectfish`.
+
+    Parameters
+    ----------
+    db_file: string
+        Path of the SQLite database file.
+    fish_type: 'wave' or 'pulse'
+        Type of fish.
+    where: string or None
+        SQL condition for selecting fish. Columns need to be quoted
+        if they are not valid identifiers, e.g. `"p-p-amplitude" > 0.1`.
+        Prefix columns with `fish.` if they also appear in the
+        tables of harmonics or peaks, e.g. `fish.amplitude`.
+    params: tuple
+        Values for the placeholders ('?') in `where`.
+    harmonics: int or None
+        Number of harmonics to be added to the table of wave-type fish
+        (amplitude, relampl, relpower, phase).
+    peaks0: int or None
+        Index of the first peak of a EOD pulse to be added to the table
+        of pulse-type fish.
+    peaks1: int or None
+        Index of the last peak of a EOD pulse to be added to the table
+        of pulse-type fish.
+    columnar: boolean
+        If True, return a table with numpy arrays as columns.
+
+    Returns
+    -------
+    data: TableData
+        Properties of the selected fish.
+        The first column holds the names of the recordings.
+        Columns of harmonics and peaks without any data are omitted.
+    """
+    con = sqlite3.connect(db_file, timeout=60.0)
+    info = columns_info(con, fish_type + 'fish')
+    nfish = len(info) + 1
+    nsecs = max([len(h) for n, h, u, f in info]) - 1 if info else 0
+    info.insert(0, ('recording', ['file'] + ['recording']*nsecs, '', '%-s'))
+    selects = ['fish.%s' % quote(n) for n, h, u, f in info]
+    joins = []
+    sql_tables = [r[0] for r in con.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+    if 'wavespectrum' not in sql_tables:
+        harmonics = None
+    if 'pulsepeaks' not in sql_tables:
+        peaks0 = None
+    if fish_type == 'wave' and harmonics is not None:
+        spec_info = dict((n, (u, f)) for n, h, u, f in columns_info(con, 'wavespectrum'))
+        for k in range(harmonics+1):
+            alias = 'h%d' % k
+            joins.append('LEFT JOIN wavespectrum AS %s ON %s.recording = fish.recording '
+                         'AND %s.fish = fish."index" AND %s.harmonics = %d' %
+                         (alias, alias, alias, alias, k))
+            section = ['harmonics'] if nsecs > 0 and k == 0 else []
+            cols = [('amplitude', 'ampl%d' % k) + spec_info.get('amplitude', ('', '%.5f'))]
+            if k > 0:
+                cols.append(('relampl', 'relampl%d' % k, '%', '%.2f'))
+                cols.append(('relpower', 'relpower%d' % k, '%', '%.2f'))
+            cols.append(('phase', 'phase%d' % k, 'rad', '%.3f'))
+            for c, label, unit, format in cols:
+                selects.append('%s.%s' % (alias, quote(c)))
+                info.append((label, [label] + section, unit, format))
+    elif fish_type == 'pulse' and peaks0 is not None:
+        peak_info = dict((n, (u, f)) for n, h, u, f in columns_info(con, 'pulsepeaks'))
+        for p in range(peaks0, peaks1+1):
+            alias = 'p%d' % (p - peaks0)
+            joins.append('LEFT JOIN pulsepeaks AS %s ON %s.recording = fish.recording '
+                         'AND %s.fish = fish."index" AND %s."P" = %d' %
+                         (alias, alias, alias, alias, p))
+            section = ['peaks'] if nsecs > 0 and p == peaks0 else []
+            cols = []
+            if p != 1:
+                cols.append(('time', 'P%dtime' % p, 'ms', '%.3f'))
+            cols.append(('amplitude', 'P%dampl' % p) + peak_info.get('amplitude', ('', '%.5f')))
+            if p != 1:
+                cols.append(('relampl', 'P%drelampl' % p, '%', '%.2f'))
+            cols.append(('width', 'P%dwidth' % p, 'ms', '%.3f'))
+            for c, label, unit, format in cols:
+                selects.append('%s.%s' % (alias, quote(c)))
+                info.append((label, [label] + section, unit, format))
+    sql = 'SELECT %s FROM fish %s WHERE fish.type = ?' % (', '.join(selects), ' '.join(joins))
+    if where:
+        sql += ' AND (%s)' % where
+    sql += ' ORDER BY fish.rowid'
+    rows = con.execute(sql, (fish_type,) + tuple(params)).fetchall()
+    con.close()
+    data = make_table(info, rows, columnar)
+    # remove empty columns of harmonics and peaks:
+    empty = [c for c in reversed(range(nfish, len(info)))
+             if all(r[c] is None for r in rows)]
+    data.remove(empty)
+    return data
+
+
+def load_table(db_file, name, recording, index=None, columnar=False):
+    """
+    Load a table of a single fish of a recording.
+
+    Parameters
+    ----------
+    db_file: string
+        Path of the SQLite database file.
+    name: string
+        Name of the table without fish index, e.g. 'eodwaveform'.
+    recording: string
+        Name of the recording.
+    index: int or None
+        Index of the fish.
+    columnar: boolean
+        If True, return a table with numpy arrays as columns.
+
+    Returns
+    -------
+    table: TableData
+        The requested table.
+    """
+    con = sqlite3.connect(db_file, timeout=60.0)
+    info = columns_info(con, name)
+    sql = 'SELECT %s FROM %s WHERE recording = ? AND fish IS ? ORDER BY rowid' % \
+          (', '.join([quote(n) for n, h, u, f in info]), quote(name))
+    rows = con.execute(sql, (recording, index)).fetchall()
+    con.close()
+    return make_table(info, rows, columnar)
+
+
+def recordings(db_file):
+    """
+    Names of all recordings stored in a database.
+
+    Parameters
+    ----------
+    db_file: string
+        Path of the SQLite database file.
+
+    Returns
+    -------
+    recordings: list of strings
+        Names of the recordings in the order they have been added.
+    """
+    con = sqlite3.connect(db_file, timeout=60.0)
+    names = [r[0] for r in con.execute('SELECT recording FROM recordings ORDER BY rowid')]
+    con.close()
+    return names
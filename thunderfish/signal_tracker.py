@@ -4,6 +4,7 @@ import matplotlib.gridspec as gridspec
 import os
 from IPython import embed
 from tqdm import tqdm
+from .trackingindex import get_idx_offsets, get_time_range, get_ident_index, get_ident_median_steps
 
 
 def freq_tracking_v5(fundamentals, signatures, times, freq_tolerance= 10., n_channels=64, max_dt=10., ioi_fti=False,
@@ -98,14 +99,11 @@ def freq_tracking_v5(fundamentals, signatures, times, freq_tolerance= 10., n_cha
 
         """
         # print('clean up')
-        for ident in np.unique(ident_v[~np.isnan(ident_v)]):
-            if np.median(np.abs(np.diff(fund_v[ident_v == ident]))) >= 0.25:
-                ident_v[ident_v == ident] = np.nan
-                continue
-
-            if len(ident_v[ident_v == ident]) <= 10:
-                ident_v[ident_v == ident] = np.nan
-                continue
+        idents, order, ident_offsets = get_ident_index(ident_v)
+        counts = np.diff(ident_offsets)
+        median_steps = get_ident_median_steps(fund_v, order, ident_offsets)
+        remove = (median_steps >= 0.25) | (counts <= 10)
+        ident_v[order[np.repeat(remove, counts)]] = np.nan
 
         return ident_v
 
@@ -471,32 +469,27 @@ def freq_tracking_v5(fundamentals, signatures, times, freq_tolerance= 10., n_cha
 
         return tmp_ident_v_ret, errors_to_v
 
-    def get_a_and_f_error_dist(fund_v, idx_v, sign_v, start_idx, idx_comp_range, freq_lims, freq_tolerance):
+    def get_a_and_f_error_dist(fund_v, idx_offsets, sign_v, start_idx, idx_comp_range, freq_lims, freq_tolerance):
         f_error_distribution = []
         a_error_distribution = []
 
         for i in range(start_idx, int(start_idx + idx_comp_range * 3)):
-            i0_v = np.arange(len(idx_v))[
-                (idx_v == i) & (fund_v >= freq_lims[0]) & (fund_v <= freq_lims[1])]  # indices of fundamtenals to assign
-            i1_v = np.arange(len(idx_v))[
-                (idx_v > i) & (idx_v <= (i + int(idx_comp_range))) & (fund_v >= freq_lims[0]) & (
-                            fund_v <= freq_lims[1])]  # indices of possible targets
+            i0_v = get_time_range(idx_offsets, i, i + 1)  # indices of fundamtenals to assign
+            i0_v = i0_v[(fund_v[i0_v] >= freq_lims[0]) & (fund_v[i0_v] <= freq_lims[1])]
+            i1_v = get_time_range(idx_offsets, i + 1, i + int(idx_comp_range) + 1)  # indices of possible targets
+            i1_v = i1_v[(fund_v[i1_v] >= freq_lims[0]) & (fund_v[i1_v] <= freq_lims[1])]
 
             if len(i0_v) == 0 or len(i1_v) == 0:  # if nothing to assign or no targets continue
                 continue
 
-            for enu0 in range(len(fund_v[i0_v])):
-                if fund_v[i0_v[enu0]] < freq_lims[0] or fund_v[i0_v[enu0]] > freq_lims[1]:
-                    continue
-                for enu1 in range(len(fund_v[i1_v])):
-                    if fund_v[i1_v[enu1]] < freq_lims[0] or fund_v[i1_v[enu1]] > freq_lims[1]:
-                        continue
-                    if np.abs(fund_v[i0_v[enu0]] - fund_v[i1_v[enu1]]) >= freq_tolerance:  # freq difference to high
-                        continue
-                    a_error_distribution.append(np.sqrt(np.sum(
-                        [(sign_v[i0_v[enu0]][k] - sign_v[i1_v[enu1]][k]) ** 2 for k in
-                         range(len(sign_v[i0_v[enu0]]))])))
-                    f_error_distribution.append(np.abs(fund_v[i0_v[enu0]] - fund_v[i1_v[enu1]]))
+            # all pairs within the frequency range and the frequency tolerance:
+            f_error = np.abs(fund_v[i0_v][:, None] - fund_v[i1_v][None, :])
+            valid = f_error < freq_tolerance
+            valid &= ((fund_v[i0_v] >= freq_lims[0]) & (fund_v[i0_v] <= freq_lims[1]))[:, None]
+            valid &= ((fund_v[i1_v] >= freq_lims[0]) & (fund_v[i1_v] <= freq_lims[1]))[None, :]
+            enu0, enu1 = np.nonzero(valid)
+            a_error_distribution.extend(np.sqrt(np.sum((sign_v[i0_v[enu0]] - sign_v[i1_v[enu1]]) ** 2, axis=1)))
+            f_error_distribution.extend(f_error[enu0, enu1])
 
         return np.array(a_error_distribution), np.array(f_error_distribution)
 
@@ -541,11 +534,10 @@ def freq_tracking_v5(fundamentals, signatures, times, freq_tolerance= 10., n_cha
             Citt = np.arange(start_idx, int(start_idx + idx_comp_range * 2))
 
         for i in Citt:
-            i0_v = np.arange(len(idx_v))[
-                (idx_v == i) & (fund_v >= freq_lims[0]) & (fund_v <= freq_lims[1])]  # indices of fundamtenals to assign
-            i1_v = np.arange(len(idx_v))[
-                (idx_v > i) & (idx_v <= (i + int(idx_comp_range))) & (fund_v >= freq_lims[0]) & (
-                            fund_v <= freq_lims[1])]  # indices of possible targets
+            i0_v = get_time_range(idx_offsets, i, i + 1)  # indices of fundamtenals to assign
+            i0_v = i0_v[(fund_v[i0_v] >= freq_lims[0]) & (fund_v[i0_v] <= freq_lims[1])]
+            i1_v = get_time_range(idx_offsets, i + 1, i + int(idx_comp_range) + 1)  # indices of possible targets
+            i1_v = i1_v[(fund_v[i1_v] >= freq_lims[0]) & (fund_v[i1_v] <= freq_lims[1])]
 
             i0_m.append(i0_v)
             i1_m.append(i1_v)
@@ -665,10 +657,11 @@ def freq_tracking_v5(fundamentals, signatures, times, freq_tolerance= 10., n_cha
         return ident_v, next_identity
 
     fund_v, ident_v, idx_v, sign_v, original_sign_v, idx_of_origin_v, idx_comp_range, dps = reshape_data()
+    idx_offsets = get_idx_offsets(idx_v, len(fundamentals))
     start_idx = 0 if not ioi_fti else idx_v[ioi_fti]  # Index Of Interest for temporal identities
 
     a_error_distribution, f_error_distribution = \
-        get_a_and_f_error_dist(fund_v, idx_v, sign_v, start_idx, idx_comp_range, freq_lims,
+        get_a_and_f_error_dist(fund_v, idx_offsets, sign_v, start_idx, idx_comp_range, freq_lims,
                                freq_tolerance=freq_tolerance)
 
     error_cube, i0_m, i1_m, cube_app_idx = create_error_cube(i0_m=None, i1_m=None, error_cube=None, freq_lims=freq_lims,
@@ -690,7 +683,7 @@ def freq_tracking_v5(fundamentals, signatures, times, freq_tolerance= 10., n_cha
 
         if i % idx_comp_range == 0:  # next total sorting step
             a_error_distribution, f_error_distribution = \
-                get_a_and_f_error_dist(fund_v, idx_v, sign_v, start_idx, idx_comp_range, freq_lims, freq_tolerance)
+                get_a_and_f_error_dist(fund_v, idx_offsets, sign_v, start_idx, idx_comp_range, freq_lims, freq_tolerance)
 
             tmp_ident_v, errors_to_v = get_tmp_identities(i0_m, i1_m, error_cube, fund_v, idx_v, i, ioi_fti,
                                                           idx_comp_range)
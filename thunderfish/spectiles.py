@@ -0,0 +1,417 @@
+"""
+# Multi-resolution spectrogram tiles.
+
+Spectrograms of recordings lasting for days are much too large for
+being displayed or even loaded at once. `SpecTilesWriter` stores a
+spectrogram that is computed snippet by snippet as a pyramid of tiles
+on disk, like the tiles of a map:
+
+- Level 0 holds the spectrogram at its full resolution.
+- Each further level reduces the time resolution by a factor of two
+  by taking the maximum power of pairs of neighboring columns. As long
+  as enough frequencies are left, the frequency resolution is reduced
+  in the same way.
+- Each level is split into tiles of a fixed number of columns stored
+  as float32 `.npy` files (`level00/tile000000.npy`, ...).
+- `metadata.json` contains frequency and time axes and the size of each level.
+
+`SpecTiles` reads the tiles back. `SpecTiles.spectrogram()` returns a
+section of the spectrogram from the coarsest level that still resolves
+a requested number of columns. Independent of the zoom level, only a few
+tiles need to be loaded.
+
+```
+with SpecTilesWriter(spectiles_path('data/file.wav')) as tiles:
+    for spec, freqs, times in snippets:
+        tiles.append(spec, freqs, times)
+spec, freqs, times = SpecTiles(spectiles_path('data/file.wav')).spectrogram(100.0, 3600.0)
+```
+
+## Tiles
+- `spectiles_path()`: default path of the tiles of a recording.
+- `check_spectiles()`: check for a directory with spectrogram tiles.
+- `SpecTilesWriter`: write a spectrogram piece by piece into tiles.
+- `SpecTiles`: read sections of a spectrogram from tiles.
+"""
+
+import os
+import json
+import numpy as np
+
+
+def spectiles_path(filepath):
+    """
+    Path of the spectrogram tiles of a recording.
+
+    Parameters
+    ----------
+    filepath: string
+        Path to a data file or directory.
+
+    Returns
+    -------
+    tilespath: string
+        Path of the tiles directory, i.e. `filepath` with '.tiles' appended.
+    """
+    return filepath.rstrip(os.sep) + '.tiles'
+
+
+def check_spectiles(tilespath):
+    """
+    Check for a directory with spectrogram tiles written by `SpecTilesWriter`.
+
+    Parameters
+    ----------
+    tilespath: string
+        Path of the tiles directory.
+
+    Returns
+    -------
+    is_tiles: boolean
+        `True` if `tilespath` contains spectrogram tiles.
+    """
+    return os.path.isfile(os.path.join(tilespath, 'metadata.json'))
+
+
+def tile_file(tilespath, level, index):
+    """
+    Path of a single tile.
+
+    Parameters
+    ----------
+    tilespath: string
+        Path of the tiles directory.
+    level: int
+        Level of the pyramid, 0 is the finest one.
+    index: int
+        Index of the tile within its level.
+
+    Returns
+    -------
+    filepath: string
+        Path of the `.npy` file of the tile.
+    """
+    return os.path.join(tilespath, 'level%02d' % level, 'tile%06d.npy' % index)
+
+
+def max_pool(spec, axis):
+    """
+    Maximum of pairs of neighboring rows or columns.
+
+    Parameters
+    ----------
+    spec: 2-D array
+        Spectrogram.
+    axis: int
+        Axis along which pairs are pooled. If the spectrogram has an odd
+        number of elements along this axis, the last one is kept.
+
+    Returns
+    -------
+    pooled: 2-D array
+        Spectrogram with half the number of elements along `axis`.
+    """
+    return np.maximum.reduceat(spec, np.arange(0, spec.shape[axis], 2), axis=axis)
+
+
+class SpecTilesWriter(object):
+    """
+    Write a spectrogram piece by piece into a pyramid of tiles.
+
+    Parameters
+    ----------
+    tilespath: string
+        Path of the directory receiving the tiles.
+        Existing tiles are overwritten.
+    tile_size: int
+        Number of time bins per tile.
+    min_freqs: int
+        The frequency resolution of a level is only reduced if this
+        leaves at least `min_freqs` frequencies.
+    time_step: float or None
+        Time between successive columns of the spectrogram in seconds.
+        If None, it is taken from the times passed to the first call of `append()`.
+    """
+
+    def __init__(self, tilespath, tile_size=512, min_freqs=256, time_step=None):
+        self.tilespath = tilespath
+        self.tile_size = tile_size
+        self.min_freqs = min_freqs
+        self.time_step = time_step
+        self.time_offset = None
+        self.freqs = None
+        self.levels = []
+        metadatafile = os.path.join(tilespath, 'metadata.json')
+        if os.path.isfile(metadatafile):
+            os.remove(metadatafile)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, ex_type, ex_value, tb):
+        if ex_value is None:
+            self.close()
+        return (ex_value is None)
+
+    def append(self, spec, freqs, times):
+        """
+        Append columns to the spectrogram.
+
+        Parameters
+        ----------
+        spec: 2-D array
+            Power spectral densities with frequencies as first and
+            time as second dimension. The columns need to continue
+            the previously appended ones without gap.
+        freqs: 1-D array
+            Equally spaced frequencies of the rows of `spec`.
+            Needs to be the same for all calls.
+        times: 1-D array
+            Times of the columns of `spec` in seconds.
+        """
+        if spec.shape[1] == 0:
+            return
+        if self.freqs is None:
+            self.freqs = np.asarray(freqs)
+            self.time_offset = float(times[0])
+        if self.time_step is None:
+            columns = self.levels[0]['columns'] if len(self.levels) > 0 else 0
+            if columns + len(times) > 1:
+                self.time_step = float(times[-1] - self.time_offset)/(columns + len(times) - 1)
+        self._append(0, np.asarray(spec, dtype=np.float32))
+
+    def _append(self, level, spec):
+        if level >= len(self.levels):
+            freq_factor = 1
+            if level > 0:
+                prev = self.levels[level - 1]
+                freq_factor = prev['freq_factor']
+                if prev['nfreqs'] >= 2*self.min_freqs:
+                    freq_factor *= 2
+            leveldir = os.path.dirname(tile_file(self.tilespath, level, 0))
+            if not os.path.isdir(leveldir):
+                os.makedirs(leveldir)
+            self.levels.append(dict(columns=0, tiles=0, nfreqs=spec.shape[0],
+                                    freq_factor=freq_factor, buffer=spec[:, :0],
+                                    carry=spec[:, :0]))
+        lev = self.levels[level]
+        lev['columns'] += spec.shape[1]
+        # write full tiles:
+        lev['buffer'] = np.concatenate((lev['buffer'], spec), axis=1)
+        while lev['buffer'].shape[1] >= self.tile_size:
+            np.save(tile_file(self.tilespath, level, lev['tiles']),
+                    lev['buffer'][:, :self.tile_size])
+            lev['tiles'] += 1
+            lev['buffer'] = lev['buffer'][:, self.tile_size:]
+        # pass pairs of columns on to the next level:
+        lev['carry'] = np.concatenate((lev['carry'], spec), axis=1)
+        n = 2*(lev['carry'].shape[1]//2)
+        if n > 0:
+            pooled = self._pool(lev, lev['carry'][:, :n])
+            lev['carry'] = lev['carry'][:, n:]
+            self._append(level + 1, pooled)
+
+    def _pool(self, lev, spec):
+        spec = max_pool(spec, 1)
+        if lev['nfreqs'] >= 2*self.min_freqs:
+            spec = max_pool(spec, 0)
+        return spec
+
+    def state(self):
+        """
+        State of the writer needed to continue writing the tiles.
+
+        Together with the tiles already written to disk, the state
+        allows another writer to continue an interrupted spectrogram
+        via `restore()`, for example after loading a checkpoint.
+
+        Returns
+        -------
+        state: dict
+            Path, parameters, axes, and the columns of each level
+            not yet written to a tile.
+        """
+        return dict(tilespath=self.tilespath, tile_size=self.tile_size,
+                    min_freqs=self.min_freqs, time_step=self.time_step,
+                    time_offset=self.time_offset, freqs=self.freqs,
+                    levels=[dict(lev) for lev in self.levels])
+
+    def restore(self, state):
+        """
+        Continue writing the tiles from a state returned by `state()`.
+
+        Tiles written after the state was taken are overwritten.
+
+        Parameters
+        ----------
+        state: dict
+            The state of a writer as returned by `state()`.
+
+        Raises
+        ------
+        ValueError:
+            The state belongs to tiles in another directory.
+        """
+        if state['tilespath'] != self.tilespath:
+            raise ValueError('state of tiles in %s cannot be restored to %s' %
+                             (state['tilespath'], self.tilespath))
+        self.tile_size = state['tile_size']
+        self.min_freqs = state['min_freqs']
+        self.time_step = state['time_step']
+        self.time_offset = state['time_offset']
+        self.freqs = state['freqs']
+        self.levels = [dict(lev) for lev in state['levels']]
+
+    def close(self):
+        """
+        Write the remaining columns of all levels and the metadata.
+
+        Levels above the first one that fits into a single tile are discarded.
+        """
+        if self.freqs is None:
+            return
+        if self.time_step is None:
+            self.time_step = 1.0
+        level = 0
+        while level < len(self.levels):
+            lev = self.levels[level]
+            if lev['columns'] <= self.tile_size or level + 1 == len(self.levels):
+                break
+            if lev['carry'].shape[1] > 0:
+                self._append(level + 1, self._pool(lev, lev['carry']))
+                lev['carry'] = lev['carry'][:, :0]
+            level += 1
+        top = level
+        for level, lev in enumerate(self.levels[:top + 1]):
+            if lev['buffer'].shape[1] > 0:
+                np.save(tile_file(self.tilespath, level, lev['tiles']), lev['buffer'])
+                lev['tiles'] += 1
+                lev['buffer'] = lev['buffer'][:, :0]
+        metadata = dict(freq_offset=float(self.freqs[0]),
+                        freq_step=float(self.freqs[1] - self.freqs[0]),
+                        nfreqs=len(self.freqs),
+                        time_offset=self.time_offset, time_step=self.time_step,
+                        tile_size=self.tile_size,
+                        levels=[dict(columns=lev['columns'], tiles=lev['tiles'],
+                                     nfreqs=lev['nfreqs'],
+                                     freq_factor=lev['freq_factor'],
+                                     time_factor=2**level)
+                                for level, lev in enumerate(self.levels[:top + 1])])
+        with open(os.path.join(self.tilespath, 'metadata.json'), 'w') as df:
+            json.dump(metadata, df, indent=2)
+        self.levels = []
+        self.freqs = None
+
+
+class SpecTiles(object):
+    """
+    Read sections of a spectrogram from a pyramid of tiles.
+
+    Parameters
+    ----------
+    tilespath: string
+        Path of the directory with the tiles written by `SpecTilesWriter`.
+
+    Raises
+    ------
+    ValueError:
+        `tilespath` does not contain spectrogram tiles.
+    """
+
+    def __init__(self, tilespath):
+        if not check_spectiles(tilespath):
+            raise ValueError('no spectrogram tiles in %s' % tilespath)
+        self.tilespath = tilespath
+        with open(os.path.join(tilespath, 'metadata.json')) as sf:
+            self.metadata = json.load(sf)
+        self.levels = self.metadata['levels']
+        self.tile_size = self.metadata['tile_size']
+        self.tiles = {}
+
+    def freqs(self, level):
+        """
+        Frequencies of the rows of a level in Hertz.
+        """
+        lev = self.levels[level]
+        ff = lev['freq_factor']
+        return self.metadata['freq_offset'] + \
+            (np.arange(lev['nfreqs'])*ff + 0.5*(ff - 1))*self.metadata['freq_step']
+
+    def times(self, level, indices):
+        """
+        Times of the centers of columns of a level in seconds.
+        """
+        tf = self.levels[level]['time_factor']
+        return self.metadata['time_offset'] + \
+            (np.asarray(indices)*tf + 0.5*(tf - 1))*self.metadata['time_step']
+
+    def level(self, t0, t1, max_columns):
+        """
+        The finest level resolving a time range with at most `max_columns` columns.
+        """
+        for level, lev in enumerate(self.levels):
+            if (t1 - t0)/(lev['time_factor']*self.metadata['time_step']) <= max_columns:
+                return level
+        return len(self.levels) - 1
+
+    def _tile(self, level, index):
+        key = (level, index)
+        if not key in self.tiles:
+            self.tiles[key] = np.load(tile_file(self.tilespath, level, index), mmap_mode='r')
+        return self.tiles[key]
+
+    def spectrogram(self, t0, t1, f0=None, f1=None, max_columns=2000, level=None):
+        """
+        Section of the spectrogram.
+
+        Parameters
+        ----------
+        t0: float
+            Start time of the section in seconds.
+        t1: float
+            End time of the section in seconds.
+        f0: float or None
+            Minimum frequency of the section in Hertz.
+        f1: float or None
+            Maximum frequency of the section in Hertz.
+        max_columns: int
+            Return the section from the finest level that has at most
+            this many columns between `t0` and `t1`.
+        level: int or None
+            If not None, return the section from this level instead.
+
+        Returns
+        -------
+        spec: 2-D array
+            The maximum power spectral densities within the bins of the
+            selected level, frequencies as first and time as second dimension.
+        freqs: 1-D array
+            Frequencies of the rows of `spec` in Hertz.
+        times: 1-D array
+            Times of the columns of `spec` in seconds.
+        """
+        if level is None:
+            level = self.level(t0, t1, max_columns)
+        lev = self.levels[level]
+        step = lev['time_factor']*self.metadata['time_step']
+        offs = self.times(level, 0)
+        j0 = max(0, int(np.ceil((t0 - offs)/step)))
+        j1 = min(lev['columns'], int(np.floor((t1 - offs)/step)) + 1)
+        freqs = self.freqs(level)
+        fmask = np.ones(len(freqs), dtype=bool)
+        if f0 is not None:
+            fmask &= freqs >= f0
+        if f1 is not None:
+            fmask &= freqs <= f1
+        findices = np.flatnonzero(fmask)
+        if j1 <= j0 or len(findices) == 0:
+            return np.zeros((len(findices), 0), dtype=np.float32), \
+                freqs[findices], np.zeros(0)
+        i0, i1 = findices[0], findices[-1] + 1
+        parts = []
+        for k in range(j0//self.tile_size, (j1 - 1)//self.tile_size + 1):
+            k0 = max(j0 - k*self.tile_size, 0)
+            k1 = min(j1 - k*self.tile_size, self.tile_size)
+            parts.append(self._tile(level, k)[i0:i1, k0:k1])
+        spec = np.concatenate(parts, axis=1)
+        return spec, freqs[i0:i1], self.times(level, np.arange(j0, j1))
@@ -5,8 +5,16 @@ Provides `class TableData` for tables with a rich hierarchical header
 including units and formats. Kind of similar to a pandas data frame, but
 with intuitive numpy-style indexing and nicely formatted output to csv, html, and latex.
 
+`class TableWriter` writes a table row by row to a file, without
+holding the data in memory.
+
+`class ArrayColumn` is a list-like column backed by a numpy array
+that is used by TableData for storing data in a columnar way.
+
 ## helper functions
 - `write()`: shortcut for constructing and writing a TableData.
+- `write_bundle()`: write several tables into a single binary numpy file.
+- `load_bundle()`: load tables from a binary file written by `write_bundle()`.
 - `latex_unit()`: translate unit string into SIunit LaTeX code.
 - `index2aa()`: convert an integer into an alphabetical representation.
 - `aa2index()`: convert an alphabetical representation to an index.
@@ -19,6 +27,7 @@ with intuitive numpy-style indexing and nicely formatted output to csv, html, an
 import sys
 import os
 import re
+import json
 import math as m
 import numpy as np
 if sys.version_info[0] < 3:
@@ -131,7 +140,8 @@ class TableData:
     - `__len__()`: the number of columns.
     - `__iter__()`: initialize iteration over data columns.
     - `__next__()`: return data of next column as a list.
-    - `data`: the table data as a list over columns each containing a list of data elements.
+    - `data`: the table data as a list over columns each containing a list of data elements
+      (or an `ArrayColumn` for tables constructed with `columnar=True`).
 
     For example:
     ```
@@ -248,6 +258,18 @@ class TableData:
     count         3.00            2         3            3.0  3.00e+00
     ```
 
+    ## Columnar storage
+
+    By default, the data of each column are stored in a python list.
+    For large tables construct the TableData with `columnar=True`:
+    ```
+    df = TableData(header=['aaa', 'bbb'], columnar=True)
+    ```
+    Then the data of each column are stored in a typed numpy array
+    (`ArrayColumn`). Appending data is amortized O(1), slicing a
+    column returns a view on the data without copying, and indexing,
+    `sort()`, and `statistics()` are vectorized.
+
     ## Write and load tables
 
     Table data can be written to a variety of text-based formats
@@ -277,7 +299,7 @@ class TableData:
     ext_formats = {'dat': 'dat', 'DAT': 'dat', 'txt': 'dat', 'TXT': 'dat', 'csv': 'csv', 'CSV': 'csv', 'md': 'md', 'MD': 'md', 'tex': 'tex', 'TEX': 'tex', 'html': 'html', 'HTML': 'html'}
 
     def __init__(self, data=None, header=None, units=None, formats=None,
-                 missing='-'):
+                 missing='-', columnar=False):
         """
         Initialize a TableData from data or a file.
 
@@ -297,7 +319,12 @@ class TableData:
             given, then all columns are initialized with this format string.
         missing: string
             Missing data are indicated by this string.
+        columnar: boolean
+            If True, store the data of each column in a typed numpy array
+            (see `ArrayColumn`) instead of a python list.
+            This is much faster and needs much less memory for large tables.
         """
+        self.columnar = columnar
         self.data = []
         self.shape = (0, 0)
         self.header = []
@@ -329,11 +356,14 @@ class TableData:
                     self.units.append(data.units[c])
                     self.formats.append(data.formats[c])
                     self.hidden.append(data.hidden[c])
-                    self.data.append([])
-                    for d in data.data[c]:
-                        self.data[c].append(d)
+                    self.data.append(self.__new_column())
+                    self.data[c].extend(data.data[c])
             elif isinstance(data, (list, tuple, np.ndarray)):
-                if isinstance(data[0], (list, tuple, np.ndarray)):
+                if isinstance(data, np.ndarray) and data.ndim == 2:
+                    # 2D array, rows first:
+                    for c in range(data.shape[1]):
+                        self.data[c].extend(data[:,c])
+                elif isinstance(data[0], (list, tuple, np.ndarray)):
                     # 2D list, rows first:
                     for row in data:
                         for c, val in enumerate(row):
@@ -344,6 +374,15 @@ class TableData:
                         self.data[c].append(val)
             else:
                 self.load(data, missing)
+            self.shape = (self.rows(), self.columns())
+
+    def __new_column(self):
+        """
+        A new empty data column, either a list or an ArrayColumn.
+        """
+        if self.columnar:
+            return ArrayColumn()
+        return []
         
     def append(self, label, unit, formats=None, value=None, key=None, fac=None):
         """
@@ -381,7 +420,7 @@ class TableData:
             self.formats.append(formats or '%g')
             self.units.append(unit)
             self.hidden.append(False)
-            self.data.append([])
+            self.data.append(self.__new_column())
             if self.nsecs < len(self.header[-1])-1:
                 self.nsecs = len(self.header[-1])-1
         else:
@@ -401,8 +440,11 @@ class TableData:
             else:
                 self.data[-1].append(value)
         if fac:
-            for k in range(len(self.data[-1])):
-                self.data[-1][k] *= fac
+            if isinstance(self.data[-1], ArrayColumn):
+                self.data[-1][:] = np.asarray(self.data[-1])*fac
+            else:
+                for k in range(len(self.data[-1])):
+                    self.data[-1][k] *= fac
         self.addcol = len(self.data)
         self.shape = (self.rows(), self.columns())
         return self.addcol-1
@@ -449,7 +491,7 @@ class TableData:
         self.formats.insert(col, formats or '%g')
         self.units.insert(col, unit)
         self.hidden.insert(col, False)
-        self.data.insert(col, [])
+        self.data.insert(col, self.__new_column())
         if self.nsecs < len(self.header[col])-1:
             self.nsecs = len(self.header[col])-1
         if value is not None:
@@ -573,7 +615,7 @@ class TableData:
             self.units.append('')
             self.formats.append('')
             self.hidden.append(False)
-            self.data.append([])
+            self.data.append(self.__new_column())
         else:
             if isinstance(label, (list, tuple, np.ndarray)):
                 self.header[self.addcol] = list(reversed(label)) + self.header[self.addcol]
@@ -1117,11 +1159,13 @@ class TableData:
             elif isinstance(rows, slice):
                 return np.asarray(self.data[cols[0]][rows])
             elif isinstance(rows, (list, tuple, np.ndarray)):
+                if isinstance(self.data[cols[0]], ArrayColumn):
+                    return self.data[cols[0]][np.asarray(rows, dtype=int)]
                 return np.asarray([self.data[cols[0]][r] for r in rows])
             else:
                 return self.data[cols[0]][rows]
         else:
-            data = TableData()
+            data = TableData(columnar=self.columnar)
             sec_indices = [-1] * self.nsecs
             for c in cols:
                 data.append(*self.column_head(c))
@@ -1133,8 +1177,11 @@ class TableData:
                 if rows is None:
                     continue
                 if isinstance(rows, (list, tuple, np.ndarray)):
-                    for r in rows:
-                        data.data[-1].append(self.data[c][r])
+                    if isinstance(self.data[c], ArrayColumn):
+                        data.data[-1].extend(self.data[c][np.asarray(rows, dtype=int)])
+                    else:
+                        for r in rows:
+                            data.data[-1].append(self.data[c][r])
                 else:
                     if isinstance(self.data[c][rows], (list, tuple, np.ndarray)):
                         data.data[-1].extend(self.data[c][rows])
@@ -1175,6 +1222,8 @@ class TableData:
                 if isinstance(rows, (list, tuple, np.ndarray)):
                     if len(rows) == 1:
                         self.data[cols[0]][rows[0]] = value
+                    elif isinstance(self.data[cols[0]], ArrayColumn):
+                        self.data[cols[0]][np.asarray(rows, dtype=int)] = value
                     else:
                         for k, r in enumerate(rows):
                             self.data[cols[0]][r] = value[k]
@@ -1242,7 +1291,7 @@ class TableData:
             If a row is specified, a 1D array of that row.
         """
         if row is None:
-            return np.array(self.data).T
+            return np.array([np.asarray(d) for d in self.data]).T
         else:
             return np.array([d[row] for d in self.data])
 
@@ -1270,7 +1319,12 @@ class TableData:
         if column is None:
             column = self.setcol
         if isinstance(data, (list, tuple, np.ndarray)):
-            if isinstance(data[0], (list, tuple, np.ndarray)):
+            if isinstance(data, np.ndarray) and data.ndim == 2:
+                # 2D array, rows first:
+                for i in range(data.shape[1]):
+                    self.data[column+i].extend(data[:,i])
+                self.setcol = column + data.shape[1]
+            elif isinstance(data[0], (list, tuple, np.ndarray)):
                 # 2D list, rows first:
                 for row in data:
                     for i, val in enumerate(row):
@@ -1346,8 +1400,8 @@ class TableData:
         maxr = self.rows()
         # fill up:
         for c in range(len(self.data)):
-            while len(self.data[c]) < maxr:
-                self.data[c].append(float('NaN'))
+            if len(self.data[c]) < maxr:
+                self.data[c].extend([float('NaN')]*(maxr-len(self.data[c])))
         self.setcol = 0
         self.shape = (self.rows(), self.columns())
 
@@ -1356,7 +1410,7 @@ class TableData:
         Clear content of the table but keep header.
         """
         for c in range(len(self.data)):
-            self.data[c] = []
+            self.data[c] = self.__new_column()
         self.setcol = 0
         self.shape = (self.rows(), self.columns())
                 
@@ -1392,13 +1446,29 @@ class TableData:
                 continue
             cols.append(c)
         # get sorted row indices:
-        row_inx = range(self.rows())
-        row_inx = sorted(row_inx, key=lambda x : [float('-inf') if self.data[c][x] is np.nan \
-                         or self.data[c][x] != self.data[c][x] \
-                         else self.data[c][x] for c in cols], reverse=reverse)
+        keys = []
+        for c in reversed(cols):
+            a = np.asarray(self.data[c])
+            if a.dtype.kind not in 'biuf':
+                keys = None
+                break
+            a = a.astype(float)
+            a[np.isnan(a)] = float('-inf')
+            keys.append(-a if reverse else a)
+        if keys is not None:
+            # numerical columns only:
+            row_inx = np.lexsort(keys)
+        else:
+            row_inx = range(self.rows())
+            row_inx = sorted(row_inx, key=lambda x : [float('-inf') if self.data[c][x] is np.nan \
+                             or self.data[c][x] != self.data[c][x] \
+                             else self.data[c][x] for c in cols], reverse=reverse)
         # sort table according to indices:
         for c in range(self.columns()):
-            self.data[c] = [self.data[c][r] for r in row_inx]
+            if isinstance(self.data[c], ArrayColumn):
+                self.data[c][:] = np.asarray(self.data[c])[row_inx]
+            else:
+                self.data[c] = [self.data[c][r] for r in row_inx]
 
     def statistics(self):
         """
@@ -1420,38 +1490,41 @@ class TableData:
         ds.append_data('quartile3', 0)
         ds.append_data('max', 0)
         ds.append_data('count', 0)
-        dc = 1
+        # numerical columns:
+        num_cols = []
         for c in range(self.columns()):
             if len(self.data[c]) > 0 and isinstance(self.data[c][0], (float, int)):
-                ds.hidden.append(False)
-                ds.header.append(self.header[c])
-                ds.units.append(self.units[c])
-                # integer data still make floating point statistics:
-                if isinstance(self.data[c][0], float):
-                    f = self.formats[c]
-                    i0 = f.find('.')
-                    if i0 > 0:
-                        p = int(f[i0+1:-1])
-                        if p <= 0:
-                            f = '%.1f'
-                    ds.formats.append(f)
-                else:
-                    ds.formats.append('%.1f')
-                # remove nans:
-                data = np.asarray(self.data[c], np.float)
-                data = data[np.isfinite(data)]
-                # compute statistics:
-                ds.data.append([])
-                ds.append_data(np.mean(data), dc)
-                ds.append_data(np.std(data), dc)
-                ds.append_data(np.min(data), dc)
-                q1, m, q3 = np.percentile(data, [25., 50., 75.])
-                ds.append_data(q1, dc)
-                ds.append_data(m, dc)
-                ds.append_data(q3, dc)
-                ds.append_data(np.max(data), dc)
-                ds.append_data(len(data), dc)
-                dc += 1
+                num_cols.append(c)
+        # compute statistics for all columns at once:
+        data = np.zeros((self.rows(), len(num_cols))) + np.nan
+        for k, c in enumerate(num_cols):
+            data[:len(self.data[c]),k] = np.asarray(self.data[c], float)
+        data[~np.isfinite(data)] = np.nan
+        stats = np.zeros((8, len(num_cols)))
+        if len(num_cols) > 0:
+            stats[0] = np.nanmean(data, axis=0)
+            stats[1] = np.nanstd(data, axis=0)
+            stats[2] = np.nanmin(data, axis=0)
+            stats[3:6] = np.nanpercentile(data, [25., 50., 75.], axis=0)
+            stats[6] = np.nanmax(data, axis=0)
+            stats[7] = np.sum(np.isfinite(data), axis=0)
+        for k, c in enumerate(num_cols):
+            ds.hidden.append(False)
+            ds.header.append(self.header[c])
+            ds.units.append(self.units[c])
+            # integer data still make floating point statistics:
+            if isinstance(self.data[c][0], float):
+                f = self.formats[c]
+                i0 = f.find('.')
+                if i0 > 0:
+                    p = int(f[i0+1:-1])
+                    if p <= 0:
+                        f = '%.1f'
+                ds.formats.append(f)
+            else:
+                ds.formats.append('%.1f')
+            ds.data.append(stats[:,k].tolist())
+            ds.data[-1][-1] = int(stats[-1,k])
         ds.nsecs = self.nsecs
         ds.shape = (ds.rows(), ds.columns())
         return ds
@@ -1529,6 +1602,11 @@ class TableData:
         """
         for c in range(len(self.data)):
             # check for empty column:
+            if isinstance(self.data[c], ArrayColumn) and \
+               np.asarray(self.data[c]).dtype.kind in 'biuf':
+                if np.all(np.isnan(np.asarray(self.data[c], float))):
+                    self.hidden[c] = True
+                continue
             isempty = True
             for v in self.data[c]:
                 if isinstance(v, float):
@@ -1732,719 +1810,261 @@ class TableData:
           </table>
           ```
         """
-        # fix parameter:
-        if table_format == 'auto':
-            table_format =None
-        if delimiter == 'auto':
-            delimiter=None
-        if unit_style == 'auto':
-            unit_style=None
-        if column_numbers == 'none':
-            column_numbers=None
-        if sections == 'auto':
-            sections=None
-        if align_columns == 'auto':
-            align_columns=None
+        writer = TableWriter(fh, self, table_format, delimiter, unit_style,
+                             column_numbers, sections, align_columns,
+                             shrink_width, missing, center_columns,
+                             latex_label_command, latex_merge_std)
+        writer.write_rows(self)
+        writer.close()
+        return writer.file_name
+
+
+            
+    def __str__(self):
+        """
+        Write table to a string.
+        """
+        stream = StringIO()
+        self.write(stream, table_format='out')
+        return stream.getvalue()
+                
+
+    def load(self, fh, missing='-'):
+        """
+        Load table from file or stream.
+
+        File type and properties are automatically inferred.
+        The data of 'dat', 'csv', and 'rtai' tables are converted
+        column-wise in chunks of lines, all other formats are
+        parsed line by line.
+
+        Parameters
+        ----------
+        fh: filename or stream
+            If not a stream, the file with name `fh` is opened for reading.
+        missing: string
+            Missing data are indicated by this string.
+        """
+
+        def read_key_line(line, sep, table_format):
+            if sep is None:
+                cols, indices = zip(*[(m.group(0), m.start()) for m in re.finditer(r'( ?[\S]+)+(?=[ ][ ]+|\Z)', line.strip())])
+            elif table_format == 'csv':
+                cols, indices = zip(*[(c.strip(), i) for i, c in enumerate(line.strip().split(sep)) if c.strip()])
+                return cols, indices
+            else:
+                seps = r'[^'+re.escape(sep)+']+'
+                cols, indices = zip(*[(m.group(0), m.start()) for m in re.finditer(seps, line.strip())])
+            colss = []
+            indicess = []
+            if table_format == 'tex':
+                i = 0
+                for c in cols:
+                    if 'multicolumn' in c:
+                        fields = c.split('{')
+                        n = int(fields[1].strip().rstrip('}').rstrip())
+                        colss.append(fields[3].strip().rstrip('}').rstrip())
+                        indicess.append(i)
+                        i += n
+                    else:
+                        colss.append(c.strip())
+                        indicess.append(i)
+                        i += 1
+            else:
+                for k, (c, i) in enumerate(zip(cols, indices)):
+                    if k == 0:
+                        c = c.lstrip('|')
+                    if k == len(cols)-1:
+                        c = c.rstrip('|')
+                    cs = c.strip()
+                    colss.append(cs)
+                    indicess.append(i)
+            return colss, indicess
+
+        def read_data_cell(c, k, post, precd, alld, numc, exped, fixed, strf, missing):
+            try:
+                v = float(c)
+                ad = 0
+                ve = c.split('e')
+                if len(ve) <= 1:
+                    exped[k] = False
+                else:
+                    ad = len(ve[1])+1
+                vc = ve[0].split('.')
+                ad += len(vc[0])
+                prec = len(vc[0].lstrip('-').lstrip('+').lstrip('0')) 
+                if len(vc) == 2:
+                    if numc[k] and post[k] != len(vc[1]):
+                        fixed[k] = False
+                    if post[k] < len(vc[1]):
+                        post[k] = len(vc[1])
+                    ad += len(vc[1])+1
+                    prec += len(vc[1].rstrip('0'))
+                if precd[k] < prec:
+                    precd[k] = prec
+                if alld[k] < ad:
+                    alld[k] = ad
+                numc[k] = True
+            except ValueError:
+                if c == missing:
+                    v = float('NaN')
+                else:
+                    strf[k] = True
+                    if alld[k] < len(c):
+                        alld[k] = len(c)
+                    v = c
+            return v
+
+        def read_data_line(line, sep, post, precd, alld, numc, exped, fixed, strf, missing):
+            # read line:
+            cols = []
+            if sep is None:
+                cols = [m.group(0) for m in re.finditer(r'\S+', line.strip())]
+            else:
+                seps = r'[^'+re.escape(sep)+']+'
+                cols = [m.group(0).strip() for m in re.finditer(seps, line.strip())]
+                cols[0] = cols[0].lstrip('|').lstrip()
+                cols[-1] = cols[-1].rstrip('|').rstrip()
+            cols = [c for c in cols if c not in '|']
+            # read columns:
+            for k, c in enumerate(cols):
+                v = read_data_cell(c.strip(), k, post, precd, alld, numc,
+                                   exped, fixed, strf, missing)
+                self.append_data(v, k)
+
+        def read_data_chunk(lines, sep, colnum, post, precd, alld, numc, exped, fixed, strf, missing):
+            # split lines into cells:
+            if sep is None:
+                rows = [line.split() for line in lines if line.strip()]
+            else:
+                split_sep = re.compile(r'\s*' + re.escape(sep) + r'\s*')
+                rows = [split_sep.split(line.strip().lstrip('|').rstrip('|').strip())
+                        for line in lines if line.strip()]
+            if not rows:
+                return True
+            if any(len(row) != colnum for row in rows):
+                return False
+            cells = np.array(rows, dtype=str)
+            if np.any(cells == '') or np.any(cells == '|'):
+                return False
+            # convert columns:
+            for k in range(colnum):
+                col = cells[:,k]
+                miss = col == missing
+                try:
+                    values = np.where(miss, 'nan', col).astype(float)
+                except ValueError:
+                    # column with strings:
+                    self.data[k].extend([read_data_cell(c, k, post, precd, alld, numc,
+                                                        exped, fixed, strf, missing)
+                                         for c in col])
+                    continue
+                # formats of the numbers:
+                nums = col[~miss]
+                if len(nums) > 0:
+                    # characters of the numbers as code points:
+                    chars = np.ascontiguousarray(nums).view(np.uint32).reshape(len(nums), -1)
+                    pos = np.arange(chars.shape[1])
+                    lens = np.sum(chars != 0, axis=1)
+                    alld[k] = max(alld[k], np.max(lens))
+                    # exponent:
+                    ise = chars == ord('e')
+                    hase = np.any(ise, axis=1)
+                    if not np.all(hase):
+                        exped[k] = False
+                    mant = np.where(hase, np.argmax(ise, axis=1), lens)
+                    # decimals:
+                    isdot = (chars == ord('.')) & (pos < mant[:,None])
+                    dot = np.any(isdot, axis=1)
+                    dpos = np.where(dot, np.argmax(isdot, axis=1), mant)
+                    npost = np.where(dot, mant - dpos - 1, 0)
+                    # significant digits before the decimal point:
+                    sign = (chars[:,0] == ord('-')) | (chars[:,0] == ord('+'))
+                    zeros = (chars == ord('0')) | (pos < sign[:,None])
+                    prec = dpos - np.sum(np.cumprod(zeros, axis=1), axis=1)
+                    # significant digits after the decimal point:
+                    sig = (chars != ord('0')) & (pos > dpos[:,None]) & (pos < mant[:,None])
+                    last = pos[-1] - np.argmax(sig[:,::-1], axis=1)
+                    prec += np.where(np.any(sig, axis=1), last - dpos, 0)
+                    precd[k] = max(precd[k], np.max(prec))
+                    # maximum number of decimals preceding each number:
+                    prev_post = np.maximum.accumulate(np.concatenate(([post[k]], npost)))
+                    # numbers with decimals differing from preceding ones:
+                    prev_num = np.ones(len(nums), dtype=bool)
+                    prev_num[0] = numc[k]
+                    if np.any(dot & prev_num & (npost != prev_post[:-1])):
+                        fixed[k] = False
+                    post[k] = prev_post[-1]
+                    numc[k] = True
+                if isinstance(self.data[k], ArrayColumn):
+                    self.data[k].extend(values)
+                else:
+                    self.data[k].extend(values.tolist())
+            self.setcol = colnum
+            return True
+
+        # initialize:
+        self.data = []
+        self.shape = (0, 0)
+        self.header = []
+        self.nsecs = 0
+        self.units = []
+        self.formats = []
+        self.hidden = []
+        self.setcol = 0
+        self.addcol = 0
         # open file:
         own_file = False
-        file_name = None
-        if not hasattr(fh, 'write'):
-            _, ext = os.path.splitext(fh)
-            if table_format is None:
-                if len(ext) > 1:
-                    table_format = self.ext_formats[ext[1:]]
-            elif not ext:
-                fh += '.' + self.extensions[table_format]
-            file_name = fh
-            fh = open(fh, 'w')
+        if not hasattr(fh, 'readline'):
+            fh = open(fh, 'r')
             own_file = True
-        if table_format is None:
-            table_format = 'dat'
-        # set style:        
-        if table_format[0] == 'd':
-            align_columns = True
-            begin_str = ''
-            end_str = ''
-            header_start = '# '
-            header_sep = '  '
-            header_close = ''
-            header_end = '\n'
-            data_start = '  '
-            data_sep = '  '
-            data_close = ''
-            data_end = '\n'
-            top_line = False
-            header_line = False
-            bottom_line = False
-            if delimiter is not None:
-                header_sep = delimiter
-                data_sep = delimiter
-            if sections is None:
-                sections = 1000
-        elif table_format[0] == 'a':
-            align_columns = True
-            begin_str = ''
-            end_str = ''
-            header_start = '| '
-            header_sep = ' | '
-            header_close = ''
-            header_end = ' |\n'
-            data_start = '| '
-            data_sep = ' | '
-            data_close = ''
-            data_end = ' |\n'
-            top_line = True
-            header_line = True
-            bottom_line = True
-            if delimiter is not None:
-                header_sep = delimiter
-                data_sep = delimiter
-            if sections is None:
-                sections = 1000
-        elif table_format[0] == 'c':
-            # csv according to http://www.ietf.org/rfc/rfc4180.txt :
-            column_numbers=None
-            if unit_style is None:
-                unit_style = 'header'
-            if align_columns is None:
-                align_columns = False
-            begin_str = ''
-            end_str = ''
-            header_start=''
-            header_sep = ','
-            header_close = ''
-            header_end='\n'
-            data_start=''
-            data_sep = ','
-            data_close = ''
-            data_end='\n'
-            top_line = False
-            header_line = False
-            bottom_line = False
-            if delimiter is not None:
-                header_sep = delimiter
-                data_sep = delimiter
-            if sections is None:
-                sections = 0
-        elif table_format[0] == 'r':
-            align_columns = True
-            begin_str = ''
-            end_str = ''
-            header_start = 'RTH| '
-            header_sep = '| '
-            header_close = ''
-            header_end = '\n'
-            data_start = 'RTD| '
-            data_sep = '| '
-            data_close = ''
-            data_end = '\n'
-            top_line = False
-            header_line = False
-            bottom_line = False
-            if sections is None:
-                sections = 1000
-        elif table_format[0] == 'm':
-            if unit_style is None or unit_style == 'row':
-                unit_style = 'header'
-            align_columns = True
-            begin_str = ''
-            end_str = ''
-            header_start='| '
-            header_sep = ' | '
-            header_close = ''
-            header_end=' |\n'
-            data_start='| '
-            data_sep = ' | '
-            data_close = ''
-            data_end=' |\n'
-            top_line = False
-            header_line = True
-            bottom_line = False
-            if sections is None:
-                sections = 0
-        elif table_format[0] == 'h':
-            align_columns = False
-            begin_str = '<table>\n<thead>\n'
-            end_str = '</tbody>\n</table>\n'
-            if center_columns:
-                header_start='  <tr>\n    <th align="center"'
-                header_sep = '</th>\n    <th align="center"'
-            else:
-                header_start='  <tr>\n    <th align="left"'
-                header_sep = '</th>\n    <th align="left"'
-            header_close = '>'
-            header_end='</th>\n  </tr>\n'
-            data_start='  <tr>\n    <td'
-            data_sep = '</td>\n    <td'
-            data_close = '>'
-            data_end='</td>\n  </tr>\n'
-            top_line = False
-            header_line = False
-            bottom_line = False
-            if sections is None:
-                sections = 1000
-        elif table_format[0] == 't':
-            if align_columns is None:
-                align_columns = False
-            begin_str = '\\begin{tabular}'
-            end_str = '\\end{tabular}\n'
-            header_start='  '
-            header_sep = ' & '
-            header_close = ''
-            header_end=' \\\\\n'
-            data_start='  '
-            data_sep = ' & '
-            data_close = ''
-            data_end=' \\\\\n'
-            top_line = True
-            header_line = True
-            bottom_line = True
-            if sections is None:
-                sections = 1000
-        else:
-            if align_columns is None:
-                align_columns = True
-            begin_str = ''
-            end_str = ''
-            header_start = ''
-            header_sep = '  '
-            header_close = ''
-            header_end = '\n'
-            data_start = ''
-            data_sep = '  '
-            data_close = ''
-            data_end = '\n'
-            top_line = False
-            header_line = False
-            bottom_line = False
-            if sections is None:
-                sections = 1000
-        # check units:
-        if unit_style is None:
-            unit_style = 'row'
-        have_units = False
-        for u in self.units:
-            if u and u != '1' and u != '-':
-                have_units = True
-                break
-        if not have_units:
-            unit_style = 'none'
-        # find std columns:
-        stdev_col = np.zeros(len(self.header), dtype=np.bool)
-        for c in range(len(self.header)-1):
-            if self.header[c+1][0].lower() in ['sd', 'std', 's.d.', 'stdev'] and \
-               not self.hidden[c+1]:
-                stdev_col[c] = True
-        # begin table:
-        fh.write(begin_str)
-        if table_format[0] == 't':
-            fh.write('{')
-            merged = False
-            for h, f, s in zip(self.hidden, self.formats, stdev_col):
-                if merged:
-                    fh.write('l')
-                    merged = False
-                    continue
-                if h:
+        # read inital lines of file:
+        key = []
+        data = []
+        target = data
+        comment = False
+        table_format='dat'        
+        for line in fh:
+            line = line.rstrip()
+            if line:
+                if r'\begin{tabular' in line:
+                    table_format='tex'
+                    target = key
                     continue
-                if latex_merge_std and s:
-                    fh.write('r@{$\\,\\pm\\,$}')
-                    merged = True
-                elif center_columns:
-                    fh.write('c')
-                elif f[1] == '-':
-                    fh.write('l')
-                else:
-                    fh.write('r')
-            fh.write('}\n')
-        # retrieve column formats and widths:
-        widths = []
-        widths_pos = []
-        for c, f in enumerate(self.formats):
-            w = 0
-            # position of width specification:
-            i0 = 1
-            if f[1] == '-' :
-                i0 = 2
-            i1 = f.find('.')
-            if not shrink_width:
-                if f[i0:i1]:
-                    w = int(f[i0:i1])
-            widths_pos.append((i0, i1))
-            # adapt width to header label:
-            hw = len(self.header[c][0])
-            if unit_style == 'header' and self.units[c] and\
-               self.units[c] != '1' and self.units[c] != '-':
-                hw += 1 + len(self.units[c])
-            if w < hw:
-                w = hw
-            # adapt width to data:
-            if f[-1] == 's':
-                for v in self.data[c]:
-                    if not isinstance(v, float) and w < len(v):
-                        w = len(v)
-            else:
-                fs = f[:i0] + str(0) + f[i1:]
-                for v in self.data[c]:
-                    if isinstance(v, float) and m.isnan(v):
-                        s = missing
-                    else:
-                        s = fs % v
-                    if w < len(s):
-                        w = len(s)
-            widths.append(w)
-        # adapt width to sections:
-        sec_indices = [0] * self.nsecs
-        sec_widths = [0] * self.nsecs
-        sec_columns = [0] * self.nsecs
-        for c in range(len(self.header)):
-            w = widths[c]
-            for l in range(min(self.nsecs, sections)):
-                if 1+l < len(self.header[c]):
-                    if c > 0 and sec_columns[l] > 0 and \
-                       1+l < len(self.header[sec_indices[l]]) and \
-                       len(self.header[sec_indices[l]][1+l]) > sec_widths[l]:
-                        dw = len(self.header[sec_indices[l]][1+l]) - sec_widths[l]
-                        nc = sec_columns[l]
-                        ddw = np.zeros(nc, dtype=int) + dw // nc
-                        ddw[:dw % nc] += 1
-                        wk = 0
-                        for ck in range(sec_indices[l], c):
-                            if not self.hidden[ck]:
-                                widths[ck] += ddw[wk]
-                                wk += 1
-                    sec_widths[l] = 0
-                    sec_indices[l] = c
-                if not self.hidden[c]:
-                    if sec_widths[l] > 0:
-                        sec_widths[l] += len(header_sep)
-                    sec_widths[l] += w
-                    sec_columns[l] += 1
-        # set width of format string:
-        formats = []
-        for c, (f, w) in enumerate(zip(self.formats, widths)):
-            formats.append(f[:widths_pos[c][0]] + str(w) + f[widths_pos[c][1]:])
-        # top line:
-        if top_line:
-            if table_format[0] == 't':
-                fh.write('  \\hline \\\\[-2ex]\n')
-            else:
-                first = True
-                fh.write(header_start.replace(' ', '-'))
-                for c in range(len(self.header)):
-                    if self.hidden[c]:
+                if table_format == 'tex':
+                    if r'\end{tabular' in line:
+                        break
+                    if r'\hline' in line:
+                        if key:
+                            target = data
                         continue
-                    if not first:
-                        fh.write('-'*len(header_sep))
-                    first = False
-                    fh.write(header_close)
-                    w = widths[c]
-                    fh.write(w*'-')
-                fh.write(header_end.replace(' ', '-'))
-        # section and column headers:
-        nsec0 = self.nsecs-sections
-        if nsec0 < 0:
-            nsec0 = 0
-        for ns in range(nsec0, self.nsecs+1):
-            nsec = self.nsecs-ns
-            first = True
-            last = False
-            merged = False
-            fh.write(header_start)
-            for c in range(len(self.header)):
-                if nsec < len(self.header[c]):
-                    # section width and column count:
-                    sw = -len(header_sep)
-                    columns = 0
-                    if not self.hidden[c]:
-                        sw = widths[c]
-                        columns = 1
-                    for k in range(c+1, len(self.header)):
-                        if nsec < len(self.header[k]):
-                            break
-                        if self.hidden[k]:
-                            continue
-                        sw += len(header_sep) + widths[k]
-                        columns += 1
-                    else:
-                        last = True
-                        if len(header_end.strip()) == 0:
-                            sw = 0  # last entry needs no width
-                    if columns == 0:
+                    line = line.rstrip(r'\\')
+                if line[0] == '#':
+                    comment = True
+                    table_format='dat'        
+                    target = key
+                    line = line.lstrip('#')
+                elif comment:
+                    target = data
+                if line[0:3] == 'RTH':
+                    target = key
+                    line = line[3:]
+                    table_format='rtai'
+                elif line[0:3] == 'RTD':
+                    target = data
+                    line = line[3:]
+                    table_format='rtai'        
+                if (line[0:3] == '|--' or line[0:3] == '|:-') and \
+                   (line[-3:] == '--|' or line[-3:] == '-:|'):
+                    if not data and not key:
+                        table_format='ascii'
+                        target = key
                         continue
-                    if not first and not merged:
-                        fh.write(header_sep)
-                    first = False
-                    if table_format[0] == 'c':
-                        sw -= len(header_sep)*(columns-1)
-                    elif table_format[0] == 'h':
-                        if columns>1:
-                            fh.write(' colspan="%d"' % columns)
-                    elif table_format[0] == 't':
-                        if merged:
-                            merged = False
-                            continue
-                        if latex_merge_std and nsec == 0 and stdev_col[c]:
-                            merged = True
-                            fh.write('\\multicolumn{%d}{c}{' % (columns+1))
-                        elif center_columns:
-                            fh.write('\\multicolumn{%d}{c}{' % columns)
-                        else:
-                            fh.write('\\multicolumn{%d}{l}{' % columns)
-                        if latex_label_command:
-                            fh.write('\\%s{' % latex_label_command)
-                    fh.write(header_close)
-                    hs = self.header[c][nsec]
-                    if nsec == 0 and unit_style == 'header':
-                        if self.units[c] and self.units[c] != '1' and self.units[c] != '-':
-                            hs += '/' + self.units[c]
-                    if align_columns and not table_format[0] in 'th':
-                        f = '%%-%ds' % sw
-                        fh.write(f % hs)
-                    else:
-                        fh.write(hs)
-                    if table_format[0] == 'c':
-                        if not last:
-                            fh.write(header_sep*(columns-1))
-                    elif table_format[0] == 't':
-                        if latex_label_command:
-                            fh.write('}')
-                        fh.write('}')
-            fh.write(header_end)
-        # units:
-        if unit_style == 'row':
-            first = True
-            merged = False
-            fh.write(header_start)
-            for c in range(len(self.header)):
-                if self.hidden[c] or merged:
-                    merged = False
-                    continue
-                if not first:
-                    fh.write(header_sep)
-                first = False
-                fh.write(header_close)
-                unit = self.units[c]
-                if not unit:
-                    unit = '-'
-                if table_format[0] == 't':
-                    if latex_merge_std and stdev_col[c]:
-                        merged = True
-                        fh.write('\\multicolumn{2}{c}{%s}' % latex_unit(unit))
-                    elif center_columns:
-                        fh.write('\\multicolumn{1}{c}{%s}' % latex_unit(unit))
-                    else:
-                        fh.write('\\multicolumn{1}{l}{%s}' % latex_unit(unit))
-                else:
-                    if align_columns and not table_format[0] in 'h':
-                        f = '%%-%ds' % widths[c]
-                        fh.write(f % unit)
-                    else:
-                        fh.write(unit)
-            fh.write(header_end)
-        # column numbers:
-        if column_numbers is not None:
-            first = True
-            fh.write(header_start)
-            for c in range(len(self.header)):
-                if self.hidden[c]:
-                    continue
-                if not first:
-                    fh.write(header_sep)
-                first = False
-                fh.write(header_close)
-                i = c
-                if column_numbers == 'num':
-                    i = c+1
-                aa = index2aa(c, 'a')
-                if column_numbers == 'AA':
-                    aa = index2aa(c, 'A')
-                if table_format[0] == 't':
-                    if column_numbers == 'num' or column_numbers == 'index':
-                        fh.write('\\multicolumn{1}{l}{%d}' % i)
-                    else:
-                        fh.write('\\multicolumn{1}{l}{%s}' % aa)
-                else:
-                    if column_numbers == 'num' or column_numbers == 'index':
-                        if align_columns:
-                            f = '%%%dd' % widths[c]
-                            fh.write(f % i)
-                        else:
-                            fh.write('%d' % i)
-                    else:
-                        if align_columns:
-                            f = '%%-%ds' % widths[c]
-                            fh.write(f % aa)
-                        else:
-                            fh.write(aa)
-            fh.write(header_end)
-        # header line:
-        if header_line:
-            if table_format[0] == 'm':
-                fh.write('|')
-                for c in range(len(self.header)):
-                    if self.hidden[c]:
-                        continue
-                    w = widths[c]+2
-                    if center_columns:
-                        fh.write(':' + (w-2)*'-' + ':|')
-                    elif formats[c][1] == '-':
-                        fh.write(w*'-' + '|')
-                    else:
-                        fh.write((w-1)*'-' + ':|')
-                fh.write('\n')
-            elif table_format[0] == 't':
-                fh.write('  \\hline \\\\[-2ex]\n')
-            else:
-                first = True
-                fh.write(header_start.replace(' ', '-'))
-                for c in range(len(self.header)):
-                    if self.hidden[c]:
-                        continue
-                    if not first:
-                        fh.write(header_sep.replace(' ', '-'))
-                    first = False
-                    fh.write(header_close)
-                    w = widths[c]
-                    fh.write(w*'-')
-                fh.write(header_end.replace(' ', '-'))
-        # start table data:
-        if table_format[0] == 'h':
-            fh.write('</thead>\n<tbody>\n')
-        # data:
-        for k in range(self.rows()):
-            first = True
-            merged = False
-            fh.write(data_start)
-            for c, f in enumerate(formats):
-                if self.hidden[c] or merged:
-                    merged = False
-                    continue
-                if not first:
-                    fh.write(data_sep)
-                first = False
-                if table_format[0] == 'h':
-                    if center_columns:
-                        fh.write(' align="center"')
-                    elif f[1] == '-':
-                        fh.write(' align="left"')
-                    else:
-                        fh.write(' align="right"')
-                fh.write(data_close)
-                if k >= len(self.data[c]) or \
-                   (isinstance(self.data[c][k], float) and m.isnan(self.data[c][k])):
-                    # missing data:
-                    if table_format[0] == 't' and latex_merge_std and stdev_col[c]:
-                        merged = True
-                        fh.write('\\multicolumn{2}{c}{%s}' % missing)
-                    elif align_columns:
-                        if f[1] == '-':
-                            fn = '%%-%ds' % widths[c]
-                        else:
-                            fn = '%%%ds' % widths[c]
-                        fh.write(fn % missing)
-                    else:
-                        fh.write(missing)
-                else:
-                    # data value:
-                    ds = f % self.data[c][k]
-                    if not align_columns:
-                        ds = ds.strip()
-                    fh.write(ds)
-            fh.write(data_end)
-        # bottom line:
-        if bottom_line:
-            if table_format[0] == 't':
-                fh.write('  \\hline\n')
-            else:
-                first = True
-                fh.write(header_start.replace(' ', '-'))
-                for c in range(len(self.header)):
-                    if self.hidden[c]:
-                        continue
-                    if not first:
-                        fh.write('-'*len(header_sep))
-                    first = False
-                    fh.write(header_close)
-                    w = widths[c]
-                    fh.write(w*'-')
-                fh.write(header_end.replace(' ', '-'))
-        # end table:
-        fh.write(end_str)
-        # close file:
-        if own_file:
-            fh.close()
-        # return file name:
-        return file_name
-
-            
-    def __str__(self):
-        """
-        Write table to a string.
-        """
-        stream = StringIO()
-        self.write(stream, table_format='out')
-        return stream.getvalue()
-                
-
-    def load(self, fh, missing='-'):
-        """
-        Load table from file or stream.
-
-        File type and properties are automatically inferred.
-
-        Parameters
-        ----------
-        fh: filename or stream
-            If not a stream, the file with name `fh` is opened for reading.
-        missing: string
-            Missing data are indicated by this string.
-        """
-
-        def read_key_line(line, sep, table_format):
-            if sep is None:
-                cols, indices = zip(*[(m.group(0), m.start()) for m in re.finditer(r'( ?[\S]+)+(?=[ ][ ]+|\Z)', line.strip())])
-            elif table_format == 'csv':
-                cols, indices = zip(*[(c.strip(), i) for i, c in enumerate(line.strip().split(sep)) if c.strip()])
-                return cols, indices
-            else:
-                seps = r'[^'+re.escape(sep)+']+'
-                cols, indices = zip(*[(m.group(0), m.start()) for m in re.finditer(seps, line.strip())])
-            colss = []
-            indicess = []
-            if table_format == 'tex':
-                i = 0
-                for c in cols:
-                    if 'multicolumn' in c:
-                        fields = c.split('{')
-                        n = int(fields[1].strip().rstrip('}').rstrip())
-                        colss.append(fields[3].strip().rstrip('}').rstrip())
-                        indicess.append(i)
-                        i += n
-                    else:
-                        colss.append(c.strip())
-                        indicess.append(i)
-                        i += 1
-            else:
-                for k, (c, i) in enumerate(zip(cols, indices)):
-                    if k == 0:
-                        c = c.lstrip('|')
-                    if k == len(cols)-1:
-                        c = c.rstrip('|')
-                    cs = c.strip()
-                    colss.append(cs)
-                    indicess.append(i)
-            return colss, indicess
-
-        def read_data_line(line, sep, post, precd, alld, numc, exped, fixed, strf, missing):
-            # read line:
-            cols = []
-            if sep is None:
-                cols = [m.group(0) for m in re.finditer(r'\S+', line.strip())]
-            else:
-                seps = r'[^'+re.escape(sep)+']+'
-                cols = [m.group(0).strip() for m in re.finditer(seps, line.strip())]
-                cols[0] = cols[0].lstrip('|').lstrip()
-                cols[-1] = cols[-1].rstrip('|').rstrip()
-            cols = [c for c in cols if c not in '|']
-            # read columns:
-            for k, c in enumerate(cols):
-                c = c.strip()
-                try:
-                    v = float(c)
-                    ad = 0
-                    ve = c.split('e')
-                    if len(ve) <= 1:
-                        exped[k] = False
-                    else:
-                        ad = len(ve[1])+1
-                    vc = ve[0].split('.')
-                    ad += len(vc[0])
-                    prec = len(vc[0].lstrip('-').lstrip('+').lstrip('0')) 
-                    if len(vc) == 2:
-                        if numc[k] and post[k] != len(vc[1]):
-                            fixed[k] = False
-                        if post[k] < len(vc[1]):
-                            post[k] = len(vc[1])
-                        ad += len(vc[1])+1
-                        prec += len(vc[1].rstrip('0'))
-                    if precd[k] < prec:
-                        precd[k] = prec
-                    if alld[k] < ad:
-                        alld[k] = ad
-                    numc[k] = True
-                except ValueError:
-                    if c == missing:
-                        v = float('NaN')
-                    else:
-                        strf[k] = True
-                        if alld[k] < len(c):
-                            alld[k] = len(c)
-                        v = c
-                self.append_data(v, k)
-
-        # initialize:
-        self.data = []
-        self.shape = (0, 0)
-        self.header = []
-        self.nsecs = 0
-        self.units = []
-        self.formats = []
-        self.hidden = []
-        self.setcol = 0
-        self.addcol = 0
-        # open file:
-        own_file = False
-        if not hasattr(fh, 'readline'):
-            fh = open(fh, 'r')
-            own_file = True
-        # read inital lines of file:
-        key = []
-        data = []
-        target = data
-        comment = False
-        table_format='dat'        
-        for line in fh:
-            line = line.rstrip()
-            if line:
-                if r'\begin{tabular' in line:
-                    table_format='tex'
-                    target = key
-                    continue
-                if table_format == 'tex':
-                    if r'\end{tabular' in line:
-                        break
-                    if r'\hline' in line:
-                        if key:
-                            target = data
-                        continue
-                    line = line.rstrip(r'\\')
-                if line[0] == '#':
-                    comment = True
-                    table_format='dat'        
-                    target = key
-                    line = line.lstrip('#')
-                elif comment:
-                    target = data
-                if line[0:3] == 'RTH':
-                    target = key
-                    line = line[3:]
-                    table_format='rtai'
-                elif line[0:3] == 'RTD':
-                    target = data
-                    line = line[3:]
-                    table_format='rtai'        
-                if (line[0:3] == '|--' or line[0:3] == '|:-') and \
-                   (line[-3:] == '--|' or line[-3:] == '-:|'):
-                    if not data and not key:
-                        table_format='ascii'
-                        target = key
-                        continue
-                    elif not key:
-                        table_format='md'
-                        key = data
-                        data = []
-                        target = data
+                    elif not key:
+                        table_format='md'
+                        key = data
+                        data = []
+                        target = data
                         continue
                     elif not data:
                         target = data
@@ -2555,63 +2175,980 @@ class TableData:
                             labels.append(lu[0].strip())
                             units.append('('.join(lu[1:]).strip())
                             continue
-                    lu = c.split('/')
-                    if len(lu) >= 2:
-                        labels.append(lu[0].strip())
-                        units.append('/'.join(lu[1:]).strip())
+                    lu = c.split('/')
+                    if len(lu) >= 2:
+                        labels.append(lu[0].strip())
+                        units.append('/'.join(lu[1:]).strip())
+                    else:
+                        labels.append(c)
+                        units.append('')
+            else:
+                labels = key_cols[kr]
+            indices = key_indices[kr]
+            # init table columns:
+            for k in range(colnum):
+                self.append(labels[k], units[k], '%g')
+        # read in sections:
+        while kr > 0:
+            kr -= 1
+            for sec_label, sec_inx in zip(key_cols[kr], key_indices[kr]):
+                col_inx = indices.index(sec_inx)
+                self.header[col_inx].append(sec_label)
+                if self.nsecs < len(self.header[col_inx])-1:
+                    self.nsecs = len(self.header[col_inx])-1
+        # read data:
+        post = np.zeros(colnum)
+        precd = np.zeros(colnum)
+        alld = np.zeros(colnum)
+        numc = [False] * colnum
+        exped = [True] * colnum
+        fixed = [True] * colnum
+        strf = [False] * colnum
+        if table_format in ['dat', 'csv', 'rtai']:
+            # fast path, read data in chunks of lines:
+            chunk = data
+            while True:
+                if chunk and \
+                   not read_data_chunk(chunk, sep, colnum, post, precd, alld,
+                                       numc, exped, fixed, strf, missing):
+                    for line in chunk:
+                        if line.strip():
+                            read_data_line(line, sep, post, precd, alld, numc,
+                                           exped, fixed, strf, missing)
+                chunk = []
+                for line in fh:
+                    line = line.rstrip()
+                    if line[0:3] == 'RTD':
+                        line = line[3:]
+                    chunk.append(line)
+                    if len(chunk) >= 10000:
+                        break
+                if not chunk:
+                    break
+            self.shape = (self.rows(), self.columns())
+        else:
+            for line in data:
+                read_data_line(line, sep, post, precd, alld, numc, exped, fixed, strf, missing)
+        # read remaining data:
+        for line in fh:
+            line = line.rstrip()
+            if table_format == 'tex':
+                if r'\end{tabular' in line or r'\hline' in line:
+                    break
+                line = line.rstrip(r'\\')
+            if (line[0:3] == '|--' or line[0:3] == '|:-') and \
+                (line[-3:] == '--|' or line[-3:] == '-:|'):
+                break
+            if line[0:3] == 'RTD':
+                line = line[3:]
+            read_data_line(line, sep, post, precd, alld, numc, exped, fixed, strf, missing)
+        # set formats:
+        for k in range(len(alld)):
+            if strf[k]:
+                self.set_format('%%-%ds' % alld[k], k)
+            elif exped[k]:
+                self.set_format('%%%d.%de' % (alld[k], post[k]), k)
+            elif fixed[k]:
+                self.set_format('%%%d.%df' % (alld[k], post[k]), k)
+            else:
+                self.set_format('%%%d.%dg' % (alld[k], precd[k]), k)
+        # close file:
+        if own_file:
+            fh.close()
+
+
+class TableWriter(object):
+    """
+    Write a table row by row to a file.
+
+    The header of the table and the formats and widths of the columns
+    are fixed and written to the file when the TableWriter is
+    constructed.  Rows or blocks of rows are then formatted and
+    appended to the file right away, without keeping them in
+    memory. This way, tables that grow during a long analysis can be
+    written incrementally.  The resulting file can be read in by
+    `TableData.load()`.
+
+    ```
+    df = TableData(header=['size', 'weight'], units=['m', 'kg'], formats=['%6.2f', '%4.0f'])
+    with TableWriter('summary.csv', df) as tw:
+        tw.write_row([2.34, 123])
+        tw.write_rows(np.array([[56.7, 3457], [8.9, 43]]))
+    ```
+
+    - `write_row()`: write a single row.
+    - `write_rows()`: write several rows.
+    - `flush()`: flush the file.
+    - `close()`: terminate the table and close the file.
+
+    The widths of the columns are set by the width specifications of
+    the format strings and the column headers. Data values that are
+    wider than their column just shift the following columns.
+    `TableData.write()` uses a TableWriter for writing all of its
+    rows.
+    """
+
+    def __init__(self, fh, table, table_format=None, delimiter=None,
+                 unit_style=None, column_numbers=None, sections=None,
+                 align_columns=None, shrink_width=False, missing='-',
+                 center_columns=False, latex_label_command='',
+                 latex_merge_std=False, append=False):
+        """
+        Open the file and write the header of the table.
+
+        Parameters
+        ----------
+        fh: filename or stream
+            If not a stream, the file with name `fh` is opened.
+            If `fh` does not have an extension,
+            the `table_format` is appended as an extension.
+            Otherwise `fh` is used as a stream for writing.
+        table: TableData
+            Header, units, and formats of this table define the
+            columns of the written table. If the table contains data,
+            they are used for setting the column widths, but they are
+            not written.
+        append: boolean
+            If `True` and the file `fh` already exists and is not
+            empty, new rows are appended to this file without writing
+            the header again. This works only for the 'dat', 'csv',
+            'rtai', and 'md' formats that do not terminate the table.
+
+        See `TableData.write()` for a description of the remaining
+        parameters. In contrast to `TableData.write()`, `shrink_width`
+        defaults to `False`, such that the widths of the columns are
+        taken from the format strings.
+
+        Raises
+        ------
+        ValueError:
+            Rows can not be appended to a table of the requested format.
+        """
+        # fix parameter:
+        if table_format == 'auto':
+            table_format =None
+        if delimiter == 'auto':
+            delimiter=None
+        if unit_style == 'auto':
+            unit_style=None
+        if column_numbers == 'none':
+            column_numbers=None
+        if sections == 'auto':
+            sections=None
+        if align_columns == 'auto':
+            align_columns=None
+        # open file:
+        own_file = False
+        file_name = None
+        write_header = True
+        if not hasattr(fh, 'write'):
+            _, ext = os.path.splitext(fh)
+            if table_format is None:
+                if len(ext) > 1:
+                    table_format = table.ext_formats[ext[1:]]
+            elif not ext:
+                fh += '.' + table.extensions[table_format]
+            file_name = fh
+            mode = 'w'
+            if append and os.path.isfile(fh) and os.path.getsize(fh) > 0:
+                if table_format is not None and table_format[0] in 'aht':
+                    raise ValueError('can not append rows to a table in %s format' % table_format)
+                mode = 'a'
+                write_header = False
+            fh = open(fh, mode)
+            own_file = True
+        if table_format is None:
+            table_format = 'dat'
+        hfh = StringIO()
+        # set style:        
+        if table_format[0] == 'd':
+            align_columns = True
+            begin_str = ''
+            end_str = ''
+            header_start = '# '
+            header_sep = '  '
+            header_close = ''
+            header_end = '\n'
+            data_start = '  '
+            data_sep = '  '
+            data_close = ''
+            data_end = '\n'
+            top_line = False
+            header_line = False
+            bottom_line = False
+            if delimiter is not None:
+                header_sep = delimiter
+                data_sep = delimiter
+            if sections is None:
+                sections = 1000
+        elif table_format[0] == 'a':
+            align_columns = True
+            begin_str = ''
+            end_str = ''
+            header_start = '| '
+            header_sep = ' | '
+            header_close = ''
+            header_end = ' |\n'
+            data_start = '| '
+            data_sep = ' | '
+            data_close = ''
+            data_end = ' |\n'
+            top_line = True
+            header_line = True
+            bottom_line = True
+            if delimiter is not None:
+                header_sep = delimiter
+                data_sep = delimiter
+            if sections is None:
+                sections = 1000
+        elif table_format[0] == 'c':
+            # csv according to http://www.ietf.org/rfc/rfc4180.txt :
+            column_numbers=None
+            if unit_style is None:
+                unit_style = 'header'
+            if align_columns is None:
+                align_columns = False
+            begin_str = ''
+            end_str = ''
+            header_start=''
+            header_sep = ','
+            header_close = ''
+            header_end='\n'
+            data_start=''
+            data_sep = ','
+            data_close = ''
+            data_end='\n'
+            top_line = False
+            header_line = False
+            bottom_line = False
+            if delimiter is not None:
+                header_sep = delimiter
+                data_sep = delimiter
+            if sections is None:
+                sections = 0
+        elif table_format[0] == 'r':
+            align_columns = True
+            begin_str = ''
+            end_str = ''
+            header_start = 'RTH| '
+            header_sep = '| '
+            header_close = ''
+            header_end = '\n'
+            data_start = 'RTD| '
+            data_sep = '| '
+            data_close = ''
+            data_end = '\n'
+            top_line = False
+            header_line = False
+            bottom_line = False
+            if sections is None:
+                sections = 1000
+        elif table_format[0] == 'm':
+            if unit_style is None or unit_style == 'row':
+                unit_style = 'header'
+            align_columns = True
+            begin_str = ''
+            end_str = ''
+            header_start='| '
+            header_sep = ' | '
+            header_close = ''
+            header_end=' |\n'
+            data_start='| '
+            data_sep = ' | '
+            data_close = ''
+            data_end=' |\n'
+            top_line = False
+            header_line = True
+            bottom_line = False
+            if sections is None:
+                sections = 0
+        elif table_format[0] == 'h':
+            align_columns = False
+            begin_str = '<table>\n<thead>\n'
+            end_str = '</tbody>\n</table>\n'
+            if center_columns:
+                header_start='  <tr>\n    <th align="center"'
+                header_sep = '</th>\n    <th align="center"'
+            else:
+                header_start='  <tr>\n    <th align="left"'
+                header_sep = '</th>\n    <th align="left"'
+            header_close = '>'
+            header_end='</th>\n  </tr>\n'
+            data_start='  <tr>\n    <td'
+            data_sep = '</td>\n    <td'
+            data_close = '>'
+            data_end='</td>\n  </tr>\n'
+            top_line = False
+            header_line = False
+            bottom_line = False
+            if sections is None:
+                sections = 1000
+        elif table_format[0] == 't':
+            if align_columns is None:
+                align_columns = False
+            begin_str = '\\begin{tabular}'
+            end_str = '\\end{tabular}\n'
+            header_start='  '
+            header_sep = ' & '
+            header_close = ''
+            header_end=' \\\\\n'
+            data_start='  '
+            data_sep = ' & '
+            data_close = ''
+            data_end=' \\\\\n'
+            top_line = True
+            header_line = True
+            bottom_line = True
+            if sections is None:
+                sections = 1000
+        else:
+            if align_columns is None:
+                align_columns = True
+            begin_str = ''
+            end_str = ''
+            header_start = ''
+            header_sep = '  '
+            header_close = ''
+            header_end = '\n'
+            data_start = ''
+            data_sep = '  '
+            data_close = ''
+            data_end = '\n'
+            top_line = False
+            header_line = False
+            bottom_line = False
+            if sections is None:
+                sections = 1000
+        # check units:
+        if unit_style is None:
+            unit_style = 'row'
+        have_units = False
+        for u in table.units:
+            if u and u != '1' and u != '-':
+                have_units = True
+                break
+        if not have_units:
+            unit_style = 'none'
+        # find std columns:
+        stdev_col = np.zeros(len(table.header), dtype=bool)
+        for c in range(len(table.header)-1):
+            if table.header[c+1][0].lower() in ['sd', 'std', 's.d.', 'stdev'] and \
+               not table.hidden[c+1]:
+                stdev_col[c] = True
+        # begin table:
+        hfh.write(begin_str)
+        if table_format[0] == 't':
+            hfh.write('{')
+            merged = False
+            for h, f, s in zip(table.hidden, table.formats, stdev_col):
+                if merged:
+                    hfh.write('l')
+                    merged = False
+                    continue
+                if h:
+                    continue
+                if latex_merge_std and s:
+                    hfh.write('r@{$\\,\\pm\\,$}')
+                    merged = True
+                elif center_columns:
+                    hfh.write('c')
+                elif f[1] == '-':
+                    hfh.write('l')
+                else:
+                    hfh.write('r')
+            hfh.write('}\n')
+        # retrieve column formats and widths:
+        widths = []
+        widths_pos = []
+        for c, f in enumerate(table.formats):
+            w = 0
+            # position of width specification:
+            i0 = 1
+            if f[1] == '-' :
+                i0 = 2
+            i1 = f.find('.')
+            if not shrink_width:
+                if f[i0:i1]:
+                    w = int(f[i0:i1])
+            widths_pos.append((i0, i1))
+            # adapt width to header label:
+            hw = len(table.header[c][0])
+            if unit_style == 'header' and table.units[c] and\
+               table.units[c] != '1' and table.units[c] != '-':
+                hw += 1 + len(table.units[c])
+            if w < hw:
+                w = hw
+            # adapt width to data:
+            if f[-1] == 's':
+                dw = max([len(v) for v in table.data[c]
+                          if not isinstance(v, float)], default=0)
+            else:
+                fs = f[:i0] + str(0) + f[i1:]
+                strs = self._format_column(fs, table.data[c], len(table.data[c]))
+                dw = max([len(missing) if s is None else len(s) for s in strs],
+                         default=0)
+            if w < dw:
+                w = dw
+            widths.append(w)
+        # adapt width to sections:
+        sec_indices = [0] * table.nsecs
+        sec_widths = [0] * table.nsecs
+        sec_columns = [0] * table.nsecs
+        for c in range(len(table.header)):
+            w = widths[c]
+            for l in range(min(table.nsecs, sections)):
+                if 1+l < len(table.header[c]):
+                    if c > 0 and sec_columns[l] > 0 and \
+                       1+l < len(table.header[sec_indices[l]]) and \
+                       len(table.header[sec_indices[l]][1+l]) > sec_widths[l]:
+                        dw = len(table.header[sec_indices[l]][1+l]) - sec_widths[l]
+                        nc = sec_columns[l]
+                        ddw = np.zeros(nc, dtype=int) + dw // nc
+                        ddw[:dw % nc] += 1
+                        wk = 0
+                        for ck in range(sec_indices[l], c):
+                            if not table.hidden[ck]:
+                                widths[ck] += ddw[wk]
+                                wk += 1
+                    sec_widths[l] = 0
+                    sec_indices[l] = c
+                if not table.hidden[c]:
+                    if sec_widths[l] > 0:
+                        sec_widths[l] += len(header_sep)
+                    sec_widths[l] += w
+                    sec_columns[l] += 1
+        # set width of format string:
+        formats = []
+        for c, (f, w) in enumerate(zip(table.formats, widths)):
+            formats.append(f[:widths_pos[c][0]] + str(w) + f[widths_pos[c][1]:])
+        # top line:
+        if top_line:
+            if table_format[0] == 't':
+                hfh.write('  \\hline \\\\[-2ex]\n')
+            else:
+                first = True
+                hfh.write(header_start.replace(' ', '-'))
+                for c in range(len(table.header)):
+                    if table.hidden[c]:
+                        continue
+                    if not first:
+                        hfh.write('-'*len(header_sep))
+                    first = False
+                    hfh.write(header_close)
+                    w = widths[c]
+                    hfh.write(w*'-')
+                hfh.write(header_end.replace(' ', '-'))
+        # section and column headers:
+        nsec0 = table.nsecs-sections
+        if nsec0 < 0:
+            nsec0 = 0
+        for ns in range(nsec0, table.nsecs+1):
+            nsec = table.nsecs-ns
+            first = True
+            last = False
+            merged = False
+            hfh.write(header_start)
+            for c in range(len(table.header)):
+                if nsec < len(table.header[c]):
+                    # section width and column count:
+                    sw = -len(header_sep)
+                    columns = 0
+                    if not table.hidden[c]:
+                        sw = widths[c]
+                        columns = 1
+                    for k in range(c+1, len(table.header)):
+                        if nsec < len(table.header[k]):
+                            break
+                        if table.hidden[k]:
+                            continue
+                        sw += len(header_sep) + widths[k]
+                        columns += 1
                     else:
-                        labels.append(c)
-                        units.append('')
+                        last = True
+                        if len(header_end.strip()) == 0:
+                            sw = 0  # last entry needs no width
+                    if columns == 0:
+                        continue
+                    if not first and not merged:
+                        hfh.write(header_sep)
+                    first = False
+                    if table_format[0] == 'c':
+                        sw -= len(header_sep)*(columns-1)
+                    elif table_format[0] == 'h':
+                        if columns>1:
+                            hfh.write(' colspan="%d"' % columns)
+                    elif table_format[0] == 't':
+                        if merged:
+                            merged = False
+                            continue
+                        if latex_merge_std and nsec == 0 and stdev_col[c]:
+                            merged = True
+                            hfh.write('\\multicolumn{%d}{c}{' % (columns+1))
+                        elif center_columns:
+                            hfh.write('\\multicolumn{%d}{c}{' % columns)
+                        else:
+                            hfh.write('\\multicolumn{%d}{l}{' % columns)
+                        if latex_label_command:
+                            hfh.write('\\%s{' % latex_label_command)
+                    hfh.write(header_close)
+                    hs = table.header[c][nsec]
+                    if nsec == 0 and unit_style == 'header':
+                        if table.units[c] and table.units[c] != '1' and table.units[c] != '-':
+                            hs += '/' + table.units[c]
+                    if align_columns and not table_format[0] in 'th':
+                        f = '%%-%ds' % sw
+                        hfh.write(f % hs)
+                    else:
+                        hfh.write(hs)
+                    if table_format[0] == 'c':
+                        if not last:
+                            hfh.write(header_sep*(columns-1))
+                    elif table_format[0] == 't':
+                        if latex_label_command:
+                            hfh.write('}')
+                        hfh.write('}')
+            hfh.write(header_end)
+        # units:
+        if unit_style == 'row':
+            first = True
+            merged = False
+            hfh.write(header_start)
+            for c in range(len(table.header)):
+                if table.hidden[c] or merged:
+                    merged = False
+                    continue
+                if not first:
+                    hfh.write(header_sep)
+                first = False
+                hfh.write(header_close)
+                unit = table.units[c]
+                if not unit:
+                    unit = '-'
+                if table_format[0] == 't':
+                    if latex_merge_std and stdev_col[c]:
+                        merged = True
+                        hfh.write('\\multicolumn{2}{c}{%s}' % latex_unit(unit))
+                    elif center_columns:
+                        hfh.write('\\multicolumn{1}{c}{%s}' % latex_unit(unit))
+                    else:
+                        hfh.write('\\multicolumn{1}{l}{%s}' % latex_unit(unit))
+                else:
+                    if align_columns and not table_format[0] in 'h':
+                        f = '%%-%ds' % widths[c]
+                        hfh.write(f % unit)
+                    else:
+                        hfh.write(unit)
+            hfh.write(header_end)
+        # column numbers:
+        if column_numbers is not None:
+            first = True
+            hfh.write(header_start)
+            for c in range(len(table.header)):
+                if table.hidden[c]:
+                    continue
+                if not first:
+                    hfh.write(header_sep)
+                first = False
+                hfh.write(header_close)
+                i = c
+                if column_numbers == 'num':
+                    i = c+1
+                aa = index2aa(c, 'a')
+                if column_numbers == 'AA':
+                    aa = index2aa(c, 'A')
+                if table_format[0] == 't':
+                    if column_numbers == 'num' or column_numbers == 'index':
+                        hfh.write('\\multicolumn{1}{l}{%d}' % i)
+                    else:
+                        hfh.write('\\multicolumn{1}{l}{%s}' % aa)
+                else:
+                    if column_numbers == 'num' or column_numbers == 'index':
+                        if align_columns:
+                            f = '%%%dd' % widths[c]
+                            hfh.write(f % i)
+                        else:
+                            hfh.write('%d' % i)
+                    else:
+                        if align_columns:
+                            f = '%%-%ds' % widths[c]
+                            hfh.write(f % aa)
+                        else:
+                            hfh.write(aa)
+            hfh.write(header_end)
+        # header line:
+        if header_line:
+            if table_format[0] == 'm':
+                hfh.write('|')
+                for c in range(len(table.header)):
+                    if table.hidden[c]:
+                        continue
+                    w = widths[c]+2
+                    if center_columns:
+                        hfh.write(':' + (w-2)*'-' + ':|')
+                    elif formats[c][1] == '-':
+                        hfh.write(w*'-' + '|')
+                    else:
+                        hfh.write((w-1)*'-' + ':|')
+                hfh.write('\n')
+            elif table_format[0] == 't':
+                hfh.write('  \\hline \\\\[-2ex]\n')
             else:
-                labels = key_cols[kr]
-            indices = key_indices[kr]
-            # init table columns:
-            for k in range(colnum):
-                self.append(labels[k], units[k], '%g')
-        # read in sections:
-        while kr > 0:
-            kr -= 1
-            for sec_label, sec_inx in zip(key_cols[kr], key_indices[kr]):
-                col_inx = indices.index(sec_inx)
-                self.header[col_inx].append(sec_label)
-                if self.nsecs < len(self.header[col_inx])-1:
-                    self.nsecs = len(self.header[col_inx])-1
-        # read data:
-        post = np.zeros(colnum)
-        precd = np.zeros(colnum)
-        alld = np.zeros(colnum)
-        numc = [False] * colnum
-        exped = [True] * colnum
-        fixed = [True] * colnum
-        strf = [False] * colnum
-        for line in data:
-            read_data_line(line, sep, post, precd, alld, numc, exped, fixed, strf, missing)
-        # read remaining data:
-        for line in fh:
-            line = line.rstrip()
-            if table_format == 'tex':
-                if r'\end{tabular' in line or r'\hline' in line:
-                    break
-                line = line.rstrip(r'\\')
-            if (line[0:3] == '|--' or line[0:3] == '|:-') and \
-                (line[-3:] == '--|' or line[-3:] == '-:|'):
-                break
-            if line[0:3] == 'RTD':
-                line = line[3:]
-            read_data_line(line, sep, post, precd, alld, numc, exped, fixed, strf, missing)
-        # set formats:
-        for k in range(len(alld)):
-            if strf[k]:
-                self.set_format('%%-%ds' % alld[k], k)
-            elif exped[k]:
-                self.set_format('%%%d.%de' % (alld[k], post[k]), k)
-            elif fixed[k]:
-                self.set_format('%%%d.%df' % (alld[k], post[k]), k)
+                first = True
+                hfh.write(header_start.replace(' ', '-'))
+                for c in range(len(table.header)):
+                    if table.hidden[c]:
+                        continue
+                    if not first:
+                        hfh.write(header_sep.replace(' ', '-'))
+                    first = False
+                    hfh.write(header_close)
+                    w = widths[c]
+                    hfh.write(w*'-')
+                hfh.write(header_end.replace(' ', '-'))
+        # start table data:
+        if table_format[0] == 'h':
+            hfh.write('</thead>\n<tbody>\n')
+        # write header:
+        if write_header:
+            fh.write(hfh.getvalue())
+        self.fh = fh
+        self.own_file = own_file
+        self.file_name = file_name
+        self.table_format = table_format
+        self.align_columns = align_columns
+        self.missing = missing
+        self.center_columns = center_columns
+        self.latex_merge_std = latex_merge_std
+        self.stdev_col = stdev_col
+        self.hidden = list(table.hidden)
+        self.formats = formats
+        self.widths = widths
+        self.data_start = data_start
+        self.data_sep = data_sep
+        self.data_close = data_close
+        self.data_end = data_end
+        self.bottom_line = bottom_line
+        self.header_start = header_start
+        self.header_sep = header_sep
+        self.header_close = header_close
+        self.header_end = header_end
+        self.end_str = end_str
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def write_row(self, row):
+        """
+        Write a single row.
+
+        Parameters
+        ----------
+        row: list, tuple, or 1D ndarray
+            The values for each column of the table, including hidden columns.
+            NaN values are written as missing data.
+        """
+        self.write_rows([row])
+
+    def write_rows(self, data):
+        """
+        Write several rows.
+
+        Parameters
+        ----------
+        data: TableData, 2D ndarray, or list of rows
+            The data to be written. Rows first, i.e. the second index
+            or the elements of each row specify the columns of the table,
+            including hidden columns.
+            NaN values and values missing at the end of a row or column
+            are written as missing data.
+        """
+        if isinstance(data, TableData):
+            columns = data.data
+            nrows = data.rows()
+        elif isinstance(data, np.ndarray):
+            columns = data.T
+            nrows = len(data)
+        else:
+            nrows = len(data)
+            columns = [[row[c] for row in data if c < len(row)]
+                       for c in range(len(self.formats))]
+
+        if nrows == 0:
+            return
+        merge_std = self.table_format[0] == 't' and self.latex_merge_std
+        # format columns:
+        cells = []
+        merged = None
+        for c, f in enumerate(self.formats):
+            if self.hidden[c]:
+                merged = None
+                continue
+            column = columns[c] if c < len(columns) else []
+            strs = self._format_column(f, column, nrows)
+            if not self.align_columns:
+                strs = [None if s is None else s.strip() for s in strs]
+            # missing data:
+            if merge_std and self.stdev_col[c]:
+                ms = '\\multicolumn{2}{c}{%s}' % self.missing
+            elif self.align_columns:
+                if f[1] == '-':
+                    ms = '%%-%ds' % self.widths[c] % self.missing
+                else:
+                    ms = '%%%ds' % self.widths[c] % self.missing
             else:
-                self.set_format('%%%d.%dg' % (alld[k], precd[k]), k)
+                ms = self.missing
+            # prefix:
+            prefix = self.data_close
+            if self.table_format[0] == 'h':
+                if self.center_columns:
+                    prefix = ' align="center"' + prefix
+                elif f[1] == '-':
+                    prefix = ' align="left"' + prefix
+                else:
+                    prefix = ' align="right"' + prefix
+            if prefix:
+                col_cells = [prefix + (ms if s is None else s) for s in strs]
+            else:
+                col_cells = [ms if s is None else s for s in strs]
+            # merged columns, tex only:
+            if merged is not None:
+                for k in merged:
+                    col_cells[k] = None
+            merged = None
+            if merge_std and self.stdev_col[c]:
+                merged = [k for k, s in enumerate(strs)
+                          if s is None and col_cells[k] is not None]
+            cells.append(col_cells)
+        # assemble rows:
+        if merge_std:
+            rows = [self.data_start + self.data_sep.join([s for s in r if s is not None]) + \
+                    self.data_end for r in zip(*cells)]
+        else:
+            rows = [self.data_start + self.data_sep.join(r) + self.data_end
+                    for r in zip(*cells)]
+        self.fh.write(''.join(rows))
+
+    @staticmethod
+    def _format_column(format, column, n):
+        """
+        Format the first `n` values of a column.
+
+        Parameters
+        ----------
+        format: string
+            Format string for the values.
+        column: list, ndarray, or ArrayColumn
+            The data values.
+        n: int
+            Number of rows.
+
+        Returns
+        -------
+        strs: list of strings
+            The formatted values. Missing values (NaN, or beyond the end
+            of the column) are None.
+        """
+        if isinstance(column, ArrayColumn):
+            column = np.asarray(column)
+        elif not isinstance(column, np.ndarray) and format[-1] in 'dieEfFgG':
+            # try to convert list of numbers to an array:
+            values = np.asarray(column[:n])
+            if values.dtype.kind in 'biuf':
+                column = values
+        if isinstance(column, np.ndarray) and column.dtype.kind in 'biuf':
+            values = column[:n]
+            if values.dtype.kind == 'f':
+                miss = np.isnan(values)
+            else:
+                miss = np.zeros(len(values), dtype=bool)
+            if np.any(miss):
+                strs = [None if mv else format % v
+                        for v, mv in zip(values.tolist(), miss.tolist())]
+            else:
+                strs = [format % v for v in values.tolist()]
+        else:
+            if isinstance(column, np.ndarray):
+                column = column.tolist()
+            strs = [None if isinstance(v, float) and m.isnan(v) else format % v
+                    for v in column[:n]]
+        if len(strs) < n:
+            strs.extend([None] * (n - len(strs)))
+        return strs
+
+    def flush(self):
+        """
+        Flush the file.
+        """
+        self.fh.flush()
+
+    def close(self):
+        """
+        Terminate the table and close the file.
+
+        Files that have been passed as streams are not closed.
+        """
+        if self.fh is None:
+            return
+        # bottom line:
+        if self.bottom_line:
+            if self.table_format[0] == 't':
+                self.fh.write('  \\hline\n')
+            else:
+                first = True
+                self.fh.write(self.header_start.replace(' ', '-'))
+                for c in range(len(self.hidden)):
+                    if self.hidden[c]:
+                        continue
+                    if not first:
+                        self.fh.write('-'*len(self.header_sep))
+                    first = False
+                    self.fh.write(self.header_close)
+                    w = self.widths[c]
+                    self.fh.write(w*'-')
+                self.fh.write(self.header_end.replace(' ', '-'))
+        # end table:
+        self.fh.write(self.end_str)
         # close file:
-        if own_file:
-            fh.close()
+        if self.own_file:
+            self.fh.close()
+        self.fh = None
+
+
+class ArrayColumn(object):
+    """
+    List-like data column of a TableData backed by a numpy array.
+
+    Used by a TableData with `columnar=True` instead of a python list
+    for each of its columns. The data are stored in a typed numpy array
+    that grows geometrically, such that appending single values is
+    amortized O(1). Integer columns are converted to float columns as
+    soon as a float is added, numerical columns are converted to object
+    columns as soon as a string is added.
+
+    - `append()`: append a single value.
+    - `extend()`: append several values.
+    - `__len__()`: the number of data elements.
+    - `__getitem__()`: single data elements (as python scalars) or
+      numpy arrays for slices and index arrays.
+      Slices are views into the column without copying the data.
+    - `__setitem__()`: assign values to data elements.
+    - `__delitem__()`: delete data elements.
+    - `__array__()`: the data of the column as a numpy array (no copy).
+    """
+
+    def __init__(self, data=None):
+        """
+        Initialize the column.
+
+        Parameters
+        ----------
+        data: None, list, or ndarray
+            Initial data of the column.
+        """
+        self.buffer = np.zeros(0)
+        self.size = 0
+        if data is not None:
+            self.extend(data)
+
+    def _fix_dtype(self, values):
+        """
+        Make the buffer able to hold `values`.
+        """
+        values = np.asarray(values)
+        kind = values.dtype.kind
+        if kind in 'biu':
+            dtype = np.dtype(np.int64)
+        elif kind == 'f':
+            dtype = np.dtype(float)
+        else:
+            dtype = np.dtype(object)
+        if self.size == 0:
+            if self.buffer.dtype != dtype:
+                self.buffer = np.zeros(len(self.buffer), dtype=dtype)
+        elif self.buffer.dtype != dtype and \
+             (dtype == object or self.buffer.dtype.kind in 'iu'):
+            self.buffer = self.buffer.astype(dtype)
+
+    def _reserve(self, n):
+        """
+        Make space for `n` data elements.
+        """
+        if n > len(self.buffer):
+            capacity = max(n, 2*len(self.buffer), 16)
+            buffer = np.zeros(capacity, dtype=self.buffer.dtype)
+            buffer[:self.size] = self.buffer[:self.size]
+            self.buffer = buffer
+
+    def append(self, value):
+        """
+        Append a single value.
+        """
+        kind = self.buffer.dtype.kind
+        if self.size == 0 or \
+           not (kind == 'O' or
+                (kind == 'f' and isinstance(value, (float, int, np.integer))) or
+                (kind == 'i' and isinstance(value, (int, np.integer)))):
+            self._fix_dtype([value])
+        if self.size >= len(self.buffer):
+            self._reserve(self.size + 1)
+        self.buffer[self.size] = value
+        self.size += 1
+
+    def extend(self, values):
+        """
+        Append several values.
+        """
+        if isinstance(values, ArrayColumn):
+            values = values.buffer[:values.size]
+        if self.size == 0 or self.buffer.dtype != object:
+            if not isinstance(values, np.ndarray) and \
+               any(isinstance(v, str) for v in values):
+                values = np.array(values, dtype=object)
+            self._fix_dtype(values)
+        n = len(values)
+        self._reserve(self.size + n)
+        self.buffer[self.size:self.size+n] = values
+        self.size += n
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        return iter(self.buffer[:self.size].tolist())
+
+    def __array__(self, dtype=None):
+        if dtype is None:
+            return self.buffer[:self.size]
+        return np.asarray(self.buffer[:self.size], dtype=dtype)
+
+    def __getitem__(self, key):
+        value = self.buffer[:self.size][key]
+        if isinstance(value, np.generic):
+            return value.item()
+        return value
+
+    def __setitem__(self, key, value):
+        if self.buffer.dtype != object:
+            if isinstance(value, str) or \
+               (isinstance(value, (list, tuple)) and
+                any(isinstance(v, str) for v in value)):
+                value = np.array(value, dtype=object)
+            self._fix_dtype(value)
+        self.buffer[:self.size][key] = value
+
+    def __delitem__(self, key):
+        data = np.delete(self.buffer[:self.size], key)
+        self.buffer[:len(data)] = data
+        self.size = len(data)
+
+    def __eq__(self, other):
+        return self.buffer[:self.size] == np.asarray(other)
+
+    def __repr__(self):
+        return repr(self.buffer[:self.size].tolist())
 
 
 def write(fh, data, header, units=None, formats=None, table_format=None, delimiter=None,
@@ -2652,6 +3189,102 @@ def write(fh, data, header, units=None, formats=None, table_format=None, delimit
              delimiter=delimiter, align_columns=align_columns, sections=sections,
              latex_label_command=latex_label_command, latex_merge_std=latex_merge_std)
 
+
+def write_bundle(fh, tables):
+    """
+    Write several tables into a single binary numpy file.
+
+    All header information (sections, labels, units, formats, hidden
+    columns) of the tables is stored as a JSON manifest together with
+    the data columns in an uncompressed numpy `.npz` archive. Numerical
+    columns are stored as float or integer arrays, columns containing
+    strings as unicode arrays with missing values stored as empty strings.
+    This way, no pickling is needed and the tables can be read back
+    via `load_bundle()` without parsing any text.
+
+    Parameters
+    ----------
+    fh: filename or stream
+        If a filename without extension, '.npz' is appended.
+    tables: dict or list of tuples
+        Names and the corresponding TableData to be written.
+        The order of the tables is preserved.
+
+    Returns
+    -------
+    file_name: string or None
+        The full name of the file into which the tables were written.
+
+    Example
+    -------
+    ```
+    write_bundle('results', {'fish': fish_table, 'spectrum-0': spec_table})
+    tables = load_bundle('results.npz')
+    ```
+    """
+    if isinstance(tables, dict):
+        tables = tables.items()
+    manifest = []
+    arrays = {}
+    for t, (name, td) in enumerate(tables):
+        manifest.append({'name': name, 'header': td.header,
+                         'units': td.units, 'formats': td.formats,
+                         'hidden': td.hidden, 'nsecs': td.nsecs})
+        for c, data in enumerate(td.data):
+            a = np.asarray(data) if len(data) > 0 else np.zeros(0)
+            if a.dtype.kind not in 'biuf':
+                a = np.array(['' if isinstance(v, float) and m.isnan(v) else v
+                              for v in data], dtype=str)
+            arrays['t%d_c%d' % (t, c)] = a
+    arrays['manifest'] = np.array(json.dumps(manifest))
+    file_name = None
+    if not hasattr(fh, 'write'):
+        if not os.path.splitext(fh)[1]:
+            fh += '.npz'
+        file_name = fh
+    np.savez(fh, **arrays)
+    return file_name
+
+
+def load_bundle(fh, columnar=False):
+    """
+    Load tables from a binary file written by `write_bundle()`.
+
+    Parameters
+    ----------
+    fh: filename or stream
+        The numpy `.npz` file to be read.
+    columnar: boolean
+        If True, return tables with numpy arrays as columns
+        (see `TableData` and `ArrayColumn`).
+
+    Returns
+    -------
+    tables: dict
+        The TableData objects stored in the file with their names as keys.
+    """
+    tables = {}
+    with np.load(fh, allow_pickle=False) as nf:
+        manifest = json.loads(str(nf['manifest']))
+        for t, info in enumerate(manifest):
+            td = TableData(columnar=columnar)
+            td.header = info['header']
+            td.units = info['units']
+            td.formats = info['formats']
+            td.hidden = info['hidden']
+            td.nsecs = info['nsecs']
+            for c in range(len(td.header)):
+                a = nf['t%d_c%d' % (t, c)]
+                if a.dtype.kind == 'U':
+                    a = [v if v else float('NaN') for v in a.tolist()]
+                elif not columnar:
+                    a = a.tolist()
+                td.data.append(ArrayColumn(a) if columnar else a)
+            td.addcol = len(td.data)
+            td.shape = (td.rows(), td.columns())
+            tables[info['name']] = td
+    return tables
+
     
 def add_write_table_config(cfg, table_format=None, delimiter=None,
                            unit_style=None, column_numbers=None, sections=None,
@@ -40,7 +40,9 @@ from .eodanalysis import wave_quality, wave_quality_args, add_eod_quality_config
 from .eodanalysis import pulse_quality, pulse_quality_args
 from .eodanalysis import save_eod_waveform, save_wave_eodfs, save_wave_fish, save_pulse_fish
 from .eodanalysis import save_wave_spectrum, save_pulse_spectrum, save_pulse_peaks
+from .resultsdb import write_results
 from .tabledata import TableData, add_write_table_config, write_table_args
+from .tabledata import write_bundle
 
 
 def configuration(config_file, save_config=False, file_name='', verbose=0):
@@ -234,7 +236,11 @@ def detect_eods(data, samplerate, clipped, filename, verbose, cfg):
 def remove_eod_files(output_basename, verbose, cfg):
     """ Remove all files from previous runs of thunderfish
     """
-    fext = TableData.extensions[cfg.value('fileFormat')]
+    file_format = cfg.value('fileFormat')
+    if file_format == 'npz':
+        fext = 'npz'
+    else:
+        fext = TableData.extensions[file_format]
     # remove all files from previous runs of thunderfish:
     for fn in glob.glob('%s-*.%s' % (output_basename, fext)):
         os.remove(fn)
@@ -243,45 +249,63 @@ def remove_eod_files(output_basename, verbose, cfg):
 
 def save_eods(output_basename, mean_eods, spec_data, peak_data,
               wave_props, wave_eodfs, wave_indices, pulse_props,
-              unit, verbose, cfg):
+              unit, verbose, cfg, tables=None):
     """ Save analysis results of all EODs to files.
+
+    If the file format is 'npz', all tables are written into a single
+    binary file `output_basename-results.npz` (see `tabledata.write_bundle()`).
+
+    If `tables` is a dictionary, the tables are added to this dictionary
+    instead of being written to files (see `resultsdb.write_results()`).
     """
+    bundle = None
+    basename = output_basename
+    if tables is not None:
+        basename = tables
+    elif cfg.value('fileFormat') == 'npz':
+        bundle = {}
+        basename = bundle
     # for all wavetype fish in fishlist:
     if len(wave_eodfs) > 0:
-        fp = save_wave_eodfs(wave_eodfs, wave_indices, output_basename,
+        fp = save_wave_eodfs(wave_eodfs, wave_indices, basename,
                              **write_table_args(cfg))
-        if verbose > 0:
+        if verbose > 0 and not fp is None:
             print('wrote file %s' % fp)
     # for each fish:
     for i, (mean_eod, sdata, pdata) in enumerate(zip(mean_eods, spec_data, peak_data)):
-        fp = save_eod_waveform(mean_eod, unit, i, output_basename,
+        fp = save_eod_waveform(mean_eod, unit, i, basename,
                                **write_table_args(cfg))
-        if verbose > 0:
+        if verbose > 0 and not fp is None:
             print('wrote file %s' % fp)
         # power spectrum:
         if len(sdata)>0:
             if sdata.shape[1] == 2:
-                fp = save_pulse_spectrum(sdata, unit, i, output_basename,
+                fp = save_pulse_spectrum(sdata, unit, i, basename,
                                          **write_table_args(cfg))
             else:
-                fp = save_wave_spectrum(sdata, unit, i, output_basename,
+                fp = save_wave_spectrum(sdata, unit, i, basename,
                                         **write_table_args(cfg))
-            if verbose > 0:
+            if verbose > 0 and not fp is None:
                 print('wrote file %s' % fp)
         # peaks:
-        fp = save_pulse_peaks(pdata, unit, i, output_basename,
+        fp = save_pulse_peaks(pdata, unit, i, basename,
                               **write_table_args(cfg))
         if verbose > 0 and not fp is None:
             print('wrote file %s' % fp)
     # fish properties:
     if wave_props:
-        fp = save_wave_fish(wave_props, unit, output_basename,
+        fp = save_wave_fish(wave_props, unit, basename,
                             **write_table_args(cfg))
-        if verbose > 0:
+        if verbose > 0 and not fp is None:
             print('wrote file %s' % fp)
     if pulse_props:
-        fp = save_pulse_fish(pulse_props, unit, output_basename,
+        fp = save_pulse_fish(pulse_props, unit, basename,
                              **write_table_args(cfg))
+        if verbose > 0 and not fp is None:
+            print('wrote file %s' % fp)
+    # all tables in a single file:
+    if bundle is not None and len(bundle) > 0:
+        fp = write_bundle(output_basename + '-results', bundle)
         if verbose > 0:
             print('wrote file %s' % fp)
 
@@ -526,7 +550,7 @@ def plot_eods(base_name, raw_data, samplerate, idx0, idx1,
 
 def thunderfish(filename, cfg, channel=0, save_data=False, save_plot=False,
                 save_subplots=False, output_folder='.', keep_path=False,
-                show_bestwindow=False, verbose=0):
+                show_bestwindow=False, verbose=0, results_db=None):
     # check data file:
     if len(filename) == 0:
         return 'you need to specify a file containing some data'
@@ -592,12 +616,22 @@ def thunderfish(filename, cfg, channel=0, save_data=False, save_plot=False,
             save_eods(output_basename, mean_eods, spec_data, peak_data,
                       wave_props, fishlist, fish_indices, pulse_props,
                       unit, verbose, cfg)
+    if results_db and found_bestwindow:
+        tables = {}
+        save_eods(output_basename, mean_eods, spec_data, peak_data,
+                  wave_props, fishlist, fish_indices, pulse_props,
+                  unit, verbose, cfg, tables)
+        write_results(results_db, outfilename, tables, filename,
+                      channel, samplerate, unit)
+        if verbose > 0:
+            print('wrote results of %s to database %s' % (outfilename, results_db))
 
-    if save_plot or not save_data:
+    interactive = not save_data and not results_db
+    if save_plot or interactive:
         fig = plot_eods(outfilename, raw_data, samplerate, idx0, idx1, clipped,
                         fishlist, mean_eods, eod_props, peak_data, spec_data,
                         list(range(len(eod_props))), unit, psd_data,
-                        True, 3000.0, interactive=not save_data)
+                        True, 3000.0, interactive=interactive)
         if save_plot:
             # save figure as pdf:
             fig.savefig(output_basename + '.pdf')
@@ -605,7 +639,7 @@ def thunderfish(filename, cfg, channel=0, save_data=False, save_plot=False,
                 # make figures and call plot functions on them individually
                 print('sorry, saving subplots separately is not implemented yet!')
             plt.close()
-        elif not save_data:
+        elif interactive:
             fig.canvas.set_window_title('thunderfish')
             plt.show()
 
@@ -616,7 +650,7 @@ def run_thunderfish(file):
     """
     Helper function for mutlithreading Pool().map().
     """
-    verbose = pool_args[-1]+1
+    verbose = pool_args[-2]+1
     if verbose > 0:
         if verbose > 1:
             print('='*60)
@@ -648,8 +682,10 @@ def main():
     parser.add_argument('-s', dest='save_data', action='store_true',
                         help='save analysis results to files')
     parser.add_argument('-f', dest='format', default='auto', type=str,
-                        choices=TableData.formats,
-                        help='file format used for saving analysis results, defaults to the format specified in the configuration file or "dat"')
+                        choices=TableData.formats + ['npz'],
+                        help='file format used for saving analysis results, defaults to the format specified in the configuration file or "dat". "npz" writes all results of a recording into a single binary file')
+    parser.add_argument('-d', dest='results_db', default=None, type=str, metavar='DBFILE',
+                        help='store analysis results of all recordings in the SQLite database DBFILE')
     parser.add_argument('-p', dest='save_plot', action='store_true',
                         help='save output plot as pdf file')
     parser.add_argument('-P', dest='save_subplots', action='store_true',
@@ -677,6 +713,8 @@ def main():
         print('  > thunderfish -j -s -p -o results/ river1/*.wav')
         print('- analyze all wav files in the river1/ directory and write files to "results/river1/":')
         print('  > thunderfish -s -p -o results/ -k river1/*.wav')
+        print('- analyze all wav files in the river1/ directory and collect the results in the database "river1.db":')
+        print('  > thunderfish -j -d river1.db river1/*.wav')
         print('- write configuration file:')
         print('  > thunderfish -c')
         parser.exit()
@@ -705,7 +743,7 @@ def main():
     if args.save_subplots:
         args.save_plot = True
     # create output folder:
-    if args.save_data or args.save_plot:
+    if args.save_data or args.save_plot or args.results_db:
         if not os.path.exists(args.outpath):
             if verbose > 1:
                 print('mkdir %s' % args.outpath)
@@ -714,8 +752,8 @@ def main():
     global pool_args
     pool_args = (cfg, args.channel, args.save_data,
                  args.save_plot, args.save_subplots, args.outpath, args.keep_path,
-                 args.show_bestwindow, verbose-1)
-    if args.jobs is not None and (args.save_data or args.save_plot) and len(args.file) > 1:
+                 args.show_bestwindow, verbose-1, args.results_db)
+    if args.jobs is not None and (args.save_data or args.save_plot or args.results_db) and len(args.file) > 1:
         cpus = cpu_count() if args.jobs == 0 else args.jobs
         if verbose > 1:
             print('run on %d cpus' % cpus)
@@ -2,20 +2,29 @@
 Track wave-type electric fish frequencies over time.
 
 fish_tracker(): load data and track fish.
+batch_tracker(): track fish without graphical user interface and return the results.
 """
 import sys
 import os
 import argparse
 import numpy as np
 import glob
+import pickle
 import scipy.stats as scp
 import multiprocessing
+try:
+    from multiprocessing.shared_memory import SharedMemory
+    from multiprocessing import resource_tracker
+except ImportError:
+    SharedMemory = None
 from sklearn.metrics import roc_curve, roc_auc_score
 from functools import partial
 from .version import __version__
 from .configfile import ConfigFile
-from .dataloader import open_data
+from .dataloader import open_data, check_relacs, check_fishgrid, load_matfile, find_cache
 from .powerspectrum import spectrogram, next_power_of_two, decibel
+from .spectiles import SpecTiles, SpecTilesWriter, spectiles_path, check_spectiles
+from .trackingindex import get_idx_offsets, get_time_range, get_ident_index, get_ident_median_steps
 from .harmonicgroups import add_psd_peak_detection_config, add_harmonic_groups_config
 from .harmonicgroups import harmonic_groups_args, psd_peak_detection_args
 from .harmonicgroups import harmonic_groups, fundamental_freqs, plot_psd_harmonic_groups
@@ -23,10 +32,6 @@ from tqdm import tqdm
 
 from IPython import embed
 import time
-try:
-    import matplotlib.pyplot as plt
-except ImportError:
-    pass
 
 def auto_connect_traces(fund_v, idx_v, ident_v, times, max_dt=120., max_df=2., max_overlap_n = 0):
     """
@@ -101,67 +106,75 @@ def auto_connect_traces(fund_v, idx_v, ident_v, times, max_dt=120., max_df=2., m
     #     # plt.show()
 
     if not only_bc:
-        idents = np.unique(ident_v[~np.isnan(ident_v)])
-        med_ident_freq = [np.median(fund_v[ident_v == ident]) for ident in idents]
-        i0s = []
-        i1s = []
-        di = []
-        df = []
-        # embed()
-        # quit()
-        next_message = 0.0
-        for enu in np.arange(len(idents)-1):
-        # for enu, i0 in enumerate(idents[:-1]):
-            # print(enu)
-            next_message = include_progress_bar(enu, len(idents)-1, 'error traces', next_message)
-            for enu1 in np.arange(enu+1, len(idents)):
-            # for enu1, i1 in enumerate(idents[enu+1:]):
-                if np.abs(med_ident_freq[enu] - med_ident_freq[enu1]) > max_df:
-                    continue
-
-                if idx_v[ident_v == idents[enu]][-1] < idx_v[ident_v == idents[enu1]][0]:
-                    if np.abs(times[idx_v[ident_v == idents[enu]][-1]] - times[idx_v[ident_v == idents[enu1]][0]]) > max_dt:
-                        continue
-                    delta_idx = idx_v[ident_v == idents[enu1]][0] - idx_v[ident_v == idents[enu]][-1]
+        # summaries of each identity:
+        idents, order, ident_offsets = get_ident_index(ident_v)
+        members = [order[ident_offsets[k]:ident_offsets[k+1]] for k in range(len(idents))]
+        if len(members) < 2:
+            return ident_v
+        med_ident_freq = np.array([np.median(fund_v[m]) for m in members])
+        first_idx = np.array([idx_v[m[0]] for m in members])
+        last_idx = np.array([idx_v[m[-1]] for m in members])
+        ident_idxs = [np.unique(idx_v[m]) for m in members]
+
+        # candidate pairs within max_df of the sorted median frequencies:
+        freq_order = np.argsort(med_ident_freq, kind='mergesort')
+        sorted_freqs = med_ident_freq[freq_order]
+        ends = np.searchsorted(sorted_freqs, sorted_freqs + max_df*(1 + 1e-9) + 1e-9, side='right')
+        n_pairs = ends - np.arange(len(sorted_freqs)) - 1
+        p0 = np.repeat(np.arange(len(sorted_freqs)), n_pairs)
+        p1 = p0 + 1 + np.arange(np.sum(n_pairs)) - np.repeat(np.cumsum(n_pairs) - n_pairs, n_pairs)
+        enu = np.minimum(freq_order[p0], freq_order[p1])
+        enu1 = np.maximum(freq_order[p0], freq_order[p1])
+        df = np.abs(med_ident_freq[enu] - med_ident_freq[enu1])
+        before = last_idx[enu] < first_idx[enu1]  # i0 before i1
+        after = ~before & (last_idx[enu1] < first_idx[enu])  # i1 before i0
+        delta_t = np.zeros(len(enu))
+        delta_t[before] = np.abs(times[last_idx[enu[before]]] - times[first_idx[enu1[before]]])
+        delta_t[after] = np.abs(times[last_idx[enu1[after]]] - times[first_idx[enu[after]]])
+        valid = (df <= max_df) & (delta_t <= max_dt)
+        di = np.zeros(len(enu), dtype=first_idx.dtype)  # overlapping traces have zero distance
+        di[before] = first_idx[enu1[before]] - last_idx[enu[before]]
+        di[after] = first_idx[enu[after]] - last_idx[enu1[after]]
+        pair_order = np.lexsort((enu1[valid], enu[valid]))
+        enu = enu[valid][pair_order]
+        enu1 = enu1[valid][pair_order]
+        di = di[valid][pair_order]
+        df = df[valid][pair_order]
+        if len(enu) == 0:
+            return ident_v
 
-                    # i0 before i1
-                    # print('wuff')
-                elif idx_v[ident_v == idents[enu1]][-1] < idx_v[ident_v == idents[enu]][0]:
-                    if np.abs(times[idx_v[ident_v == idents[enu1]][-1]] - times[idx_v[ident_v == idents[enu]][0]]) > max_dt:
-                        continue
-                    delta_idx = idx_v[ident_v == idents[enu]][0] - idx_v[ident_v == idents[enu1]][-1]
-                    # i1 before i1
-                else:
-                    delta_idx = 0
-                    # overlapping
-
-                i0s.append(idents[enu])
-                i1s.append(idents[enu1])
-                di.append(delta_idx)
-                df.append(np.abs(med_ident_freq[enu] - med_ident_freq[enu1]))
-
-        i0s = np.array(i0s)
-        i1s = np.array(i1s)
-        di = np.array(di)
         rel_di = (di - np.min(di)) / (np.max(di) - np.min(di))
-        df = np.array(df)
         rel_df = (df - np.min(df)) / (np.max(df) - np.min(df))
-
         error = rel_di + rel_df
-        # embed()
-        # quit()
-        next_message = 0.00
-        for enu, i in enumerate(np.argsort(error)):
-            next_message = include_progress_bar(enu, len(error), 'connecting traces', next_message)
 
-            # if df[enu] >= max_df:
-            #     continue
-            if len(np.intersect1d(idx_v[ident_v ==i0s[i]], idx_v[ident_v == i1s[i]])) > max_overlap_n:
+        # connect traces with a union-find structure, the root keeps its identity:
+        parent = np.arange(len(idents))
+
+        def find(k):
+            root = k
+            while parent[root] != root:
+                root = parent[root]
+            while parent[k] != root:
+                parent[k], k = root, parent[k]
+            return root
+
+        next_message = 0.00
+        for n, i in enumerate(np.argsort(error)):
+            next_message = include_progress_bar(n, len(error), 'connecting traces', next_message)
+            r0 = find(enu[i])
+            r1 = find(enu1[i])
+            if r0 == r1:
                 continue
-            else:
-                ident_v[ident_v == i1s[i]] = i0s[i]
-                i0s[i0s == i1s[i]] = i0s[i]
-                i1s[i1s == i1s[i]] = i0s[i]
+            if len(np.intersect1d(ident_idxs[r0], ident_idxs[r1], assume_unique=True)) > max_overlap_n:
+                continue
+            parent[r1] = r0
+            ident_idxs[r0] = np.union1d(ident_idxs[r0], ident_idxs[r1])
+            ident_idxs[r1] = None
+
+        for k in range(len(idents)):
+            root = find(k)
+            if root != k:
+                ident_v[members[k]] = idents[root]
 
     return ident_v
 
@@ -244,9 +257,59 @@ def estimate_error(a_error, f_error, t_error, a_error_distribution, f_error_dist
     t_e = 0
     return [a_e, f_e, t_e]
 
+
+def estimate_error_matrix(fund0, sign0, fund1, sign1, sorted_a_error_distribution, freq_tolerance=np.inf,
+                          freq_range=(-np.inf, np.inf)):
+    """
+    Error values between all pairs of two sets of fish signals.
+
+    Vectorized version of estimate_error() summing up the amplitude and the frequency error. The amplitude error
+    percentiles are looked up in the sorted amplitude error distribution.
+
+    Parameters
+    ----------
+    fund0: array
+        fundamental frequencies of the signals to be assigned.
+    sign0: 2d-array
+        for each signal in fund0 the power on the electrodes.
+    fund1: array
+        fundamental frequencies of the target signals.
+    sign1: 2d-array
+        for each signal in fund1 the power on the electrodes.
+    sorted_a_error_distribution: array
+        sorted distribution of possible MSE of the amplitudes between random data points in the dataset.
+    freq_tolerance: float
+        pairs with a frequency difference of at least this value in Hz are not connected.
+    freq_range: tuple
+        pairs with a frequency outside this range (min, max) in Hz are not connected.
+
+    Returns
+    -------
+    error_matrix: 2d-array
+        error values for all pairs of signals, rows for fund0 and columns for fund1.
+        NaN for pairs that are not connected.
+    """
+    error_matrix = np.full((len(fund0), len(fund1)), np.nan)
+    f_error = np.abs(fund0[:, None] - fund1[None, :])
+    valid = f_error < freq_tolerance
+    valid &= ((fund0 >= freq_range[0]) & (fund0 <= freq_range[1]))[:, None]
+    valid &= ((fund1 >= freq_range[0]) & (fund1 <= freq_range[1]))[None, :]
+    i0, i1 = np.nonzero(valid)
+    if len(i0) == 0:
+        return error_matrix
+    a_error = np.sqrt(np.sum((sign0[i0] - sign1[i1]) ** 2, axis=1))
+    a_n = np.searchsorted(sorted_a_error_distribution, a_error)
+    a_n[np.isnan(a_error)] = 0
+    a_e = 2. / 3 * a_n / len(sorted_a_error_distribution)
+    f_e = 1. / 3 * boltzmann(f_error[i0, i1], alpha=1, beta=0, x0=.25, dx=.15)
+    error_matrix[i0, i1] = a_e + f_e + 0
+    return error_matrix
+
+
 def freq_tracking_v4(fundamentals, signatures, times, freq_tolerance, n_channels, return_tmp_idenities=False,
                      ioi_fti=False, a_error_distribution=False, f_error_distribution=False, fig = False, ax = False,
-                     freq_lims=(400, 1200), ioi_field=False):
+                     freq_lims=(400, 1200), ioi_field=False, checkpoint_path=None, checkpoint_interval=600.,
+                     resume=False):
     """
     Sorting algorithm which sorts fundamental EOD frequnecies detected in consecutive powespectra of single or
     multielectrode recordings using frequency difference and frequnency-power amplitude difference on the electodes.
@@ -294,6 +357,12 @@ def freq_tracking_v4(fundamentals, signatures, times, freq_tolerance, n_channels
         axis to plot the tracking progress life.
     freq_lims: double
         minimum/maximum frequency to be tracked.
+    checkpoint_path: str
+        if not None, the tracking state is regularly saved to this directory.
+    checkpoint_interval: float
+        minimum time in seconds between two checkpoints.
+    resume: bool
+        continue tracking from the checkpoint in `checkpoint_path`.
 
     Returns
     -------
@@ -336,77 +405,16 @@ def freq_tracking_v4(fundamentals, signatures, times, freq_tolerance, n_channels
 
         """
         # print('clean up')
-        for ident in np.unique(ident_v[~np.isnan(ident_v)]):
-            if np.median(np.abs(np.diff(fund_v[ident_v == ident]))) >= 0.25:
-                ident_v[ident_v == ident] = np.nan
-                continue
-
-            if len(ident_v[ident_v == ident]) <= 10:
-                ident_v[ident_v == ident] = np.nan
-                continue
+        idents, order, ident_offsets = get_ident_index(ident_v)
+        counts = np.diff(ident_offsets)
+        median_steps = get_ident_median_steps(fund_v, order, ident_offsets)
+        remove = (median_steps >= 0.25) | (counts <= 10)
+        ident_v[order[np.repeat(remove, counts)]] = np.nan
 
         return ident_v
 
-    def get_a_and_f_error_dist(fund_v, idx_v, sign_v):
-        """
-        get the distribution of possible frequency and amplitude errors for the tracking.
-
-        Parameters
-        ----------
-        fund_v: array
-            flattened fundamtantals array containing all detected EOD frequencies in the recording.
-        idx_v: array
-            respective index vectro impliing the time of the detected frequency.
-        sign_v: 2d-array
-            for each fundamental frequency the power of this frequency on the used electodes.
-
-        Returns
-        -------
-        f_error_distribution: array
-            possible frequency error distribution for the dataset.
-        a_error_distribution: array
-            possible amplitude error distributions for the dataset.
-        """
-        # get f and amp signature distribution ############### BOOT #######################
-        a_error_distribution = np.zeros(20000)  # distribution of amplitude errors
-        f_error_distribution = np.zeros(20000)  # distribution of frequency errors
-        idx_of_distribution = np.zeros(20000)  # corresponding indices
-
-        b = 0  # loop varialble
-        next_message = 0.  # feedback
-
-        while b < 20000:
-            next_message = include_progress_bar(b, 20000, 'get f and sign dist', next_message)  # feedback
-
-            while True:  # finding compare indices to create initial amp and freq distribution
-                # r_idx0 = np.random.randint(np.max(idx_v[~np.isnan(idx_v)]))
-                r_idx0 = np.random.randint(np.max(idx_v[~np.isnan(idx_v)]))
-                r_idx1 = r_idx0 + 1
-                if len(sign_v[idx_v == r_idx0]) != 0 and len(sign_v[idx_v == r_idx1]) != 0:
-                    break
-
-            r_idx00 = np.random.randint(len(sign_v[idx_v == r_idx0]))
-            r_idx11 = np.random.randint(len(sign_v[idx_v == r_idx1]))
-
-            s0 = sign_v[idx_v == r_idx0][r_idx00]  # amplitude signatures
-            s1 = sign_v[idx_v == r_idx1][r_idx11]
-
-            f0 = fund_v[idx_v == r_idx0][r_idx00]  # fundamentals
-            f1 = fund_v[idx_v == r_idx1][r_idx11]
-
-            # if np.abs(f0 - f1) > freq_tolerance:  # frequency threshold
-            if np.abs(f0 - f1) > 10.:  # frequency threshold
-                continue
-
-            idx_of_distribution[b] = r_idx0
-            a_error_distribution[b] = np.sqrt(np.sum([(s0[k] - s1[k]) ** 2 for k in range(len(s0))]))
-            f_error_distribution[b] = np.abs(f0 - f1)
-            b += 1
-
-        return f_error_distribution, a_error_distribution
-
     def get_tmp_identities(i0_m, i1_m, error_cube, fund_v, idx_v, i, ioi_fti, dps, idx_comp_range,
-                           sign_v, a_error_distribution, f_error_distribution, ioi_field = False, fig=False, ax=False):
+                           sign_v, sorted_a_error_distribution, f_error_distribution, ioi_field = False, fig=False, ax=False):
         """
         extract temporal identities for a datasnippted of 2*index compare range of the original tracking algorithm.
         for each data point in the data window finds the best connection within index compare range and, thus connects
@@ -432,6 +440,12 @@ def freq_tracking_v4(fundamentals, signatures, times, freq_tolerance, n_channels
             detections per second. 1. / 'temporal resolution of the tracking'
         idx_comp_range: int
             index compare range for the assignment of two data points to each other.
+        sign_v: 2d-array
+            signature (relative amplitudes on all electrodes) of each detected EOD frequency.
+        sorted_a_error_distribution: array
+            sorted distribution of signature errors between neighboring fish.
+        f_error_distribution: array
+            distribution of frequency errors between neighboring fish.
 
         Returns
         -------
@@ -694,22 +708,15 @@ def freq_tracking_v4(fundamentals, signatures, times, freq_tolerance, n_channels
             # return tmp_ident_v, errors_to_v, fig, ax
 
         if len(error_line_at) == 3:
+            import matplotlib.pyplot as plt
             total_i0v = np.hstack(i0_m)
             # total_i0v = total_i0v[~np.isnan(tmp_ident_v[total_i0v])]
             total_i1v = np.unique(np.hstack(i1_m))
             # total_i1v = total_i1v[~np.isnan(tmp_ident_v[total_i1v])]
 
-            total_error_m = np.full((len(total_i0v), len(total_i1v)), np.nan)
-
             # ToDo:calculate full error matrix without nans ?!
-            next_message = 0.0
-            for i in range(np.shape(total_error_m)[0]):
-                next_message= include_progress_bar(i,np.shape(total_error_m)[0], 'dada', next_message = next_message )
-                for j in range(np.shape(total_error_m)[1]):
-                    f_error = np.abs(fund_v[total_i0v[i]] - fund_v[total_i1v[j]])
-                    a_error = np.sqrt(np.sum((sign_v[total_i0v[i]] - sign_v[total_i1v[j]]) ** 2))
-                    e = estimate_error(a_error, f_error, 0, a_error_distribution, f_error_distribution)
-                    total_error_m[i, j] = np.sum(e)
+            total_error_m = estimate_error_matrix(fund_v[total_i0v], sign_v[total_i0v], fund_v[total_i1v],
+                                                  sign_v[total_i1v], sorted_a_error_distribution)
 
             # counter = 0
             # total_error_m2 = np.full((len(total_i0v), len(total_i1v)), np.nan)
@@ -801,7 +808,7 @@ def freq_tracking_v4(fundamentals, signatures, times, freq_tolerance, n_channels
         # quit()
         return tmp_ident_v_ret, errors_to_v, plotted
 
-    def get_a_and_f_error_dist2(fund_v, idx_v, sign_v, start_idx, idx_comp_range, freq_lims, low_freq_th, high_freq_th,
+    def get_a_and_f_error_dist2(fund_v, idx_offsets, sign_v, start_idx, idx_comp_range, freq_lims, low_freq_th, high_freq_th,
                                 freq_tolerance, a_error_distribution = np.array([]), f_error_distribution= np.array([])):
         f_error_distribution = list(f_error_distribution)
         a_error_distribution = list(a_error_distribution)
@@ -809,24 +816,22 @@ def freq_tracking_v4(fundamentals, signatures, times, freq_tolerance, n_channels
         # next_message = 0.0
         for i in range(start_idx, int(start_idx + idx_comp_range * 3)):
             # next_message = include_progress_bar(i - start_idx, int(idx_comp_range * 2), 'error dist init', next_message)
-            i0_v = np.arange(len(idx_v))[(idx_v == i) & (fund_v >= freq_lims[0]) & (fund_v <= freq_lims[1])]  # indices of fundamtenals to assign
-            i1_v = np.arange(len(idx_v))[(idx_v > i) & (idx_v <= (i + int(idx_comp_range))) & (fund_v >= freq_lims[0]) & (fund_v <= freq_lims[1])]  # indices of possible targets
+            i0_v = get_time_range(idx_offsets, i, i + 1)  # indices of fundamtenals to assign
+            i0_v = i0_v[(fund_v[i0_v] >= freq_lims[0]) & (fund_v[i0_v] <= freq_lims[1])]
+            i1_v = get_time_range(idx_offsets, i + 1, i + int(idx_comp_range) + 1)  # indices of possible targets
+            i1_v = i1_v[(fund_v[i1_v] >= freq_lims[0]) & (fund_v[i1_v] <= freq_lims[1])]
 
             if len(i0_v) == 0 or len(i1_v) == 0:  # if nothing to assign or no targets continue
                 continue
 
-            for enu0 in range(len(fund_v[i0_v])):
-                if fund_v[i0_v[enu0]] < low_freq_th or fund_v[i0_v[enu0]] > high_freq_th:
-                    continue
-                for enu1 in range(len(fund_v[i1_v])):
-                    if fund_v[i1_v[enu1]] < low_freq_th or fund_v[i1_v[enu1]] > high_freq_th:
-                        continue
-                    if np.abs(fund_v[i0_v[enu0]] - fund_v[i1_v[enu1]]) >= freq_tolerance:  # freq difference to high
-                        continue
-                    a_error_distribution.append(np.sqrt(np.sum(
-                        [(sign_v[i0_v[enu0]][k] - sign_v[i1_v[enu1]][k]) ** 2 for k in
-                         range(len(sign_v[i0_v[enu0]]))])))
-                    f_error_distribution.append(np.abs(fund_v[i0_v[enu0]] - fund_v[i1_v[enu1]]))
+            # all pairs within the frequency range and the frequency tolerance:
+            f_error = np.abs(fund_v[i0_v][:, None] - fund_v[i1_v][None, :])
+            valid = f_error < freq_tolerance
+            valid &= ((fund_v[i0_v] >= low_freq_th) & (fund_v[i0_v] <= high_freq_th))[:, None]
+            valid &= ((fund_v[i1_v] >= low_freq_th) & (fund_v[i1_v] <= high_freq_th))[None, :]
+            enu0, enu1 = np.nonzero(valid)
+            a_error_distribution.extend(np.sqrt(np.sum((sign_v[i0_v[enu0]] - sign_v[i1_v[enu1]]) ** 2, axis=1)))
+            f_error_distribution.extend(f_error[enu0, enu1])
 
         return np.array(a_error_distribution)[-5000:], np.array(f_error_distribution)[-5000:]
 
@@ -858,6 +863,7 @@ def freq_tracking_v4(fundamentals, signatures, times, freq_tolerance, n_channels
         sign_v.extend(signatures[enu])
     idx_v = np.array(idx_v, dtype=int)
     sign_v = np.array(sign_v)
+    idx_offsets = get_idx_offsets(idx_v, len(fundamentals))
 
     # sign_v = (10.**sign_v) / 10.
     # embed()
@@ -878,45 +884,42 @@ def freq_tracking_v4(fundamentals, signatures, times, freq_tolerance, n_channels
     next_message = 0.
     start_idx = 0 if not ioi_fti else idx_v[ioi_fti] # Index Of Interest for temporal identities
 
-    a_error_distribution, f_error_distribution = get_a_and_f_error_dist2(fund_v, idx_v, sign_v, start_idx, idx_comp_range, freq_lims, low_freq_th, high_freq_th, freq_tolerance)
+    # continue from the last checkpoint of the tracking:
+    if return_tmp_idenities or ioi_fti:
+        checkpoint_path = None
+    checkpoint_params = dict(n_fundamentals=len(fund_v), n_times=len(fundamentals), freq_tolerance=freq_tolerance,
+                             freq_lims=tuple(freq_lims), n_channels=n_channels)
+    state = None
+    if checkpoint_path and resume:
+        state = load_checkpoint(checkpoint_path, 'tracking', checkpoint_params)
+    if state is not None:
+        print('continue tracking from checkpoint at %.1fs' % times[state['i']])
+        a_error_distribution = state['a_error_distribution']
+        f_error_distribution = state['f_error_distribution']
+    else:
+        a_error_distribution, f_error_distribution = get_a_and_f_error_dist2(fund_v, idx_offsets, sign_v, start_idx, idx_comp_range, freq_lims, low_freq_th, high_freq_th, freq_tolerance)
+    sorted_a_error_distribution = np.sort(a_error_distribution)
     # t0 = time.time()
 
-    for i in range(start_idx, int(start_idx + idx_comp_range*3)):
+    if state is None:
+        for i in range(start_idx, int(start_idx + idx_comp_range*3)):
+            next_message = include_progress_bar(i - start_idx, int(idx_comp_range*2), 'initial error cube', next_message)
+            i0_v = get_time_range(idx_offsets, i, i + 1)  # indices of fundamtenals to assign
+            i0_v = i0_v[(fund_v[i0_v] >= freq_lims[0]) & (fund_v[i0_v] <= freq_lims[1])]
+            i1_v = get_time_range(idx_offsets, i + 1, i + int(idx_comp_range) + 1)  # indices of possible targets
+            i1_v = i1_v[(fund_v[i1_v] >= freq_lims[0]) & (fund_v[i1_v] <= freq_lims[1])]
 
-        next_message = include_progress_bar(i - start_idx, int(idx_comp_range*2), 'initial error cube', next_message)
-        i0_v = np.arange(len(idx_v))[(idx_v == i) & (fund_v >= freq_lims[0]) & (fund_v <= freq_lims[1])]  # indices of fundamtenals to assign
-        i1_v = np.arange(len(idx_v))[(idx_v > i) & (idx_v <= (i + int(idx_comp_range))) & (fund_v >= freq_lims[0]) & (fund_v <= freq_lims[1])]  # indices of possible targets
-
-        i0_m.append(i0_v)
-        i1_m.append(i1_v)
-
-        if len(i0_v) == 0 or len(i1_v) == 0:  # if nothing to assign or no targets continue
-            error_cube.append(np.array([[]]))
-            continue
-        try:
-            error_matrix = np.full((len(i0_v), len(i1_v)), np.nan)
-        except:
-            error_matrix = np.zeros((len(i0_v), len(i1_v))) / 0.
+            i0_m.append(i0_v)
+            i1_m.append(i1_v)
 
-        for enu0 in range(len(fund_v[i0_v])):
-            if fund_v[i0_v[enu0]] < low_freq_th or fund_v[
-                i0_v[enu0]] > high_freq_th:  # freq to assigne out of tracking range
+            if len(i0_v) == 0 or len(i1_v) == 0:  # if nothing to assign or no targets continue
+                error_cube.append(np.array([[]]))
                 continue
-            for enu1 in range(len(fund_v[i1_v])):
-                if fund_v[i1_v[enu1]] < low_freq_th or fund_v[
-                    i1_v[enu1]] > high_freq_th:  # target freq out of tracking range
-                    continue
-                if np.abs(fund_v[i0_v[enu0]] - fund_v[i1_v[enu1]]) >= freq_tolerance:  # freq difference to high
-                    continue
-
-                a_error = np.sqrt(
-                    np.sum([(sign_v[i0_v[enu0]][j] - sign_v[i1_v[enu1]][j]) ** 2 for j in range(n_channels)]))
-                f_error = np.abs(fund_v[i0_v[enu0]] - fund_v[i1_v[enu1]])
-                t_error = 1. * np.abs(idx_v[i0_v[enu0]] - idx_v[i1_v[enu1]]) / dps
-
-                error = estimate_error(a_error, f_error, t_error, a_error_distribution, f_error_distribution)
-                error_matrix[enu0, enu1] = np.sum(error)
-        error_cube.append(error_matrix)
+            # errors of all pairs within the tracking range and the frequency tolerance:
+            error_matrix = estimate_error_matrix(fund_v[i0_v], sign_v[i0_v, :n_channels], fund_v[i1_v],
+                                                 sign_v[i1_v, :n_channels], sorted_a_error_distribution,
+                                                 freq_tolerance, (low_freq_th, high_freq_th))
+            error_cube.append(error_matrix)
 
     cube_app_idx = len(error_cube)
 
@@ -926,6 +929,20 @@ def freq_tracking_v4(fundamentals, signatures, times, freq_tolerance, n_channels
     plotted = False
     plotting_finished = False
 
+    resume_idx = 0
+    if state is not None:
+        resume_idx = state['i']
+        ident_v = state['ident_v']
+        idx_of_origin_v = state['idx_of_origin_v']
+        tmp_ident_v = state['tmp_ident_v']
+        i0_m = state['i0_m']
+        i1_m = state['i1_m']
+        error_cube = state['error_cube']
+        cube_app_idx = state['cube_app_idx']
+        next_identity = state['next_identity']
+        next_cleanup = state['next_cleanup']
+    last_checkpoint = time.time()
+
     # embed()
     # quit()
 
@@ -940,6 +957,17 @@ def freq_tracking_v4(fundamentals, signatures, times, freq_tolerance, n_channels
     t00 = time.time()
 
     for enu, i in enumerate(np.arange(len(fundamentals))):
+        if i < resume_idx:
+            continue
+        if checkpoint_path and i > resume_idx and enu % idx_comp_range == 0 and \
+           time.time() - last_checkpoint >= checkpoint_interval:
+            save_checkpoint(checkpoint_path, 'tracking',
+                            dict(params=checkpoint_params, i=i, ident_v=ident_v, idx_of_origin_v=idx_of_origin_v,
+                                 tmp_ident_v=tmp_ident_v, a_error_distribution=a_error_distribution,
+                                 f_error_distribution=f_error_distribution, i0_m=i0_m, i1_m=i1_m,
+                                 error_cube=error_cube, cube_app_idx=cube_app_idx, next_identity=next_identity,
+                                 next_cleanup=next_cleanup))
+            last_checkpoint = time.time()
         # print(enu)
         if time.time() - t00 >= 300:
             print('%.2f speed' %(((i - start_idx) / dps) / (time.time() - t0) ) )
@@ -955,9 +983,10 @@ def freq_tracking_v4(fundamentals, signatures, times, freq_tolerance, n_channels
         if enu % idx_comp_range == 0:
             # t0 = time.time()
             # print('\ndist')
-            a_error_distribution, f_error_distribution = get_a_and_f_error_dist2(fund_v, idx_v, sign_v, start_idx,idx_comp_range, freq_lims, low_freq_th,high_freq_th, freq_tolerance, a_error_distribution = a_error_distribution, f_error_distribution = f_error_distribution)
+            a_error_distribution, f_error_distribution = get_a_and_f_error_dist2(fund_v, idx_offsets, sign_v, start_idx,idx_comp_range, freq_lims, low_freq_th,high_freq_th, freq_tolerance, a_error_distribution = a_error_distribution, f_error_distribution = f_error_distribution)
+            sorted_a_error_distribution = np.sort(a_error_distribution)
             # print('\ntmp idents')
-            tmp_ident_v, errors_to_v, plotted = get_tmp_identities(i0_m, i1_m, error_cube, fund_v, idx_v, i, ioi_fti, dps, idx_comp_range, sign_v, a_error_distribution, f_error_distribution, ioi_field, fig, ax)
+            tmp_ident_v, errors_to_v, plotted = get_tmp_identities(i0_m, i1_m, error_cube, fund_v, idx_v, i, ioi_fti, dps, idx_comp_range, sign_v, sorted_a_error_distribution, f_error_distribution, ioi_field, fig, ax)
 
 
             if step_plot:
@@ -1385,8 +1414,10 @@ def freq_tracking_v4(fundamentals, signatures, times, freq_tolerance, n_channels
         i1_m.pop(0)
         error_cube.pop(0)
 
-        i0_v = np.arange(len(idx_v))[(idx_v == cube_app_idx) & (fund_v >= freq_lims[0]) & (fund_v <= freq_lims[1])]  # indices of fundamtenals to assign
-        i1_v = np.arange(len(idx_v))[(idx_v > cube_app_idx) & (idx_v <= (cube_app_idx + idx_comp_range)) & (fund_v >= freq_lims[0]) & (fund_v <= freq_lims[1])]  # indices of possible targets
+        i0_v = get_time_range(idx_offsets, cube_app_idx, cube_app_idx + 1)  # indices of fundamtenals to assign
+        i0_v = i0_v[(fund_v[i0_v] >= freq_lims[0]) & (fund_v[i0_v] <= freq_lims[1])]
+        i1_v = get_time_range(idx_offsets, cube_app_idx + 1, cube_app_idx + idx_comp_range + 1)  # indices of possible targets
+        i1_v = i1_v[(fund_v[i1_v] >= freq_lims[0]) & (fund_v[i1_v] <= freq_lims[1])]
 
         i0_m.append(i0_v)
         i1_m.append(i1_v)
@@ -1395,28 +1426,9 @@ def freq_tracking_v4(fundamentals, signatures, times, freq_tolerance, n_channels
             error_cube.append(np.array([[]]))
 
         else:
-            try:
-                error_matrix = np.full((len(i0_v), len(i1_v)), np.nan)
-            except:
-                error_matrix = np.zeros((len(i0_v), len(i1_v))) / 0.
-
-            for enu0 in range(len(fund_v[i0_v])):
-                if fund_v[i0_v[enu0]] < low_freq_th or fund_v[i0_v[enu0]] > high_freq_th:  # freq to assigne out of tracking range
-                    continue
-
-                for enu1 in range(len(fund_v[i1_v])):
-                    if fund_v[i1_v[enu1]] < low_freq_th or fund_v[i1_v[enu1]] > high_freq_th:  # target freq out of tracking range
-                        continue
-                    if np.abs(fund_v[i0_v[enu0]] - fund_v[i1_v[enu1]]) >= freq_tolerance:  # freq difference to high
-                        continue
-
-                    a_error = np.sqrt(
-                        np.sum([(sign_v[i0_v[enu0]][j] - sign_v[i1_v[enu1]][j]) ** 2 for j in range(n_channels)]))
-                    f_error = np.abs(fund_v[i0_v[enu0]] - fund_v[i1_v[enu1]])
-                    t_error = 1. * np.abs(idx_v[i0_v[enu0]] - idx_v[i1_v[enu1]]) / dps
-
-                    error = estimate_error(a_error, f_error, t_error, a_error_distribution, f_error_distribution)
-                    error_matrix[enu0, enu1] = np.sum(error)
+            error_matrix = estimate_error_matrix(fund_v[i0_v], sign_v[i0_v, :n_channels], fund_v[i1_v],
+                                                 sign_v[i1_v, :n_channels], sorted_a_error_distribution,
+                                                 freq_tolerance, (low_freq_th, high_freq_th))
             error_cube.append(error_matrix)
 
         cube_app_idx += 1
@@ -2204,7 +2216,8 @@ def freq_tracking_v4(fundamentals, signatures, times, freq_tolerance, n_channels
 
 
 def add_tracker_config(cfg, data_snippet_secs = 15., nffts_per_psd = 1, fresolution =.25, overlap_frac = .95,
-                       freq_tolerance = 10., rise_f_th = 0.5, prim_time_tolerance = 1., max_time_tolerance = 10., f_th=2.):
+                       freq_tolerance = 10., rise_f_th = 0.5, prim_time_tolerance = 1., max_time_tolerance = 10., f_th=2.,
+                       dtype='float64', checkpoint_interval=600.):
     """ Add parameter needed for fish_tracker() as
     a new section to a configuration.
 
@@ -2230,6 +2243,10 @@ def add_tracker_config(cfg, data_snippet_secs = 15., nffts_per_psd = 1, fresolut
         maximum time difference in minutes between two fishes to combine these.
     f_th: float
         maximum frequency difference between two fishes to combine these in last combining step.
+    dtype: string
+        data type of the loaded data and the spectrograms ('float64' or 'float32').
+    checkpoint_interval: float
+        minimum time in seconds between checkpoints of the extraction and tracking state.
     """
     cfg.add_section('Fish tracking:')
     cfg.add('DataSnippedSize', data_snippet_secs, 's', 'Duration of data snipped processed at once in seconds.')
@@ -2241,6 +2258,8 @@ def add_tracker_config(cfg, data_snippet_secs = 15., nffts_per_psd = 1, fresolut
     cfg.add('PrimTimeTolerance', prim_time_tolerance, 'min', 'Time tolerance in the first fish sorting step.')
     cfg.add('MaxTimeTolerance', max_time_tolerance, 'min', 'Time tolerance between the occurrance of two fishes to join them.')
     cfg.add('FrequencyThreshold', f_th, 'Hz', 'Maximum Frequency difference between two fishes to join them.')
+    cfg.add('DataType', dtype, '', 'Data type of the loaded data and the spectrograms ("float64" or "float32").')
+    cfg.add('CheckpointInterval', checkpoint_interval, 's', 'Minimum time between checkpoints of automatic tracking runs.')
 
 
 def tracker_args(cfg):
@@ -2266,7 +2285,9 @@ def tracker_args(cfg):
                     'rise_f_th': 'RiseFreqTh',
                     'prim_time_tolerance': 'PrimTimeTolerance',
                     'max_time_tolerance': 'MaxTimeTolerance',
-                    'f_th': 'FrequencyThreshold'})
+                    'f_th': 'FrequencyThreshold',
+                    'dtype': 'DataType',
+                    'checkpoint_interval': 'CheckpointInterval'})
 
 
 def get_grid_proportions(data, grid=False, n_tolerance_e=2, verbose=0):
@@ -2361,37 +2382,6 @@ def get_grid_proportions(data, grid=False, n_tolerance_e=2, verbose=0):
     return channels, positions, np.array(neighbours)
 
 
-def load_matfile(data_file):
-    """
-    loads matlab files trying two possible methodes.
-
-    Parameters
-    ----------
-    data_file: str
-        datapath.
-
-    Returns
-    -------
-    data: array
-        nd-array with the recorded data. Dimensions vary with the used  number of recording electrodes.
-    samplerate: int
-        samplerate of the data
-
-    """
-    try:
-        import h5py
-        mat = h5py.File(data_file)
-        data = np.array(mat['elec']['data']).transpose()
-        samplerate = mat['elec']['meta']['Fs'][0][0]
-    except:
-        from scipy.io import loadmat
-        mat = loadmat(data_file, variable_names=['elec'])
-        data = np.array(mat['elec']['data'][0][0])
-        samplerate = mat['elec']['meta'][0][0][0][0][1][0][0]
-
-    return data, samplerate
-
-
 def include_progress_bar(loop_v, loop_end, taskname ='', next_message=0.00):
     """
     creates based on the progress of a loop a progressbar in a linux shell-
@@ -2434,10 +2424,189 @@ def include_progress_bar(loop_v, loop_end, taskname ='', next_message=0.00):
     return next_message
 
 
+def save_checkpoint(checkpoint_path, stage, state):
+    """
+    Write the state of a processing stage to a checkpoint file.
+
+    The file is first written to a temporary file and then renamed,
+    such that an interrupted write never corrupts the last checkpoint.
+
+    Parameters
+    ----------
+    checkpoint_path: str
+        directory for the checkpoint files.
+    stage: str
+        name of the processing stage, e.g. 'extraction' or 'tracking'.
+    state: dict
+        variables needed to continue the processing stage.
+    """
+    if not os.path.isdir(checkpoint_path):
+        os.makedirs(checkpoint_path)
+    filename = os.path.join(checkpoint_path, stage + '.pkl')
+    with open(filename + '.tmp', 'wb') as f:
+        pickle.dump(state, f, pickle.HIGHEST_PROTOCOL)
+    os.replace(filename + '.tmp', filename)
+
+
+def load_checkpoint(checkpoint_path, stage, params):
+    """
+    Load the state of a processing stage from a checkpoint file.
+
+    Parameters
+    ----------
+    checkpoint_path: str
+        directory with the checkpoint files.
+    stage: str
+        name of the processing stage, e.g. 'extraction' or 'tracking'.
+    params: dict
+        parameters of the current run. The checkpoint is only used if
+        it has been written with the same parameters.
+
+    Returns
+    -------
+    state: dict or None
+        variables needed to continue the processing stage,
+        None if there is no matching checkpoint.
+    """
+    filename = os.path.join(checkpoint_path, stage + '.pkl')
+    if not os.path.isfile(filename):
+        return None
+    with open(filename, 'rb') as f:
+        state = pickle.load(f)
+    if state['params'] != params:
+        print('checkpoint %s does not match the current run, start from scratch' % filename)
+        return None
+    return state
+
+
+class SharedArray(object):
+    """
+    Numpy array in a shared memory block that can be passed to worker processes.
+
+    Only the name, shape and dtype of the block are pickled, so that
+    workers access the data without serialization and copying.
+    """
+    def __init__(self, shape, dtype):
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        nbytes = max(1, int(np.prod(self.shape))*self.dtype.itemsize)
+        self.shm = SharedMemory(create=True, size=nbytes)
+        self.name = self.shm.name
+        self.owner = True
+        self.array = np.ndarray(self.shape, self.dtype, buffer=self.shm.buf)
+
+    def __getstate__(self):
+        return (self.name, self.shape, self.dtype.str)
+
+    def __setstate__(self, state):
+        self.name, self.shape, dtype = state
+        self.dtype = np.dtype(dtype)
+        try:
+            self.shm = SharedMemory(name=self.name, track=False)
+        except TypeError:
+            # the creating process and not the worker is responsible for unlinking:
+            self.shm = SharedMemory(name=self.name)
+            resource_tracker.unregister(self.shm._name, 'shared_memory')
+        self.owner = False
+        self.array = np.ndarray(self.shape, self.dtype, buffer=self.shm.buf)
+
+    def close(self):
+        """ Release the memory block. Call unlink() as well in the creating process. """
+        self.array = None
+        self.shm.close()
+
+    def detach(self):
+        """ Release the memory block if it was attached by a worker process. """
+        if not self.owner:
+            self.close()
+
+    def unlink(self):
+        self.shm.unlink()
+
+
+def shared_spectrogram(args):
+    """
+    Compute the spectrogram of a single channel of a snippet in shared memory.
+
+    Parameters
+    ----------
+    args: tuple
+        The spectrogram function, the channel, the snippet as `SharedArray`
+        with channels as first dimension, the number of valid samples,
+        and the `SharedArray` receiving the spectra with channels as
+        first, frequencies as second, and times as third dimension.
+
+    Returns
+    -------
+    spec: 2-D array or None
+        The spectrogram if it does not fit into the shared output array, otherwise None.
+    freqs: array
+        Frequencies of the spectrogram.
+    times: array
+        Times of the spectrogram.
+    ntimes: int
+        Number of time bins of the spectrogram.
+    """
+    func, channel, snippet, n, spectra = args
+    spec, freqs, times = func(snippet.array[channel, :n])
+    ntimes = spec.shape[1]
+    if spec.shape[0] == spectra.shape[1] and ntimes <= spectra.shape[2]:
+        spectra.array[channel, :, :ntimes] = spec
+        spec = None
+    snippet.detach()
+    spectra.detach()
+    return spec, freqs, times, ntimes
+
+
+def max_pool_spectrogram(spectra, freqs, times, freq_borders, time_borders, pooled):
+    """
+    Maximum power of a spectrogram within the bins of a coarser plot matrix.
+
+    Bins of `pooled` that do not contain any frequency or time of the
+    spectrogram are left untouched.
+
+    Parameters
+    ----------
+    spectra: 2-D array
+        Spectrogram with frequencies as first and times as second dimension.
+        Only the first `len(times)` columns are used.
+    freqs: 1-D array
+        Sorted frequencies of the spectrogram.
+    times: 1-D array
+        Sorted times of the spectrogram.
+    freq_borders: 1-D array
+        Borders of the frequency bins of `pooled`.
+    time_borders: 1-D array
+        Borders of the time bins of `pooled`.
+    pooled: 2-D array
+        Plot matrix of shape `(len(freq_borders)-1, len(time_borders)-1)`
+        that is updated in place.
+    """
+    def bin_starts(values, borders):
+        bins = np.searchsorted(borders, values, side='right') - 1
+        valid = np.flatnonzero((bins >= 0) & (bins < len(borders) - 1))
+        if len(valid) == 0:
+            return valid, valid, valid
+        bins = bins[valid]
+        starts = np.flatnonzero(np.diff(np.concatenate(([-1], bins))))
+        return valid, bins[starts], starts
+
+    f_valid, f_bins, f_starts = bin_starts(freqs, freq_borders)
+    t_valid, t_bins, t_starts = bin_starts(times, time_borders)
+    if len(f_bins) == 0 or len(t_bins) == 0:
+        return
+    block = spectra[f_valid[0]:f_valid[-1] + 1, t_valid[0]:t_valid[-1] + 1]
+    block = np.maximum.reduceat(block, f_starts, axis=0)
+    block = np.maximum.reduceat(block, t_starts, axis=1)
+    pooled[np.ix_(f_bins, t_bins)] = block
+
+
 def get_spectrum_funds_amp_signature(data, samplerate, channels, data_snippet_idxs, start_time, end_time, fresolution = 0.5,
                                      overlap_frac=.9, nffts_per_psd= 2, comp_min_freq= 0., comp_max_freq = 2000., plot_harmonic_groups=False,
                                      create_plotable_spectrogram=False, extract_funds_and_signature=True,
-                                     create_fill_spec = False, noice_cancel = False, filename = None, **kwargs):
+                                     create_fill_spec = False, noice_cancel = False, filename = None, dtype = None,
+                                     pool = None, shared_snippets = True, spec_tiles = None,
+                                     checkpoint_path = None, checkpoint_interval = 600., resume = False, **kwargs):
     fundamentals = []
     positions = []
     times = np.array([])
@@ -2464,228 +2633,249 @@ def get_spectrum_funds_amp_signature(data, samplerate, channels, data_snippet_id
     # create spectra plot ####
     get_spec_plot_matrix = False
 
-    if create_fill_spec:
-        first_run = True
-        pre_save_spectra = np.array([])
-
-    while start_idx <= end_idx:
-        if create_fill_spec:
-            fill_spec_str = None
-            memmap = None
-            next_message = include_progress_bar(start_idx - init_idx + data_snippet_idxs, end_idx - init_idx,
-                                                'get refill spec', next_message)
-        else:
-            if create_plotable_spectrogram and not extract_funds_and_signature:
-                next_message = include_progress_bar(start_idx - init_idx + data_snippet_idxs, end_idx - init_idx,
-                                                    'get plotable spec', next_message)
-            elif not create_plotable_spectrogram and extract_funds_and_signature:
+    # worker pool used for all snippets, spectrograms and harmonic groups:
+    core_count = multiprocessing.cpu_count()
+    own_pool = pool is None or plot_harmonic_groups
+    if plot_harmonic_groups:
+        pool = multiprocessing.Pool(1)
+    elif own_pool:
+        pool = multiprocessing.Pool(max(1, core_count // 2))
+
+    # snippet and spectra in shared memory for the spectrogram workers:
+    shared_snippets = shared_snippets and SharedMemory is not None
+    snippet = None
+    shared_spectra = None
+
+    # continue from the last checkpoint of the extraction:
+    checkpoint_params = dict(start_idx=start_idx, end_idx=end_idx, data_snippet_idxs=data_snippet_idxs,
+                             channels=[int(c) for c in channels], noice_cancel=noice_cancel,
+                             fresolution=fresolution, overlap_frac=overlap_frac, nffts_per_psd=nffts_per_psd,
+                             comp_min_freq=comp_min_freq, comp_max_freq=comp_max_freq,
+                             create_plotable_spectrogram=create_plotable_spectrogram,
+                             extract_funds_and_signature=extract_funds_and_signature,
+                             harmonic_groups=dict(kwargs))
+    finished = False
+    if checkpoint_path and resume:
+        state = load_checkpoint(checkpoint_path, 'extraction', checkpoint_params)
+        if state is not None:
+            print('continue extraction from checkpoint at %.1fs' % (state['start_idx'] / samplerate))
+            start_idx = state['start_idx']
+            finished = state['finished']
+            fundamentals = state['fundamentals']
+            signatures = state['signatures']
+            positions = state['positions']
+            times = state['times']
+            if create_plotable_spectrogram:
+                tmp_spectra = state['tmp_spectra']
+                x_borders = state['x_borders']
+                y_borders = state['y_borders']
+                get_spec_plot_matrix = True
+            if spec_tiles is not None:
+                # continue the tiles of the already extracted part:
+                tiles_state = state.get('spec_tiles')
+                if tiles_state is not None and tiles_state['tilespath'] == spec_tiles.tilespath:
+                    spec_tiles.restore(tiles_state)
+                else:
+                    print('no spectrogram tiles in checkpoint, %s is not written' % spec_tiles.tilespath)
+                    spec_tiles = None
+    last_checkpoint = time.time()
+
+    try:
+        while start_idx <= end_idx and not finished:
+            if create_fill_spec:
                 next_message = include_progress_bar(start_idx - init_idx + data_snippet_idxs, end_idx - init_idx,
-                                                    'extract fundamentals', next_message)
+                                                    'get refill spec', next_message)
             else:
-                next_message = include_progress_bar(start_idx - init_idx + data_snippet_idxs, end_idx - init_idx,
-                                                    'extract funds and spec', next_message)
-
-        if start_idx >= end_idx - data_snippet_idxs:
-            last_run = True
-
-        # calulate spectogram ....
-        core_count = multiprocessing.cpu_count()
-
-        if plot_harmonic_groups:
-            pool = multiprocessing.Pool(1)
-        else:
-            pool = multiprocessing.Pool(core_count // 2)
-            # pool = multiprocessing.Pool(core_count - 1)
-
-        nfft = next_power_of_two(samplerate / fresolution)
-
-        if create_fill_spec:
-            fresolution = 0.5
-            overlap_frac=.8
-
-        func = partial(spectrogram, samplerate=samplerate, fresolution=fresolution, overlap_frac=overlap_frac)
-
-        if noice_cancel:
-            # print('denoiced')
-            denoiced_data = np.array([data[start_idx: start_idx + data_snippet_idxs, channel] for channel in channels])
-            # print(denoiced_data.shape)
-            mean_data = np.mean(denoiced_data, axis = 0)
-            # mean_data.shape = (len(mean_data), 1)
-            denoiced_data -=mean_data
-
-
-            a = pool.map(func, denoiced_data)
-        # self.data = self.data - mean_data
-        else:
-            if len(np.shape(data)) == 1:
-                a = pool.map(func, [data[start_idx: start_idx + data_snippet_idxs]])  # ret: spec, freq, time
+                if create_plotable_spectrogram and not extract_funds_and_signature:
+                    next_message = include_progress_bar(start_idx - init_idx + data_snippet_idxs, end_idx - init_idx,
+                                                        'get plotable spec', next_message)
+                elif not create_plotable_spectrogram and extract_funds_and_signature:
+                    next_message = include_progress_bar(start_idx - init_idx + data_snippet_idxs, end_idx - init_idx,
+                                                        'extract fundamentals', next_message)
+                else:
+                    next_message = include_progress_bar(start_idx - init_idx + data_snippet_idxs, end_idx - init_idx,
+                                                        'extract funds and spec', next_message)
+
+            if start_idx >= end_idx - data_snippet_idxs:
+                last_run = True
+
+            # calulate spectogram ....
+            nfft = next_power_of_two(samplerate / fresolution)
+
+            if create_fill_spec:
+                fresolution = 0.5
+                overlap_frac=.8
+
+            func = partial(spectrogram, samplerate=samplerate, fresolution=fresolution, overlap_frac=overlap_frac,
+                           dtype=dtype)
+
+            if shared_snippets:
+                # write snippet once into shared memory, workers compute on views:
+                n_channels = 1 if len(np.shape(data)) == 1 else len(channels)
+                if snippet is None:
+                    snippet = SharedArray((n_channels, data_snippet_idxs), np.float64 if dtype is None else dtype)
+                n = min(data_snippet_idxs, len(data) - start_idx)
+                if len(np.shape(data)) == 1:
+                    snippet.array[0, :n] = data[start_idx: start_idx + n]
+                else:
+                    for k, channel in enumerate(channels):
+                        snippet.array[k, :n] = data[start_idx: start_idx + n, channel]
+                if noice_cancel:
+                    snippet.array[:, :n] -= np.mean(snippet.array[:, :n], axis=0)
+                n_fft = next_power_of_two(samplerate / fresolution)
+                n_overlap = int(n_fft * overlap_frac)
+                spectra_shape = (n_channels, n_fft // 2 + 1, max(1, (data_snippet_idxs - n_overlap) // (n_fft - n_overlap)))
+                if shared_spectra is None or shared_spectra.shape != spectra_shape:
+                    spectra = None
+                    if shared_spectra is not None:
+                        shared_spectra.close()
+                        shared_spectra.unlink()
+                    shared_spectra = SharedArray(spectra_shape, np.float64 if dtype is None else dtype)
+                a = pool.map(shared_spectrogram, [(func, k, snippet, n, shared_spectra) for k in range(n_channels)])
+                n_times = a[0][3]
+                if all([a[k][0] is None for k in range(len(a))]):
+                    spectra = shared_spectra.array[:, :, :n_times]
+                else:
+                    spectra = [shared_spectra.array[k, :, :n_times] if a[k][0] is None else a[k][0]
+                               for k in range(len(a))]
+            elif noice_cancel:
+                # print('denoiced')
+                denoiced_data = np.array([data[start_idx: start_idx + data_snippet_idxs, channel] for channel in channels])
+                # print(denoiced_data.shape)
+                mean_data = np.mean(denoiced_data, axis = 0)
+                # mean_data.shape = (len(mean_data), 1)
+                denoiced_data -=mean_data
+
+
+                a = pool.map(func, denoiced_data)
+            # self.data = self.data - mean_data
             else:
-                a = pool.map(func, [data[start_idx: start_idx + data_snippet_idxs, channel] for channel in
-                                    channels])  # ret: spec, freq, time
+                if len(np.shape(data)) == 1:
+                    a = pool.map(func, [data[start_idx: start_idx + data_snippet_idxs]])  # ret: spec, freq, time
+                else:
+                    a = pool.map(func, [data[start_idx: start_idx + data_snippet_idxs, channel] for channel in
+                                        channels])  # ret: spec, freq, time
 
-        spectra = [a[channel][0] for channel in range(len(a))]
-        spec_freqs = a[0][1]
-        spec_times = a[0][2]
-        pool.terminate()
+            if not shared_snippets:
+                spectra = [a[channel][0] for channel in range(len(a))]
+            spec_freqs = a[0][1]
+            spec_times = a[0][2]
 
-        comb_spectra = np.sum(spectra, axis=0)
+            comb_spectra = np.sum(spectra, axis=0)
 
-        if nffts_per_psd == 1:
-            tmp_times = spec_times - ((nfft / samplerate) / 2) + (start_idx / samplerate)
-        else:
-            tmp_times = spec_times[:-(nffts_per_psd - 1)] - ((nfft / samplerate) / 2) + (start_idx / samplerate)
-
-        # etxtract reduced spectrum for plot
-        plot_freqs = spec_freqs[spec_freqs < comp_max_freq]
-        plot_spectra = np.sum(spectra, axis=0)[spec_freqs < comp_max_freq]
-
-        if create_plotable_spectrogram:
-            # if not checked_xy_borders:
-            if not get_spec_plot_matrix:
-                fig_xspan = 20.
-                fig_yspan = 12.
-                fig_dpi = 80.
-                no_x = fig_xspan * fig_dpi
-                no_y = fig_yspan * fig_dpi
-
-                min_x = start_time
-                max_x = end_time
-
-                min_y = comp_min_freq
-                max_y = comp_max_freq
-
-                x_borders = np.linspace(min_x, max_x, no_x * 2)
-                y_borders = np.linspace(min_y, max_y, no_y * 2)
-                # checked_xy_borders = False
-
-                tmp_spectra = np.zeros((len(y_borders) - 1, len(x_borders) - 1))
-
-                recreate_matrix = False
-                if (tmp_times[1] - tmp_times[0]) > (x_borders[1] - x_borders[0]):
-                    x_borders = np.linspace(min_x, max_x, (max_x - min_x) // (tmp_times[1] - tmp_times[0]) + 1)
-                    recreate_matrix = True
-                if (spec_freqs[1] - spec_freqs[0]) > (y_borders[1] - y_borders[0]):
-                    recreate_matrix = True
-                    y_borders = np.linspace(min_y, max_y, (max_y - min_y) // (spec_freqs[1] - spec_freqs[0]) + 1)
-                if recreate_matrix:
-                    tmp_spectra = np.zeros((len(y_borders) - 1, len(x_borders) - 1))
+            if nffts_per_psd == 1:
+                tmp_times = spec_times - ((nfft / samplerate) / 2) + (start_idx / samplerate)
+            else:
+                tmp_times = spec_times[:-(nffts_per_psd - 1)] - ((nfft / samplerate) / 2) + (start_idx / samplerate)
 
-                get_spec_plot_matrix = True
-                # checked_xy_borders = True
+            # etxtract reduced spectrum for plot
+            plot_freqs = spec_freqs[spec_freqs < comp_max_freq]
+            plot_spectra = np.sum(spectra, axis=0)[spec_freqs < comp_max_freq]
 
-            for i in range(len(y_borders) - 1):
-                for j in range(len(x_borders) - 1):
-                    if x_borders[j] > tmp_times[-1]:
-                        break
-                    if x_borders[j + 1] < tmp_times[0]:
-                        continue
+            if create_plotable_spectrogram:
+                # if not checked_xy_borders:
+                if not get_spec_plot_matrix:
+                    fig_xspan = 20.
+                    fig_yspan = 12.
+                    fig_dpi = 80.
+                    no_x = fig_xspan * fig_dpi
+                    no_y = fig_yspan * fig_dpi
 
-                    t_mask = np.arange(len(tmp_times))[(tmp_times >= x_borders[j]) & (tmp_times < x_borders[j + 1])]
-                    f_mask = np.arange(len(plot_spectra))[(plot_freqs >= y_borders[i]) & (plot_freqs < y_borders[i + 1])]
+                    min_x = start_time
+                    max_x = end_time
 
-                    if len(t_mask) == 0 or len(f_mask) == 0:
-                        continue
+                    min_y = comp_min_freq
+                    max_y = comp_max_freq
 
-                    tmp_spectra[i, j] = np.max(plot_spectra[f_mask[:, None], t_mask])
+                    x_borders = np.linspace(min_x, max_x, no_x * 2)
+                    y_borders = np.linspace(min_y, max_y, no_y * 2)
+                    # checked_xy_borders = False
 
+                    tmp_spectra = np.zeros((len(y_borders) - 1, len(x_borders) - 1))
 
-        # psd and fish fundamentals frequency detection
-        if extract_funds_and_signature:
-            power = [np.array([]) for i in range(len(spec_times) - (int(nffts_per_psd) - 1))]
+                    recreate_matrix = False
+                    if (tmp_times[1] - tmp_times[0]) > (x_borders[1] - x_borders[0]):
+                        x_borders = np.linspace(min_x, max_x, (max_x - min_x) // (tmp_times[1] - tmp_times[0]) + 1)
+                        recreate_matrix = True
+                    if (spec_freqs[1] - spec_freqs[0]) > (y_borders[1] - y_borders[0]):
+                        recreate_matrix = True
+                        y_borders = np.linspace(min_y, max_y, (max_y - min_y) // (spec_freqs[1] - spec_freqs[0]) + 1)
+                    if recreate_matrix:
+                        tmp_spectra = np.zeros((len(y_borders) - 1, len(x_borders) - 1))
+
+                    get_spec_plot_matrix = True
+                    # checked_xy_borders = True
+
+                max_pool_spectrogram(plot_spectra, plot_freqs, tmp_times, y_borders, x_borders, tmp_spectra)
+
+
+            # psd and fish fundamentals frequency detection
+            if extract_funds_and_signature:
+                power = [np.array([]) for i in range(len(spec_times) - (int(nffts_per_psd) - 1))]
+
+                for t in range(len(spec_times) - (int(nffts_per_psd) - 1)):
+                    power[t] = np.mean(comb_spectra[:, t:t + nffts_per_psd], axis=1)
+
+                func = partial(harmonic_groups, spec_freqs, **kwargs)
+                a = pool.map(func, power)
+
+                # get signatures
+                # log_spectra = 10.0 * np.log10(np.array(spectra))
+                log_spectra = decibel(np.array(spectra))
+                for p in range(len(power)):
+                    tmp_fundamentals = fundamental_freqs(a[p][0])
+                    # tmp_fundamentals = a[p][0]
+                    fundamentals.append(tmp_fundamentals)
+
+                    if len(tmp_fundamentals) >= 1:
+                        f_idx = np.array([np.argmin(np.abs(spec_freqs - f)) for f in tmp_fundamentals])
+                        # embed()
+                        # quit()
+                        tmp_signatures = log_spectra[:, np.array(f_idx), p].transpose()
+                    else:
+                        tmp_signatures = np.array([])
 
-            for t in range(len(spec_times) - (int(nffts_per_psd) - 1)):
-                power[t] = np.mean(comb_spectra[:, t:t + nffts_per_psd], axis=1)
+                    signatures.append(tmp_signatures)
 
-            if plot_harmonic_groups:
-                pool = multiprocessing.Pool(1)
-            else:
-                pool = multiprocessing.Pool(core_count // 2)
-                # pool = multiprocessing.Pool(core_count - 1)
-            func = partial(harmonic_groups, spec_freqs, **kwargs)
-            a = pool.map(func, power)
-            # pool.terminate()
-
-            # get signatures
-            # log_spectra = 10.0 * np.log10(np.array(spectra))
-            log_spectra = decibel(np.array(spectra))
-            for p in range(len(power)):
-                tmp_fundamentals = fundamental_freqs(a[p][0])
-                # tmp_fundamentals = a[p][0]
-                fundamentals.append(tmp_fundamentals)
-
-                if len(tmp_fundamentals) >= 1:
-                    f_idx = np.array([np.argmin(np.abs(spec_freqs - f)) for f in tmp_fundamentals])
                     # embed()
                     # quit()
-                    tmp_signatures = log_spectra[:, np.array(f_idx), p].transpose()
-                else:
-                    tmp_signatures = np.array([])
 
-                signatures.append(tmp_signatures)
 
-                # embed()
-                # quit()
+            if spec_tiles is not None:
+                spec_tiles.append(plot_spectra[:, :len(tmp_times)], plot_freqs, tmp_times)
+
+            # print(len(fundamentals))
+            # print(len(fundamentals))
+            # print(fundamentals)
+            non_overlapping_idx = (1 - overlap_frac) * nfft
+            start_idx += int((len(spec_times) - nffts_per_psd + 1) * non_overlapping_idx)
+            times = np.concatenate((times, tmp_times))
+
+            finished = start_idx >= end_idx or last_run
+            if checkpoint_path and (finished or time.time() - last_checkpoint >= checkpoint_interval):
+                state = dict(params=checkpoint_params, start_idx=start_idx, finished=finished,
+                             fundamentals=fundamentals, signatures=signatures, positions=positions, times=times)
+                if create_plotable_spectrogram:
+                    state.update(tmp_spectra=tmp_spectra, x_borders=x_borders, y_borders=y_borders)
+                if spec_tiles is not None:
+                    state.update(spec_tiles=spec_tiles.state())
+                save_checkpoint(checkpoint_path, 'extraction', state)
+                last_checkpoint = time.time()
+    finally:
+        # release workers and shared memory also on errors and interrupts:
+        if own_pool:
             pool.terminate()
-
-
-        if create_fill_spec:
-            # embed()
-            # fill_spec_str = os.path.join(os.path.split(filename)[0], 'fill_spec.npy')
-            fill_spec_str = os.path.join('/home/raab/analysis', 'fill_spec.npy')
-            # fill_spec_str2 = os.path.join(os.path.split(filename)[0], 'fill_spec2.npy')
-            if first_run:
-                # embed()
-                # quit()
-                first_run = False
-                # t0 = time.time()
-                fill_spec = np.memmap(fill_spec_str, dtype='float', mode='w+', shape=(len(comb_spectra), len(tmp_times)), order = 'F')
-                # print('create %.1f' % (time.time() - t0))
-                # t0 = time.time()
-
-                fill_spec[:, :] = comb_spectra
-                # mem1 = False
-            else:
-                if len(pre_save_spectra) == 0:
-                    pre_save_spectra = comb_spectra
-                else:
-                    pre_save_spectra = np.append(pre_save_spectra, comb_spectra, axis=1)
-                    # embed()
-                if np.shape(pre_save_spectra)[1] >= 500:
-                    old_len = np.shape(fill_spec)[1]
-                    # embed()
-                    fill_spec = np.memmap(fill_spec_str, dtype='float', mode='r+', shape=(np.shape(pre_save_spectra)[0], np.shape(pre_save_spectra)[1] + old_len), order='F')
-                    # embed()
-                    # quit()
-                    fill_spec[:, old_len:] = pre_save_spectra
-                    pre_save_spectra = np.array([])
-
-        # print(len(fundamentals))
-        # print(len(fundamentals))
-        # print(fundamentals)
-        non_overlapping_idx = (1 - overlap_frac) * nfft
-        start_idx += int((len(spec_times) - nffts_per_psd + 1) * non_overlapping_idx)
-        times = np.concatenate((times, tmp_times))
-
-        if start_idx >= end_idx or last_run:
-            break
+        spectra = None
+        for shared in [snippet, shared_spectra]:
+            if shared is not None:
+                shared.unlink()
+                shared.close()
 
     # print(len(fundamentals))
     # print(len(signatures))
     # embed()
     # quit()
     if create_fill_spec:
-        # embed()
-        # quit()
-        # if mem1:
-        #     fill_spec = np.memmap(fill_spec_str, dtype='float', mode='w+', shape=(np.shape(fill_spec2)[0], np.shape(fill_spec2)[1]))
-        #     fill_spec[:, :] = fill_spec2
-        #
-        #     del fill_spec2
-        # # embed()
-        # # quit()
-        # os.remove(fill_spec_str2)
-
-        np.save(os.path.join(os.path.split(filename)[0], 'fill_spec_shape.npy'), np.array(np.shape(fill_spec)))
         return times, spec_freqs
     else:
         if create_plotable_spectrogram and not extract_funds_and_signature:
@@ -2711,13 +2901,15 @@ def grid_config_update(cfg):
 
 
 class Obs_tracker():
-    def __init__(self, data, samplerate, start_time, end_time, channels, data_snippet_idxs, data_file, auto, fill_spec, **kwargs):
+    def __init__(self, data, samplerate, start_time, end_time, channels, data_snippet_idxs, data_file, fill_spec,
+                 tiles_path=None, **kwargs):
 
         # write input into self.
         self.data = data
-        self.auto = auto
         self.fill_spec = fill_spec
         self.data_file = data_file
+        self.tiles_path = spectiles_path(data_file) if tiles_path is None else tiles_path
+        self.spec_tiles = None
         self.samplerate = samplerate
         self.start_time = start_time
         self.end_time = end_time
@@ -2726,6 +2918,8 @@ class Obs_tracker():
 
         self.channels = channels
         self.data_snippet_idxs = data_snippet_idxs
+        # worker pool for get_spectrum_funds_amp_signature(), not a harmonic_groups() argument:
+        self.pool = kwargs.pop('pool', None)
         self.kwargs = kwargs
         self.verbose = 0
         # embed()
@@ -2771,125 +2965,116 @@ class Obs_tracker():
             snippet_start = self.start_time
             snippet_end = self.end_time
 
-            fill_times, fill_freqs = get_spectrum_funds_amp_signature(self.data, self.samplerate, self.channels, self.data_snippet_idxs,
-                                             snippet_start, snippet_end, create_plotable_spectrogram=False,
-                                             extract_funds_and_signature=False, create_fill_spec=fill_spec,
-                                             filename=self.data_file, **self.kwargs)
-
-            np.save(os.path.join(os.path.split(self.data_file)[0], 'fill_times.npy'), fill_times)
-            np.save(os.path.join(os.path.split(self.data_file)[0], 'fill_freqs.npy'), fill_freqs)
-            print('finished')
-            quit()
-
-        if self.auto:
-            self.main_ax = None
-            self.track_snippet()
-            self.save_traces()
-            print('finished')
+            with SpecTilesWriter(self.tiles_path) as spec_tiles:
+                get_spectrum_funds_amp_signature(self.data, self.samplerate, self.channels, self.data_snippet_idxs,
+                                                 snippet_start, snippet_end, create_plotable_spectrogram=False,
+                                                 extract_funds_and_signature=False, create_fill_spec=fill_spec,
+                                                 filename=self.data_file, spec_tiles=spec_tiles, pool=self.pool, **self.kwargs)
+            print('finished: spectrogram tiles written to %s' % self.tiles_path)
             quit()
 
-        else:
-
-            # create plot environment
-            self.main_fig = plt.figure(facecolor='white', figsize=(55. / 2.54, 30. / 2.54))
-
-            # main window
-            self.main_fig.canvas.mpl_connect('key_press_event', self.keypress)
-            self.main_fig.canvas.mpl_connect('button_press_event', self.buttonpress)
-            self.main_fig.canvas.mpl_connect('button_release_event', self.buttonrelease)
-
-
-            # keymap.fullscreen : f, ctrl+f       # toggling
-            # keymap.home : h, r, home            # home or reset mnemonic
-            # keymap.back : left, c, backspace    # forward / backward keys to enable
-            # keymap.forward : right, v           #   left handed quick navigation
-            # keymap.pan : p                      # pan mnemonic
-            # keymap.zoom : o                     # zoom mnemonic
-            # keymap.save : s                     # saving current figure
-            # keymap.quit : ctrl+w, cmd+w         # close the current figure
-            # keymap.grid : g                     # switching on/off a grid in current axes
-            # keymap.yscale : l                   # toggle scaling of y-axes ('log'/'linear')
-            # keymap.xscale : L, k                # toggle scaling of x-axes ('log'/'linear')
-            # keymap.all_axes : a                 # enable all axes
-
-            plt.rcParams['keymap.save'] = ''  # was s
-            plt.rcParams['keymap.back'] = ''  # was c
-            plt.rcParams['keymap.forward'] = ''
-            plt.rcParams['keymap.yscale'] = ''
-            plt.rcParams['keymap.pan'] = ''
-            plt.rcParams['keymap.home'] = ''
-            plt.rcParams['keymap.fullscreen'] = ''
-
-            self.main_ax = self.main_fig.add_axes([0.1, 0.1, 0.8, 0.6])
-            self.spec_img_handle = None
-
-            self.tmp_plothandel_main = None  # red line
-            self.tmp_plothandel_ps = None  # red line
-            self.trace_handles = []
-            self.tmp_trace_handels = []
-
-            self.life_trace_handles = []
+        import matplotlib.pyplot as plt
+
+        # create plot environment
+        self.main_fig = plt.figure(facecolor='white', figsize=(55. / 2.54, 30. / 2.54))
+
+        # main window
+        self.main_fig.canvas.mpl_connect('key_press_event', self.keypress)
+        self.main_fig.canvas.mpl_connect('button_press_event', self.buttonpress)
+        self.main_fig.canvas.mpl_connect('button_release_event', self.buttonrelease)
+
+
+        # keymap.fullscreen : f, ctrl+f       # toggling
+        # keymap.home : h, r, home            # home or reset mnemonic
+        # keymap.back : left, c, backspace    # forward / backward keys to enable
+        # keymap.forward : right, v           #   left handed quick navigation
+        # keymap.pan : p                      # pan mnemonic
+        # keymap.zoom : o                     # zoom mnemonic
+        # keymap.save : s                     # saving current figure
+        # keymap.quit : ctrl+w, cmd+w         # close the current figure
+        # keymap.grid : g                     # switching on/off a grid in current axes
+        # keymap.yscale : l                   # toggle scaling of y-axes ('log'/'linear')
+        # keymap.xscale : L, k                # toggle scaling of x-axes ('log'/'linear')
+        # keymap.all_axes : a                 # enable all axes
+
+        plt.rcParams['keymap.save'] = ''  # was s
+        plt.rcParams['keymap.back'] = ''  # was c
+        plt.rcParams['keymap.forward'] = ''
+        plt.rcParams['keymap.yscale'] = ''
+        plt.rcParams['keymap.pan'] = ''
+        plt.rcParams['keymap.home'] = ''
+        plt.rcParams['keymap.fullscreen'] = ''
+
+        self.main_ax = self.main_fig.add_axes([0.1, 0.1, 0.8, 0.6])
+        self.spec_img_handle = None
+
+        self.tmp_plothandel_main = None  # red line
+        self.tmp_plothandel_ps = None  # red line
+        self.trace_handles = []
+        self.tmp_trace_handels = []
 
-            self.active_fundamental0_0 = None
-            self.active_fundamental0_1 = None
-            self.active_fundamental0_0_handle = None
-            self.active_fundamental0_1_handle = None
+        self.life_trace_handles = []
 
-            self.active_fundamental1_0 = None
-            self.active_fundamental1_1 = None
-            self.active_fundamental1_0_handle = None
-            self.active_fundamental1_1_handle = None
-            # self.plot_spectrum()
+        self.active_fundamental0_0 = None
+        self.active_fundamental0_1 = None
+        self.active_fundamental0_0_handle = None
+        self.active_fundamental0_1_handle = None
 
-            self.active_vec_idx = None
-            self.active_vec_idx_handle = None
-            self.active_vec_idx1 = None
-            self.active_vec_idx_handle1 = None
+        self.active_fundamental1_0 = None
+        self.active_fundamental1_1 = None
+        self.active_fundamental1_0_handle = None
+        self.active_fundamental1_1_handle = None
+        # self.plot_spectrum()
 
-            self.active_ident_handle0 = None
-            self.active_ident0 = None
-            self.active_ident_handle1 = None
-            self.active_ident1 = None
+        self.active_vec_idx = None
+        self.active_vec_idx_handle = None
+        self.active_vec_idx1 = None
+        self.active_vec_idx_handle1 = None
 
-            self.active_indices = []
-            self.active_indices_handle = []
-            self.ioi_field = [None, None, None]
-            self.ioi_field_handle = [None, None, None]
-            self.ioi_field_marker = [None, None, None]
-            self.ioi_a_error_line = [[None, None], [None, None]]
-            self.ioi_f_error_line = [[None, None], [None, None]]
-            self.ioi_t_error_line = [[None, None], [None, None]]
-            self.error_text = [None, None]
-
-            # powerspectrum window and parameters
-            self.ps_ax = None
-            self.tmp_plothandel_ps = []
-            self.tmp_harmonics_plot = None
-            self.all_peakf_dots = None
-            self.good_peakf_dots = None
+        self.active_ident_handle0 = None
+        self.active_ident0 = None
+        self.active_ident_handle1 = None
+        self.active_ident1 = None
+
+        self.active_indices = []
+        self.active_indices_handle = []
+        self.ioi_field = [None, None, None]
+        self.ioi_field_handle = [None, None, None]
+        self.ioi_field_marker = [None, None, None]
+        self.ioi_a_error_line = [[None, None], [None, None]]
+        self.ioi_f_error_line = [[None, None], [None, None]]
+        self.ioi_t_error_line = [[None, None], [None, None]]
+        self.error_text = [None, None]
+
+        # powerspectrum window and parameters
+        self.ps_ax = None
+        self.tmp_plothandel_ps = []
+        self.tmp_harmonics_plot = None
+        self.all_peakf_dots = None
+        self.good_peakf_dots = None
 
-            self.active_harmonic = None
+        self.active_harmonic = None
 
-            self.f_error_ax = None
-            # self.f_error_dist = None
-            self.a_error_ax = None
-            # self.a_error_dist = None
-            self.t_error_ax = None
+        self.f_error_ax = None
+        # self.f_error_dist = None
+        self.a_error_ax = None
+        # self.a_error_dist = None
+        self.t_error_ax = None
 
-            # get key options into plot
-            self.text_handles_key = []
-            self.text_handles_effect = []
-            self.key_options()
+        # get key options into plot
+        self.text_handles_key = []
+        self.text_handles_effect = []
+        self.key_options()
 
-            self.main_fig.canvas.draw()
-            # print('i am in the main loop')
+        self.main_fig.canvas.draw()
+        # print('i am in the main loop')
 
-            # get prim spectrum and plot it...
-            self.plot_spectrum()
+        # get prim spectrum and plot it...
+        self.plot_spectrum()
 
-            self.get_clock_time()
+        self.get_clock_time()
 
-            plt.show()
+        plt.show()
 
     def key_options(self):
         # for i in range(len(self.text_handles_key)):
@@ -3115,6 +3300,7 @@ class Obs_tracker():
                 self.text_handles_effect.append(t1)
 
     def keypress(self, event):
+        import matplotlib.pyplot as plt
         self.key_options()
 
         if event.key == 'm':
@@ -4054,6 +4240,7 @@ class Obs_tracker():
         self.main_fig.canvas.draw()
 
     def method_figure(self):
+        import matplotlib.pyplot as plt
         #          brown      purple    orange      dark blue  green      wine red   light blue
         colors = ['#BA2D22', '#53379B', '#F47F17', '#3673A4', '#AAB71B', '#DC143C', '#1E90FF']
         fs = 12
@@ -4120,14 +4307,8 @@ class Obs_tracker():
             min_freq = self.main_ax.get_ylim()[0] - 100
             max_freq = self.main_ax.get_ylim()[1] + 100
 
-            shape = np.load(os.path.join(os.path.split(self.data_file)[0], 'fill_spec_shape.npy'))
-            spec = np.memmap(os.path.join(os.path.split(self.data_file)[0], 'fill_spec.npy'), dtype='float', mode='r', shape=tuple(shape), order='F')
-            freqs = np.load(os.path.join(os.path.split(self.data_file)[0], 'fill_freqs.npy'))
-            times = np.load(os.path.join(os.path.split(self.data_file)[0], 'fill_times.npy'))
-
-            part_f_lims = np.arange(len(freqs))[(freqs >= min_freq) & (freqs <= max_freq)]
-            part_t_lims = np.arange(len(times))[(times >= limitations[0]) & (times <= limitations[1])]
-            part_spectra = spec[part_f_lims[0]:part_f_lims[-1] + 1, part_t_lims[0]:part_t_lims[-1] + 1]
+            part_spectra, freqs, times = SpecTiles(self.tiles_path).spectrogram(limitations[0], limitations[1],
+                                                                                 min_freq, max_freq, level=0)
 
             fig = plt.figure(facecolor='white', figsize=(20. / 2.54, 24. / 2.54))
             ax0 = fig.add_subplot(311)
@@ -4635,16 +4816,10 @@ class Obs_tracker():
 
     def save_traces(self):
         folder = os.path.split(self.data_file)[0]
-        np.save(os.path.join(folder, 'fund_v.npy'), self.fund_v)
-        np.save(os.path.join(folder, 'sign_v.npy'), self.sign_v)
-        np.save(os.path.join(folder, 'idx_v.npy'), self.idx_v)
-        np.save(os.path.join(folder, 'ident_v.npy'), self.ident_v)
-        np.save(os.path.join(folder, 'times.npy'), self.times)
-        np.save(os.path.join(folder, 'meta.npy'), np.array([self.start_time, self.end_time]))
         # np.save(os.path.join(folder, 'a_error_dist.npy'), self.a_error_dist)
         # np.save(os.path.join(folder, 'f_error_dist.npy'), self.f_error_dist)
-
-        np.save(os.path.join(folder, 'spec.npy'), self.tmp_spectra)
+        save_tracking_results(folder, self.fund_v, self.sign_v, self.idx_v, self.ident_v, self.times,
+                              self.start_time, self.end_time, self.tmp_spectra)
 
     def fish_hist(self):
         if not self.ps_ax:
@@ -4908,26 +5083,20 @@ class Obs_tracker():
             min_freq = self.main_ax.get_ylim()[0]
             max_freq = self.main_ax.get_ylim()[1]
 
-            # if os.path.exists(os.path.join(os.path.split(self.data_file)[0], 'fill_spec.npy')):
-            if os.path.exists(os.path.join(os.path.split(self.data_file)[0], 'fill_freqs.npy')):
-                # embed()
-                # quit()
-                self.fill_spec_shape = np.load(os.path.join(os.path.split(self.data_file)[0], 'fill_spec_shape.npy'))
-                # ToDo: untill kraken is up load this from loacal harddrive...
-                self.fill_spec = np.memmap(os.path.join(os.path.split(self.data_file)[0], 'fill_spec.npy'), dtype='float', mode='r', shape=tuple(self.fill_spec_shape), order='F')
-                # self.fill_spec = np.memmap('/home/raab/analysis/fill_spec.npy', dtype='float', mode='r', shape=tuple(self.fill_spec_shape), order='F')
-                self.fill_freqs = np.load(os.path.join(os.path.split(self.data_file)[0], 'fill_freqs.npy'))
-                self.fill_times = np.load(os.path.join(os.path.split(self.data_file)[0], 'fill_times.npy'))
-                # embed()
-                # quit()
+            if check_spectiles(self.tiles_path):
+                if self.spec_tiles is None:
+                    self.spec_tiles = SpecTiles(self.tiles_path)
+                # max-pooled tiles of the zoom level matching the figure width:
+                n_columns = int(2 * self.main_fig.get_figwidth() * self.main_fig.dpi)
+                self.part_spectra, self.fill_freqs, self.fill_times = \
+                    self.spec_tiles.spectrogram(limitations[0] + self.spec_shift, limitations[1] + self.spec_shift,
+                                                min_freq, max_freq, n_columns)
+                self.part_f_lims = np.arange(len(self.fill_freqs))
+                self.part_t_lims = np.arange(len(self.fill_times))
 
                 self.spec_img_handle.remove()
 
                 # f_lims = np.arange(len(self.fill_freqs)-1, -1, -1)[(self.fill_freqs >= min_freq) & (self.fill_freqs <= max_freq)]
-                self.part_f_lims = np.arange(len(self.fill_freqs))[(self.fill_freqs >= min_freq) & (self.fill_freqs <= max_freq)]
-                self.part_t_lims = np.arange(len(self.fill_times))[(self.fill_times >= limitations[0] + self.spec_shift) & (self.fill_times <= limitations[1] + self.spec_shift)]
-                self.part_spectra = self.fill_spec[self.part_f_lims[0]:self.part_f_lims[-1]+1, self.part_t_lims[0]:self.part_t_lims[-1]+1]
-
                 self.spec_img_handle = self.main_ax.imshow(decibel(self.part_spectra)[::-1],
                                                            extent=[limitations[0], limitations[1], min_freq, max_freq],
                                                            aspect='auto', alpha=0.7, cmap='jet', interpolation='gaussian')
@@ -4936,7 +5105,7 @@ class Obs_tracker():
                 self.main_ax.tick_params(labelsize=10)
 
             else:
-                print('missing file')
+                print('missing spectrogram tiles %s, compute them with the -s option' % self.tiles_path)
         else:
             if part_spec:
                 limitations = self.main_ax.get_xlim()
@@ -4946,7 +5115,7 @@ class Obs_tracker():
                 self.part_spectra, self.part_times = get_spectrum_funds_amp_signature(
                     self.data, self.samplerate, self.channels, self.data_snippet_idxs, limitations[0], limitations[1],
                     comp_min_freq=min_freq, comp_max_freq=max_freq, create_plotable_spectrogram=True,
-                    extract_funds_and_signature=False, **self.kwargs)
+                    extract_funds_and_signature=False, pool=self.pool, **self.kwargs)
 
                     # self.main_fig.delaxes(self.main_ax)
                 self.spec_img_handle.remove()
@@ -4962,14 +5131,14 @@ class Obs_tracker():
                 if not hasattr(self.tmp_spectra, '__len__'):
                     self.tmp_spectra, self.times = get_spectrum_funds_amp_signature(
                         self.data, self.samplerate, self.channels, self.data_snippet_idxs, self.start_time, self.end_time,
-                        create_plotable_spectrogram=True, extract_funds_and_signature=False,  **self.kwargs)
+                        create_plotable_spectrogram=True, extract_funds_and_signature=False, pool=self.pool,
+                        **self.kwargs)
 
-                if not self.auto:
-                    self.spec_img_handle = self.main_ax.imshow(decibel(self.tmp_spectra)[::-1], extent=[self.start_time, self.end_time, 0, 2000],
-                                        aspect='auto', alpha=0.7, cmap='jet', interpolation='gaussian')
-                    self.main_ax.set_xlabel('time', fontsize=12)
-                    self.main_ax.set_ylabel('frequency [Hz]', fontsize=12)
-                    self.main_ax.tick_params(labelsize=10)
+                self.spec_img_handle = self.main_ax.imshow(decibel(self.tmp_spectra)[::-1], extent=[self.start_time, self.end_time, 0, 2000],
+                                    aspect='auto', alpha=0.7, cmap='jet', interpolation='gaussian')
+                self.main_ax.set_xlabel('time', fontsize=12)
+                self.main_ax.set_ylabel('frequency [Hz]', fontsize=12)
+                self.main_ax.tick_params(labelsize=10)
 
     def track_snippet(self):
         if hasattr(self.fund_v, '__len__'):
@@ -4995,16 +5164,10 @@ class Obs_tracker():
         # embed()
         # quit()
         if not hasattr(self.fund_v, '__len__'):
-            if not self.auto:
-                self.fundamentals, self.signatures, self.positions, self.times = \
-                    get_spectrum_funds_amp_signature(self.data, self.samplerate, self.channels, self.data_snippet_idxs,
-                                                     snippet_start, snippet_end, create_plotable_spectrogram=False,
-                                                     extract_funds_and_signature=True, **self.kwargs)
-            else:
-                self.fundamentals, self.signatures, self.positions, self.times, self.tmp_spectra = \
-                    get_spectrum_funds_amp_signature(self.data, self.samplerate, self.channels, self.data_snippet_idxs,
-                                                     snippet_start, snippet_end, create_plotable_spectrogram=True,
-                                                     extract_funds_and_signature=True, **self.kwargs)
+            self.fundamentals, self.signatures, self.positions, self.times = \
+                get_spectrum_funds_amp_signature(self.data, self.samplerate, self.channels, self.data_snippet_idxs,
+                                                 snippet_start, snippet_end, create_plotable_spectrogram=False,
+                                                 extract_funds_and_signature=True, pool=self.pool, **self.kwargs)
         else:
             mask = np.arange(len(self.idx_v))[(self.times[self.idx_v] >= snippet_start) & (self.times[self.idx_v] <= snippet_end)]
             self.fundamentals = []
@@ -5041,10 +5204,7 @@ class Obs_tracker():
                                  self.times[mask], self.kwargs['freq_tolerance'], n_channels=len(self.channels),
                                  fig=self.main_fig, ax=self.main_ax, freq_lims=self.main_ax.get_ylim())
         else:
-            if not self.auto:
-                freq_lims = self.main_ax.get_ylim()
-            else:
-                freq_lims = (400, 1200)
+            freq_lims = self.main_ax.get_ylim()
 
             self.fund_v, self.ident_v, self.idx_v, self.sign_v, self.a_error_dist, self.f_error_dist, self.idx_of_origin_v = \
                 freq_tracking_v4(np.array(self.fundamentals), np.array(self.signatures),
@@ -5065,8 +5225,7 @@ class Obs_tracker():
             #                  self.times[mask], self.kwargs['freq_tolerance'], n_channels=len(self.channels),
             #                  freq_lims= freq_lims)
 
-        if not self.auto:
-            self.plot_traces(clear_traces=True)
+        self.plot_traces(clear_traces=True)
 
     def plot_error(self):
         if self.ps_ax:
@@ -5229,10 +5388,12 @@ class Obs_tracker():
             #                                           fresolution = self.fresolution, overlap_frac = self.overlap_frac)
             if self.kwargs['noice_cancel']:
                 c_spectrum, c_freqs, c_time = spectrogram(denoiced_data[channel], self.samplerate,
-                                                      fresolution=self.kwargs['fresolution'], overlap_frac=self.kwargs['overlap_frac'])
+                                                      fresolution=self.kwargs['fresolution'], overlap_frac=self.kwargs['overlap_frac'],
+                                                      dtype=self.kwargs['dtype'])
             else:
                 c_spectrum, c_freqs, c_time = spectrogram(self.data[data_idx0: data_idx1, channel], self.samplerate,
-                                                          fresolution=self.kwargs['fresolution'], overlap_frac=self.kwargs['overlap_frac'])
+                                                          fresolution=self.kwargs['fresolution'], overlap_frac=self.kwargs['overlap_frac'],
+                                                          dtype=self.kwargs['dtype'])
             if not hasattr(all_c_freqs, '__len__'):
                 all_c_freqs = c_freqs
             all_c_spectra.append(c_spectrum)
@@ -5365,7 +5526,219 @@ class Obs_tracker():
             self.main_ax.set_xticks(use_timestamps_s_origin)
             self.main_ax.set_xticklabels(x_ticks)
 
-def fish_tracker(data_file, start_time=0.0, end_time=-1.0, grid=False, auto = False, fill_spec = False, transect_data = False, data_snippet_secs=15., verbose=0, **kwargs):
+def save_tracking_results(folder, fund_v, sign_v, idx_v, ident_v, times, start_time, end_time, spectra=None):
+    """
+    Save the results of the tracking as numpy files.
+
+    Parameters
+    ----------
+    folder: string
+        directory where the files are written to.
+    fund_v: array
+        flattened fundamtantals array containing all detected EOD frequencies in the recording.
+    sign_v: 2d-array
+        for each fundamental frequency the power of this frequency on the used electodes.
+    idx_v: array
+        respective index vectro impliing the time of the detected frequency.
+    ident_v: array
+        respective assigned identites.
+    times: array
+        respective time vector.
+    start_time: float
+        start time of the analysed data in seconds.
+    end_time: float
+        end time of the analysed data in seconds.
+    spectra: 2d-array or None
+        if not None, the plotable spectrogram saved to 'spec.npy'.
+    """
+    np.save(os.path.join(folder, 'fund_v.npy'), fund_v)
+    np.save(os.path.join(folder, 'sign_v.npy'), sign_v)
+    np.save(os.path.join(folder, 'idx_v.npy'), idx_v)
+    np.save(os.path.join(folder, 'ident_v.npy'), ident_v)
+    np.save(os.path.join(folder, 'times.npy'), times)
+    np.save(os.path.join(folder, 'meta.npy'), np.array([start_time, end_time]))
+    if spectra is not None:
+        np.save(os.path.join(folder, 'spec.npy'), spectra)
+
+
+def open_tracker_data(data_file, grid=False, transect_data=False, dtype='float64', verbose=0):
+    """
+    Open a recording and select the electrodes used for tracking.
+
+    Parameters
+    ----------
+    data_file: string
+        filepath of the analysed data file.
+    grid: int
+        grid information, see get_grid_proportions().
+    transect_data: bool
+        only use the first channel of transect data.
+    dtype: string
+        data type of the loaded data.
+    verbose: int
+        verbosity level.
+
+    Returns
+    -------
+    data: array or DataLoader
+        the data with time as first and channels as second dimension.
+    samplerate: float
+        sampling rate of the data in Hertz.
+    channels: list of int
+        indices of the channels in data used for tracking.
+    """
+    if data_file.endswith('.mat') and find_cache(data_file) is None:
+        if verbose >= 1:
+            print ('loading mat file')
+        data, samplerate, unit = load_matfile(data_file)
+        data = np.asarray(data, dtype)
+
+    else:
+        if transect_data:
+            data = open_data(data_file, 0, 60.0, 10.0, dtype=dtype)
+        else:
+            data = open_data(data_file, -1, 60.0, 10.0, dtype=dtype)
+        samplerate = data.samplerate
+        # embed()
+        # quit()
+
+    channels, coords, neighbours = get_grid_proportions(data, grid, n_tolerance_e=2, verbose=verbose)
+    if not data_file.endswith('.mat') and not transect_data and len(channels) < data.shape[1] and \
+       (check_fishgrid(data_file) or check_relacs(data_file)):
+        # read only the electrodes of the selected grid:
+        data.close()
+        data = open_data(data_file, list(channels), 60.0, 10.0, dtype=dtype)
+        channels = range(len(channels))
+    return data, samplerate, channels
+
+
+def tracker_pool(jobs=None):
+    """
+    Worker pool for spectrograms and harmonic groups.
+
+    Parameters
+    ----------
+    jobs: int or None
+        number of worker processes. If 0 use all CPU cores, if None half of them.
+
+    Returns
+    -------
+    pool: multiprocessing.Pool
+        the worker pool, to be terminated by the caller.
+    """
+    if jobs is None:
+        cpus = max(1, multiprocessing.cpu_count() // 2)
+    else:
+        cpus = multiprocessing.cpu_count() if jobs == 0 else jobs
+    return multiprocessing.Pool(cpus)
+
+
+def batch_tracker(data_file, start_time=0.0, end_time=-1.0, grid=False, transect_data=False, data_snippet_secs=15.,
+                  freq_tolerance=10., freq_lims=(400, 1200), connect_traces=True, save=True, verbose=0,
+                  dtype='float64', jobs=None, tiles_path=None, checkpoint_path=None, resume=False, **kwargs):
+    """
+    Track wave-type electric fish in a recording without any graphical user interface.
+
+    Extracts fundamental frequencies and their signatures snippet by snippet, assigns them to fish identities with
+    freq_tracking_v4(), optionally connects the resulting trace fragments with auto_connect_traces(), and saves the
+    results next to the data file like the automatic mode of fish_tracker(). Matplotlib is not used at all, so this
+    runs on compute nodes without a display.
+
+    Parameters
+    ----------
+    data_file: string
+        filepath of the analysed data file.
+    start_time: float
+        analyze data from this time on in seconds.
+    end_time: float
+        stop analysis at this time in seconds. If negative, analyse up to the end of the recording.
+    grid: int
+        grid information, see get_grid_proportions().
+    transect_data: bool
+        only use the first channel of transect data.
+    data_snippet_secs: float
+        duration of data snipped processed at once in seconds.
+    freq_tolerance: float
+        frequency tolerance of the tracking in Hertz, see freq_tracking_v4().
+    freq_lims: tuple
+        minimum and maximum frequency to be tracked in Hertz.
+    connect_traces: bool
+        connect trace fragments of the same fish with auto_connect_traces().
+    save: bool
+        save the results with save_tracking_results() into the directory of the data file.
+    verbose: int
+        verbosity level.
+    dtype: string
+        data type of the loaded data and the spectrograms, 'float32' halves the memory footprint.
+    jobs: int
+        number of worker processes used for spectrograms and harmonic groups.
+        If 0 use all CPU cores, if None half of them.
+    tiles_path: string
+        directory of the spectrogram tiles that are written if they do not exist yet.
+        Defaults to the data file with '.tiles' appended.
+    checkpoint_path: string
+        directory where the state of the extraction of fundamentals and of the tracking is regularly saved.
+        Defaults to the data file with '.checkpoint' appended.
+    resume: bool
+        continue from the last checkpoint in checkpoint_path.
+    kwargs: dict
+        further arguments for get_spectrum_funds_amp_signature() and harmonic_groups(),
+        as returned by tracker_args(), psd_peak_detection_args() and harmonic_groups_args().
+
+    Returns
+    -------
+    fund_v: array
+        flattened fundamtantals array containing all detected EOD frequencies in the recording.
+    ident_v: array
+        respective assigned identites.
+    idx_v: array
+        respective index vectro impliing the time of the detected frequency.
+    sign_v: 2d-array
+        for each fundamental frequency the power of this frequency on the used electodes.
+    times: array
+        respective time vector.
+    """
+    data, samplerate, channels = open_tracker_data(data_file, grid, transect_data, dtype, verbose)
+    if end_time < 0.0:
+        end_time = len(data) / samplerate
+    data_snippet_idxs = int(data_snippet_secs * samplerate)
+    if tiles_path is None:
+        tiles_path = spectiles_path(data_file)
+    if checkpoint_path is None:
+        checkpoint_path = data_file.rstrip(os.sep) + '.checkpoint'
+
+    pool = tracker_pool(jobs)
+    try:
+        spec_tiles = None
+        if not check_spectiles(tiles_path):
+            spec_tiles = SpecTilesWriter(tiles_path)
+        fundamentals, signatures, positions, times, spectra = \
+            get_spectrum_funds_amp_signature(data, samplerate, channels, data_snippet_idxs, start_time, end_time,
+                                             create_plotable_spectrogram=True, extract_funds_and_signature=True,
+                                             spec_tiles=spec_tiles, checkpoint_path=checkpoint_path, resume=resume,
+                                             dtype=dtype, pool=pool, **kwargs)
+        if spec_tiles is not None:
+            spec_tiles.close()
+    finally:
+        pool.terminate()
+
+    mask = np.arange(len(times))[(times >= start_time) & (times <= end_time)]
+    fund_v, ident_v, idx_v, sign_v, a_error_dist, f_error_dist, idx_of_origin_v = \
+        freq_tracking_v4(fundamentals, signatures, times[mask], freq_tolerance,
+                         n_channels=len(channels), freq_lims=freq_lims, checkpoint_path=checkpoint_path,
+                         checkpoint_interval=kwargs.get('checkpoint_interval', 600.), resume=resume)
+    times = times[mask]
+    if connect_traces:
+        ident_v = auto_connect_traces(fund_v, idx_v, ident_v, times)
+
+    if save:
+        save_tracking_results(os.path.split(data_file)[0], fund_v, sign_v, idx_v, ident_v, times,
+                              start_time, end_time, spectra)
+    return fund_v, ident_v, idx_v, sign_v, times
+
+
+def fish_tracker(data_file, start_time=0.0, end_time=-1.0, grid=False, auto = False, fill_spec = False, transect_data = False, data_snippet_secs=15., verbose=0, dtype='float64', jobs=None, tiles_path=None,
+                 checkpoint_path=None, resume=False, **kwargs):
     """
     Performs the steps to analyse long-term recordings of wave-type weakly electric fish including frequency analysis,
     fish tracking and more.
@@ -5380,29 +5753,37 @@ def fish_tracker(data_file, start_time=0.0, end_time=-1.0, grid=False, auto = Fa
     :param nffts_per_psd: (int) amount of nffts used to calculate one psd.
     :param start_time: (int) analyze data from this time on (in seconds).  XXX this should be a float!!!!
     :param end_time: (int) stop analysis at this time (in seconds).  XXX this should be a float!!!!
+    :param auto: (bool) track the whole recording with batch_tracker() without graphical user interface and
+                 save the results.
     :param plot_data_func: (function) if plot_data_func = plot_fishes creates a plot of the sorted fishes.
     :param save_original_fishes: (boolean) if True saves the sorted fishes after the first level of fish sorting.
+    :param dtype: (string) data type of the loaded data and the spectrograms, 'float32' halves the memory footprint.
+    :param jobs: (int) number of worker processes used for spectrograms and harmonic groups throughout the run.
+                 If 0 use all CPU cores, if None half of them.
+    :param tiles_path: (string) directory of the spectrogram tiles written with fill_spec or in auto mode and
+                       used for browsing the spectrogram. Defaults to the data file with '.tiles' appended.
+    :param checkpoint_path: (string) directory where automatic runs regularly save the state of the extraction of
+                            fundamentals and of the tracking. Defaults to the data file with '.checkpoint' appended.
+    :param resume: (bool) continue an automatic run from the last checkpoint in checkpoint_path.
     :param kwargs: further arguments are passed on to harmonic_groups().
     """
-    if data_file.endswith('.mat'):
-        if verbose >= 1:
-            print ('loading mat file')
-        data, samplerate = load_matfile(data_file)
-
-    else:
-        if transect_data:
-            data = open_data(data_file, 0, 60.0, 10.0)
-        else:
-            data = open_data(data_file, -1, 60.0, 10.0)
-        samplerate = data.samplerate
-        # embed()
-        # quit()
-
-    channels, coords, neighbours = get_grid_proportions(data, grid, n_tolerance_e=2, verbose=verbose)
+    if auto:
+        batch_tracker(data_file, start_time, end_time, grid, transect_data, data_snippet_secs, connect_traces=False,
+                      verbose=verbose, dtype=dtype, jobs=jobs, tiles_path=tiles_path,
+                      checkpoint_path=checkpoint_path, resume=resume, **kwargs)
+        print('finished')
+        return
 
+    data, samplerate, channels = open_tracker_data(data_file, grid, transect_data, dtype, verbose)
     data_snippet_idxs = int(data_snippet_secs * samplerate)
 
-    Obs_tracker(data, samplerate, start_time, end_time, channels, data_snippet_idxs, data_file, auto, fill_spec, **kwargs)
+    # one worker pool for the whole run:
+    pool = tracker_pool(jobs)
+    try:
+        Obs_tracker(data, samplerate, start_time, end_time, channels, data_snippet_idxs, data_file, fill_spec,
+                    tiles_path=tiles_path, dtype=dtype, pool=pool, **kwargs)
+    finally:
+        pool.terminate()
 
 
 def main():
@@ -5425,13 +5806,25 @@ def main():
     parser.add_argument('-g', action='count', dest='grid', help='grid information')
     parser.add_argument('-p', dest='save_plot', action='store_true', help='save output plot as png file')
     parser.add_argument('-a', dest='auto', action='store_true', help='automatically analyse data and save results')
+    parser.add_argument('-b', dest='batch', action='store_true',
+                        help='like -a, but also connect trace fragments (batch mode without graphical user interface)')
     parser.add_argument('-n', dest='noice_cancel', action='store_true', help='cancsels noice by substracting mean of all electrodes from all electrodes')
     parser.add_argument('-s', dest='fill_spec', action='store_true',
-                        help='compute whole spec--- CARE: big data requirement')
+                        help='compute spectrogram tiles of the whole recording for browsing')
+    parser.add_argument('-T', dest='tiles_path', default=None, type=str, metavar='PATH',
+                        help='directory of the spectrogram tiles (defaults to the data file with .tiles appended)')
     parser.add_argument('-f', dest='plot_harmonic_groups', action='store_true', help='plot harmonic group detection')
     parser.add_argument('-t', dest='transect_data', action='store_true', help='adapt parameters for transect data')
     parser.add_argument('-o', dest='output_folder', default=".", type=str,
                         help="path where to store results and figures")
+    parser.add_argument('-k', dest='checkpoint_path', default=None, type=str, metavar='PATH',
+                        help='directory for checkpoints of automatic runs (defaults to the data file with .checkpoint appended)')
+    parser.add_argument('--resume', dest='resume', action='store_true',
+                        help='continue an automatic run (-a or -b) from its last checkpoint')
+    parser.add_argument('-j', dest='jobs', nargs='?', type=int, default=None, const=0,
+                        help='number of jobs run in parallel. Without argument use all CPU cores, by default half of them.')
+    parser.add_argument('-d', dest='dtype', default=None, choices=['float32', 'float64'],
+                        help='data type of data and spectrograms (overrides the configuration)')
     args = parser.parse_args()
 
     if not os.path.exists(args.output_folder):
@@ -5467,6 +5860,8 @@ def main():
     t_kwargs.update(harmonic_groups_args(cfg))
     t_kwargs.update(tracker_args(cfg))
     t_kwargs['noice_cancel'] = args.noice_cancel
+    if args.dtype is not None:
+        t_kwargs['dtype'] = args.dtype
 
     t_kwargs = grid_config_update(t_kwargs)
 
@@ -5477,7 +5872,15 @@ def main():
     # embed()
     # quit()
     print('\nAnalysing %s' % datafile)
-    fish_tracker(datafile, args.start_time * 60.0, args.end_time * 60.0, args.grid, args.auto, args.fill_spec, args.transect_data, **t_kwargs)
+    if args.batch:
+        batch_tracker(datafile, args.start_time * 60.0, args.end_time * 60.0, args.grid, args.transect_data,
+                      jobs=args.jobs, tiles_path=args.tiles_path, checkpoint_path=args.checkpoint_path,
+                      resume=args.resume, **t_kwargs)
+        print('finished')
+        return
+    fish_tracker(datafile, args.start_time * 60.0, args.end_time * 60.0, args.grid, args.auto, args.fill_spec, args.transect_data,
+                 jobs=args.jobs, tiles_path=args.tiles_path, checkpoint_path=args.checkpoint_path,
+                 resume=args.resume, **t_kwargs)
 
 if __name__ == '__main__':
     # how to execute this code properly
@@ -0,0 +1,128 @@
+"""
+# Index the detections of the fish trackers.
+
+The trackers store all detected EOD frequencies of a recording in
+flattened arrays (`fund_v`, `idx_v`, `ident_v`, ...) with one entry per
+detection. The functions of this module build indices into these
+arrays, such that the detections of a time step or of an identity are
+found without scanning the whole arrays.
+
+## Time steps
+- `get_idx_offsets()`: offsets of the detections of each time step.
+- `get_time_range()`: indices of the detections of a range of time steps.
+
+## Identities
+- `get_ident_index()`: indices of the detections of each identity.
+- `get_ident_median_steps()`: median frequency step of each identity.
+"""
+
+import numpy as np
+
+
+def get_idx_offsets(idx_v, n_times):
+    """
+    Offsets of the data points of each time step in the flattened arrays.
+
+    The data points of time step i are fund_v[idx_offsets[i]:idx_offsets[i+1]]. This avoids scanning the whole
+    idx_v for each time step.
+
+    Parameters
+    ----------
+    idx_v: array
+        sorted time indices of the data points.
+    n_times: int
+        number of time steps.
+
+    Returns
+    -------
+    idx_offsets: array
+        for each time step the index of its first data point (len = n_times + 1).
+    """
+    return np.searchsorted(idx_v, np.arange(n_times + 1), side='left')
+
+
+def get_time_range(idx_offsets, i0, i1):
+    """
+    Indices of the data points of the time steps from i0 up to (excluding) i1.
+
+    Parameters
+    ----------
+    idx_offsets: array
+        offsets of the time steps as returned by get_idx_offsets().
+    i0: int
+        first time step.
+    i1: int
+        time step following the last one.
+
+    Returns
+    -------
+    indices: array
+        indices of the data points in the flattened arrays.
+    """
+    n_times = len(idx_offsets) - 1
+    return np.arange(idx_offsets[min(max(i0, 0), n_times)], idx_offsets[min(max(i1, 0), n_times)])
+
+
+def get_ident_index(ident_v):
+    """
+    Indices of the data points of each identity.
+
+    The data points of identity idents[k] are order[ident_offsets[k]:ident_offsets[k+1]], sorted in time. This avoids
+    scanning the whole ident_v for each identity. Needs to be rebuilt when identities change.
+
+    Parameters
+    ----------
+    ident_v: array
+        identities of the data points, NaN for unassigned ones.
+
+    Returns
+    -------
+    idents: array
+        sorted unique identities.
+    order: array
+        indices of the assigned data points sorted by identity.
+    ident_offsets: array
+        for each identity the index of its first data point in order (len = len(idents) + 1).
+    """
+    valid = np.flatnonzero(~np.isnan(ident_v))
+    order = valid[np.argsort(ident_v[valid], kind='mergesort')]
+    idents, ident_offsets = np.unique(ident_v[order], return_index=True)
+    ident_offsets = np.append(ident_offsets, len(order))
+    return idents, order, ident_offsets
+
+
+def get_ident_median_steps(fund_v, order, ident_offsets):
+    """
+    Median of the absolute frequency steps between consecutive data points of each identity.
+
+    Parameters
+    ----------
+    fund_v: array
+        flattened fundamtantals array containing all detected EOD frequencies in the recording.
+    order: array
+        indices of the assigned data points sorted by identity as returned by get_ident_index().
+    ident_offsets: array
+        for each identity the index of its first data point in order as returned by get_ident_index().
+
+    Returns
+    -------
+    median_steps: array
+        for each identity the median of the absolute frequency steps, NaN for identities with a single data point.
+    """
+    counts = np.diff(ident_offsets)
+    groups = np.repeat(np.arange(len(counts)), counts)
+    steps = np.abs(np.diff(fund_v[order]))
+    within = groups[:-1] == groups[1:]  # steps between data points of the same identity
+    steps = steps[within]
+    step_groups = groups[1:][within]
+    # like np.median(), identities with NaN steps have a NaN median:
+    nan_groups = np.bincount(step_groups[np.isnan(steps)], minlength=len(counts)) > 0
+    steps = steps[np.lexsort((steps, step_groups))]
+    n_steps = np.maximum(counts - 1, 0)
+    step_offsets = np.cumsum(n_steps) - n_steps
+    median_steps = np.full(len(counts), np.nan)
+    sel = (n_steps > 0) & ~nan_groups
+    lower = step_offsets[sel] + (n_steps[sel] - 1) // 2
+    upper = step_offsets[sel] + n_steps[sel] // 2
+    median_steps[sel] = (steps[lower] + steps[upper]) / 2
+    return median_steps